@@ -9,6 +9,13 @@ Main package for asyncqlio - a Python 3.5+ async ORM built on top of asyncio.
     db
     orm
     backends
+    cache
+    events
+    explain
+    metrics
+    routing
+    sharding
+    slowlog
 
     exc
     meta
@@ -29,10 +36,13 @@ except DistributionNotFound:
     pass
 
 from asyncqlio.backends.base import BaseConnector, BaseDialect, BaseResultSet, BaseTransaction
+from asyncqlio.cache import QueryCache
 # import helpers
 from asyncqlio.db import DatabaseInterface
 from asyncqlio.exc import *
+from asyncqlio.orm.functions import func
 from asyncqlio.orm.inspection import get_pk, get_row_history, get_row_session
+from asyncqlio.orm.query import innerjoin, joinedload, noload, selectload
 # orm
 from asyncqlio.orm.schema.column import Column
 from asyncqlio.orm.schema.index import Index
@@ -3,12 +3,15 @@ The base implementation of a backend. This provides some ABC classes.
 """
 import asyncio
 import collections
+import time
 import typing
 from abc import abstractmethod
 from collections import OrderedDict
 from urllib.parse import ParseResult, parse_qs
 
+from asyncqlio import explain as md_explain
 from asyncqlio.meta import AsyncABC
+from asyncqlio.utils import Histogram
 
 
 class BaseDialect:
@@ -64,6 +67,21 @@ class BaseDialect:
         """
         return False
 
+    @property
+    def has_snapshots(self) -> bool:
+        """
+        Returns True if this dialect can run read-only transactions on a consistent snapshot.
+        """
+        return False
+
+    @property
+    def has_high_nulls(self) -> bool:
+        """
+        Returns True if this dialect sorts NULL as larger than every other value, rather than
+        smaller.
+        """
+        return False
+
     @property
     def lastval_method(self):
         """
@@ -116,6 +134,27 @@ class BaseDialect:
         """
         raise NotImplementedError
 
+    def get_explain_sql(self, sql: str, *, analyze: bool = False) -> str:
+        """
+        Get a query that explains how the database would run another query.
+
+        :param sql: The SQL of the query to explain.
+        :param analyze: If the query should be run, so that the plan includes the actual rows and \
+            timings.
+        """
+        raise NotImplementedError
+
+    def transform_explain_rows(self, rows: 'typing.List[DictRow]',
+                               *, analyze: bool = False) -> 'md_explain.QueryPlan':
+        """
+        Transform the rows returned from a query made with :meth:`.BaseDialect.get_explain_sql`
+        into a :class:`.QueryPlan`.
+
+        :param rows: A list of :class:`.DictRow` objects returned from the database.
+        :param analyze: If the query was analyzed.
+        """
+        raise NotImplementedError
+
     def transform_columns_to_indexes(self, *rows: 'DictRow', table_name: str):
         """
         Transform appropriate database rows to Column objects.
@@ -146,6 +185,9 @@ class BaseResultSet(collections.AsyncIterator, AsyncABC):
         - :attr:`.BaseResultSet.fetch_many`
     """
 
+    #: The :class:`.QueryEvent` for the query that created this result set, if events are enabled.
+    event = None
+
     @property
     @abstractmethod
     def keys(self) -> typing.Iterable[str]:
@@ -224,13 +266,39 @@ class BaseTransaction(AsyncABC):
     These methods are not required to be implemented, but will raise :class:`NotImplementedError` if
     they are not.
 
+    :meth:`.BaseTransaction.fetch_one`, :meth:`.BaseTransaction.fetch_all` and
+    :meth:`.BaseTransaction.fetch_chunk` are implemented with :meth:`.BaseTransaction.cursor`, and
+    can be overridden by drivers that can execute and fetch in one step.
+
     This class takes one parameter in the constructor: the :class:`.BaseConnector` used to connect
-    to the DB server.
+    to the DB server. The transaction options are passed as keyword arguments.
     """
 
-    def __init__(self, connector: 'BaseConnector'):
+    def __init__(self, connector: 'BaseConnector', *,
+                 autocommit: bool = False, readonly: bool = False, snapshot: bool = False):
+        """
+        :param connector: The :class:`.BaseConnector` used to connect to the DB server.
+        :param autocommit: If statements should be run outside of an explicit transaction. \
+            :meth:`.BaseTransaction.begin` only acquires a connection, and
+            :meth:`.BaseTransaction.commit` and :meth:`.BaseTransaction.rollback` do nothing.
+        :param readonly: If this transaction will only read from the database.
+        :param snapshot: If every statement in this transaction should see the same snapshot of \
+            the database. Snapshot transactions are always read-only.
+        """
+        if autocommit and snapshot:
+            raise ValueError("Autocommit transactions can't use a snapshot")
+
         self.connector = connector
 
+        #: If statements are run outside of an explicit transaction.
+        self.autocommit = autocommit
+
+        #: If this transaction only reads from the database.
+        self.readonly = readonly or snapshot
+
+        #: If this transaction reads from a consistent snapshot.
+        self.snapshot = snapshot
+
     async def __aenter__(self) -> 'BaseTransaction':
         await self.begin()
         return self
@@ -296,6 +364,51 @@ class BaseTransaction(AsyncABC):
         :return: The :class:`.BaseResultSet` returned from the query, if applicable.
         """
 
+    async def fetch_one(self, sql: str,
+                        params: typing.Union[typing.Mapping, typing.Iterable] = None) -> 'DictRow':
+        """
+        Executes SQL, and fetches the first row.
+
+        Children classes can override this to execute, fetch and close the cursor at once.
+
+        :param sql: The SQL statement to execute.
+        :param params: Any parameters to pass to the query.
+        :return: The first row returned from the query, or None if there were no rows.
+        """
+        async with await self.cursor(sql, params) as cursor:
+            return await cursor.fetch_row()
+
+    async def fetch_all(self, sql: str,
+                        params: typing.Union[typing.Mapping, typing.Iterable] = None) \
+            -> 'typing.List[DictRow]':
+        """
+        Executes SQL, and fetches every row.
+
+        Children classes can override this to execute, fetch and close the cursor at once.
+
+        :param sql: The SQL statement to execute.
+        :param params: Any parameters to pass to the query.
+        :return: A list of every row returned from the query.
+        """
+        async with await self.cursor(sql, params) as cursor:
+            return await cursor.flatten()
+
+    async def fetch_chunk(self, sql: str,
+                          params: typing.Union[typing.Mapping, typing.Iterable] = None, *,
+                          size: int = 100) -> 'BaseResultSet':
+        """
+        Executes SQL, and returns a cursor for the rows.
+
+        Children classes can override this to fetch the first ``size`` rows as the query is
+        executed, and to close the cursor at once if there were no more rows.
+
+        :param sql: The SQL statement to execute.
+        :param params: Any parameters to pass to the query.
+        :param size: The number of rows to fetch with the query.
+        :return: The :class:`.BaseResultSet` for the rows of the query.
+        """
+        return await self.cursor(sql, params)
+
     def create_savepoint(self, name: str):
         """
         Creates a savepoint in the current transaction.
@@ -317,6 +430,43 @@ class BaseTransaction(AsyncABC):
         raise NotImplementedError
 
 
+class PoolStatistics(object):
+    """
+    Statistics about the connection pool of a :class:`.BaseConnector`.
+
+    These are available from :meth:`.BaseConnector.pool_stats`.
+    """
+
+    def __init__(self):
+        #: A :class:`.Histogram` of the number of seconds spent waiting to acquire a connection.
+        self.acquire_time = Histogram()
+
+        #: The number of connections acquired from the pool.
+        self.acquired = 0
+
+        #: The number of connections released back to the pool.
+        self.released = 0
+
+        #: The number of acquires that timed out.
+        self.timeouts = 0
+
+        #: The number of tasks currently waiting for a connection.
+        self.waiting = 0
+
+        #: The number of new connections opened.
+        self.opened = 0
+
+        #: The number of connections closed.
+        self.closed = 0
+
+    @property
+    def in_use(self) -> int:
+        """
+        :return: The number of connections currently acquired from the pool.
+        """
+        return self.acquired - self.released
+
+
 class BaseConnector(AsyncABC):
     """
     The base class for a connector. This should be used for all connector classes as the parent
@@ -346,6 +496,17 @@ class BaseConnector(AsyncABC):
         self.db = dsn.path[1:]
         self.params = {k: v[0] for k, v in parse_qs(dsn.query).items()}
 
+        #: The number of seconds to wait for a connection from the pool before giving up, or None
+        #: to wait forever. This can be set with the ``acquire_timeout`` DSN parameter.
+        self.acquire_timeout = None  # type: float
+        if "acquire_timeout" in self.params:
+            self.acquire_timeout = float(self.params.pop("acquire_timeout"))
+
+        #: The :class:`.PoolStatistics` for the connection pool of this connector.
+        self.pool_statistics = PoolStatistics()
+
+        self._pool_listeners = []
+
     @abstractmethod
     async def connect(self) -> 'BaseConnector':
         """
@@ -362,10 +523,11 @@ class BaseConnector(AsyncABC):
         """
 
     @abstractmethod
-    def get_transaction(self) -> BaseTransaction:
+    def get_transaction(self, **kwargs) -> BaseTransaction:
         """
         Gets a new transaction object for this connection.
 
+        :param kwargs: The options for the transaction. See :class:`.BaseTransaction`.
         :return: A new :class:`~.BaseTransaction` object attached to this connection.
         """
 
@@ -383,6 +545,124 @@ class BaseConnector(AsyncABC):
         Gets the version of the DB server running.
         """
 
+    # pool instrumentation
+    def get_pool_size(self) -> 'typing.Tuple[int, int]':
+        """
+        Gets the current size of the connection pool.
+
+        Children classes should override this; by default, the size is unknown.
+
+        :return: A two-item tuple of (total connections, idle connections), either of which may be \
+            None if the driver doesn't expose it.
+        """
+        return None, None
+
+    def pool_stats(self) -> dict:
+        """
+        Gets the current statistics of the connection pool of this connector.
+
+        .. code-block:: python3
+
+            stats = db.connector.pool_stats()
+            if stats["waiting"] and stats["acquire_time"]["max"] > 1:
+                logger.warning("Connection pool is starved")
+
+        :return: A dict of the pool size, the idle, in-use and waiting counts, the number of \
+            connections opened and closed, the number of acquire timeouts, and a histogram of \
+            the time spent acquiring connections.
+        """
+        stats = self.pool_statistics
+        size, idle = self.get_pool_size()
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": stats.in_use,
+            "waiting": stats.waiting,
+            "acquired": stats.acquired,
+            "timeouts": stats.timeouts,
+            "opened": stats.opened,
+            "closed": stats.closed,
+            "acquire_time": stats.acquire_time.as_dict(),
+        }
+
+    def add_pool_listener(self, listener: 'typing.Callable[[str, dict], None]'):
+        """
+        Adds a listener that is called on every pool event.
+
+        The listener is called with the name of the event, and a dict of information about it. The
+        events are ``acquire`` (with the ``wait`` time), ``release``, ``timeout`` (with the
+        ``wait`` time), ``connection_opened`` and ``connection_closed``.
+
+        :param listener: The callable to add.
+        """
+        self._pool_listeners.append(listener)
+
+    def remove_pool_listener(self, listener: 'typing.Callable[[str, dict], None]'):
+        """
+        Removes a listener added with :meth:`.BaseConnector.add_pool_listener`.
+
+        :param listener: The callable to remove.
+        """
+        self._pool_listeners.remove(listener)
+
+    def _dispatch_pool_event(self, event: str, **data):
+        for listener in self._pool_listeners:
+            listener(event, data)
+
+    async def _acquire_from_pool(self, acquire: 'typing.Callable[[], typing.Awaitable]'):
+        """
+        Acquires a connection from the pool, recording the pool statistics.
+
+        :param acquire: A no-argument coroutine function that acquires the connection.
+        :return: The acquired connection.
+        """
+        stats = self.pool_statistics
+        stats.waiting += 1
+        start = time.perf_counter()
+        try:
+            if self.acquire_timeout is not None:
+                conn = await asyncio.wait_for(acquire(), self.acquire_timeout)
+            else:
+                conn = await acquire()
+        except asyncio.TimeoutError:
+            wait = time.perf_counter() - start
+            stats.timeouts += 1
+            self._dispatch_pool_event("timeout", wait=wait)
+            raise
+        finally:
+            stats.waiting -= 1
+
+        wait = time.perf_counter() - start
+        stats.acquired += 1
+        stats.acquire_time.observe(wait)
+        self._dispatch_pool_event("acquire", wait=wait)
+        return conn
+
+    def _record_release(self, *, closed: bool = False):
+        """
+        Records that a connection was released back to the pool.
+
+        :param closed: If the connection was closed, rather than returned to the pool.
+        """
+        self.pool_statistics.released += 1
+        self._dispatch_pool_event("release")
+        if closed:
+            self._record_closed()
+
+    def _record_opened(self):
+        """
+        Records that the pool opened a new connection.
+        """
+        self.pool_statistics.opened += 1
+        self._dispatch_pool_event("connection_opened")
+
+    def _record_closed(self):
+        """
+        Records that the pool closed a connection.
+        """
+        self.pool_statistics.closed += 1
+        self._dispatch_pool_event("connection_closed")
+
 # python 3.5 dicts are unordered
 # so we inherit from OrderedDict instead of dict
 # also, python 3.6+ dicts aren't technically ordered
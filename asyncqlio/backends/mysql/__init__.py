@@ -1,8 +1,12 @@
 import io
 import itertools
+import json
 import operator
+import re
+import typing
 from pkgutil import extend_path
 
+from asyncqlio import explain as md_explain
 from asyncqlio.backends.base import BaseDialect
 from asyncqlio.exc import DatabaseException
 from asyncqlio.orm.schema import column as md_column, index as md_index, types as md_types
@@ -12,6 +16,78 @@ __path__ = extend_path(__path__, __name__)
 
 DEFAULT_CONNECTOR = "aiomysql"
 
+# matches a line of the tree returned from EXPLAIN ANALYZE, e.g.
+# -> Index lookup on t using idx (a=1)  (cost=0.35 rows=1) (actual time=0.02..0.03 rows=1 loops=1)
+explain_tree_expr = re.compile(r"^(\s*)-> (.*?)(?:  \(cost=\S+ rows=(\d+)\))?"
+                               r"(?: \(actual time=\S+ rows=(\d+) loops=\d+\))?$")
+explain_table_expr = re.compile(r" on (\S+)(?: using (\S+))?")
+
+
+def _transform_explain_block(block: dict) -> 'typing.List[md_explain.PlanNode]':
+    """
+    Transforms a query block from EXPLAIN FORMAT=JSON into plan nodes.
+    """
+    nodes = []
+    for key, value in block.items():
+        if key == "table":
+            subquery = value.get("materialized_from_subquery", {}).get("query_block", {})
+            nodes.append(md_explain.PlanNode(
+                value.get("access_type", "ALL"), table=value.get("table_name"),
+                index=value.get("key"), estimated_rows=value.get("rows_examined_per_scan"),
+                full_scan=value.get("access_type") == "ALL", details=value,
+                children=_transform_explain_block(subquery)
+            ))
+        elif key == "nested_loop":
+            children = [node for item in value for node in _transform_explain_block(item)]
+            nodes.append(md_explain.PlanNode(key, children=children, details=value))
+        elif isinstance(value, dict) and key.endswith(("_operation", "_removal")):
+            nodes.append(md_explain.PlanNode(key, children=_transform_explain_block(value),
+                                             details=value))
+        elif key == "query_block":
+            nodes.extend(_transform_explain_block(value))
+
+    return nodes
+
+
+def _transform_explain_tree(tree: str) -> 'typing.List[md_explain.PlanNode]':
+    """
+    Transforms the tree returned from EXPLAIN ANALYZE into plan nodes.
+    """
+    roots = []
+    # a stack of (indent, node)
+    parents = []
+    for line in tree.splitlines():
+        match = explain_tree_expr.match(line)
+        if match is None:
+            continue
+
+        indent, description, estimated, actual = match.groups()
+        table_match = explain_table_expr.search(description)
+        if table_match is not None:
+            operation = description[:table_match.start()]
+            table, index = table_match.groups()
+        else:
+            operation, table, index = description, None, None
+
+        node = md_explain.PlanNode(
+            operation, table=table, index=index,
+            estimated_rows=int(estimated) if estimated else None,
+            actual_rows=int(actual) if actual else None,
+            full_scan=description.startswith("Table scan"), details=line
+        )
+
+        while parents and parents[-1][0] >= len(indent):
+            parents.pop()
+
+        if parents:
+            parents[-1][1].children.append(node)
+        else:
+            roots.append(node)
+
+        parents.append((len(indent), node))
+
+    return roots
+
 
 class MysqlDialect(BaseDialect):
     """
@@ -47,6 +123,10 @@ class MysqlDialect(BaseDialect):
     def has_truncate(self):
         return True
 
+    @property
+    def has_snapshots(self):
+        return True
+
     def get_primary_key_index_name(self, table):
         return "PRIMARY"
 
@@ -67,6 +147,22 @@ class MysqlDialect(BaseDialect):
             sql += "AND table_name={}".format(emitter("table_name"))
         return sql
 
+    def get_explain_sql(self, sql, *, analyze=False):
+        if analyze:
+            # EXPLAIN ANALYZE only has a tree format
+            return "EXPLAIN ANALYZE " + sql
+
+        return "EXPLAIN FORMAT=JSON " + sql
+
+    def transform_explain_rows(self, rows, *, analyze=False):
+        explained = rows[0][0]
+        if analyze:
+            nodes = _transform_explain_tree(explained)
+        else:
+            nodes = _transform_explain_block(json.loads(explained))
+
+        return md_explain.QueryPlan(nodes, rows, analyzed=analyze)
+
     def get_upsert_sql(self, table_name, *, on_conflict_update=True):
         sql = io.StringIO()
         params = {"insert"}
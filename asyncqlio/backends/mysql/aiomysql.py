@@ -3,6 +3,7 @@ The :ref:`aiomysql` connector for MySQL/MariaDB databases.
 """
 import logging
 import typing
+import weakref
 
 import aiomysql
 import pymysql
@@ -61,8 +62,8 @@ class AiomysqlTransaction(BaseTransaction):
     Represents a transaction for aiomysql.
     """
 
-    def __init__(self, connector: 'AiomysqlConnector'):
-        super().__init__(connector)
+    def __init__(self, connector: 'AiomysqlConnector', **kwargs):
+        super().__init__(connector, **kwargs)
 
         #: The current acquired connection for this transaction.
         self.connection = None  # type: aiomysql.Connection
@@ -73,15 +74,31 @@ class AiomysqlTransaction(BaseTransaction):
         """
         if has_error:
             self.connection.close()
+        elif self.autocommit:
+            await self.connection.autocommit(False)
         # release it back to the pool so we don't eat all the connections
         self.connector.pool.release(self.connection)
+        self.connector._record_release(closed=has_error)
 
     async def begin(self):
         """
         Begins the current transaction.
         """
-        self.connection = await self.connector.pool.acquire()  # type: aiomysql.Connection
-        await self.connection.begin()
+        self.connection = await self.connector._acquire_from_pool(
+            self.connector.pool.acquire
+        )  # type: aiomysql.Connection
+        # aiomysql doesn't report new connections, so check if we've seen this one before
+        if self.connection not in self.connector._seen_connections:
+            self.connector._seen_connections.add(self.connection)
+            self.connector._record_opened()
+        if self.autocommit:
+            await self.connection.autocommit(True)
+        elif self.snapshot:
+            await self.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+        elif self.readonly:
+            await self.execute("START TRANSACTION READ ONLY")
+        else:
+            await self.connection.begin()
         return self
 
     async def execute(self, sql: str, params=None):
@@ -109,7 +126,7 @@ class AiomysqlTransaction(BaseTransaction):
         """
         Returns a :class:`.AiomysqlResultSet` for the specified SQL.
         """
-        logger.debug("Executing query {} with params {}".format(sql, params))
+        logger.debug("Executing query %s with params %s", sql, params)
         cursor = await self.connection.cursor(cursor=aiomysql.DictCursor)
         await cursor.execute(sql, params)
         return AiomysqlResultSet(cursor)
@@ -120,26 +137,38 @@ class AiomysqlTransaction(BaseTransaction):
 
         :param checkpoint: Ignored.
         """
-        await self.connection.rollback()
+        if not self.autocommit:
+            await self.connection.rollback()
 
     async def commit(self):
         """
         Commits the current transaction.
         """
-        await self.connection.commit()
+        if not self.autocommit:
+            await self.connection.commit()
 
 
 class AiomysqlConnector(BaseConnector):
     """
     A connector that uses the `aiomysql <https://github.com/aio-libs/aiomysql>`_ library.
+
+    DSN parameters are passed to :func:`aiomysql.create_pool`, so the size of the pool can be set
+    with ``minsize`` and ``maxsize``, e.g. ``mysql://localhost/app?maxsize=8``.
     """
 
     def __init__(self, dsn, *, loop=None):
         super().__init__(dsn, loop=loop)
 
+        # DSN params are strings, but aiomysql needs the pool options as numbers
+        for name in ("minsize", "maxsize"):
+            if name in self.params:
+                self.params[name] = int(self.params[name])
+
         #: The current connection pool for this connector.
         self.pool = None  # type: aiomysql.Pool
 
+        self._seen_connections = weakref.WeakSet()
+
     async def connect(self) -> 'AiomysqlConnector':
         """
         Connects this connector.
@@ -151,12 +180,15 @@ class AiomysqlConnector(BaseConnector):
         # This means we don't break randomly, because we attempt to use ANSI when possible.
         self.params['sql_mode'] = 'ansi'
 
-        logger.info("Connecting to MySQL on mysql://{}:{}/{}".format(self.host, port, self.db))
+        logger.info("Connecting to MySQL on mysql://%s:%s/%s", self.host, port, self.db)
         self.pool = await aiomysql.create_pool(host=self.host, user=self.username,
                                                password=self.password, port=port,
                                                db=self.db, **self.params)
         return self
 
+    def get_pool_size(self):
+        return self.pool.size, self.pool.freesize
+
     async def close(self, forcefully: bool = False):
         """
         Closes this connector.
@@ -167,11 +199,11 @@ class AiomysqlConnector(BaseConnector):
             self.pool.close()
             await self.pool.wait_closed()
 
-    def get_transaction(self) -> BaseTransaction:
+    def get_transaction(self, **kwargs) -> BaseTransaction:
         """
         Gets a new transaction object.
         """
-        return AiomysqlTransaction(self)
+        return AiomysqlTransaction(self, **kwargs)
 
     def emit_param(self, name: str) -> str:
         if pymysql.paramstyle == "pyformat":
@@ -12,8 +12,10 @@ PostgreSQL backends.
 # used for namespace packages
 from pkgutil import extend_path
 import io
+import json
 import re
 
+from asyncqlio import explain as md_explain
 from asyncqlio.exc import DatabaseException
 from asyncqlio.sentinels import NO_DEFAULT
 from asyncqlio.backends.base import BaseDialect
@@ -65,6 +67,14 @@ class PostgresqlDialect(BaseDialect):
     def has_truncate(self):
         return True
 
+    @property
+    def has_snapshots(self):
+        return True
+
+    @property
+    def has_high_nulls(self):
+        return True
+
     def get_primary_key_index_name(self, table_name):
         return "{}_pkey".format(table_name)
 
@@ -96,6 +106,27 @@ FROM information_schema.columns
                     .format(emitter("table_name")))
         return sql
 
+    def get_explain_sql(self, sql, *, analyze=False):
+        if analyze:
+            return "EXPLAIN (ANALYZE, FORMAT JSON) " + sql
+
+        return "EXPLAIN (FORMAT JSON) " + sql
+
+    def transform_explain_rows(self, rows, *, analyze=False):
+        plan = rows[0][0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        def _transform(node):
+            return md_explain.PlanNode(
+                node["Node Type"], table=node.get("Relation Name"), index=node.get("Index Name"),
+                estimated_rows=node.get("Plan Rows"), actual_rows=node.get("Actual Rows"),
+                full_scan=node["Node Type"] == "Seq Scan", details=node,
+                children=[_transform(child) for child in node.get("Plans", ())]
+            )
+
+        return md_explain.QueryPlan([_transform(plan[0]["Plan"])], rows, analyzed=analyze)
+
     def get_upsert_sql(self, table_name, *, on_conflict_update=True):
         sql = io.StringIO()
         params = {"insert", "col", "returning"}
@@ -78,13 +78,49 @@ class AsyncpgResultSet(BaseResultSet):
         pass
 
 
+class AsyncpgRecordResultSet(BaseResultSet):
+    """
+    A result set for rows that have already been fetched. This is used outside of transactions,
+    where asyncpg can't use cursors.
+    """
+
+    def __init__(self, records: 'typing.List[Record]'):
+        self.records = records
+
+        self._position = 0
+
+    @property
+    def keys(self) -> typing.Iterable[str]:
+        if not self.records:
+            # asyncpg only keeps the column names on each record
+            return []
+        return list(self.records[0].keys())
+
+    async def fetch_many(self, n: int):
+        records = self.records[self._position:self._position + n]
+        self._position += len(records)
+        return [DictRow(r) for r in records]
+
+    async def fetch_row(self):
+        try:
+            record = self.records[self._position]
+        except IndexError:
+            return None
+
+        self._position += 1
+        return DictRow(record)
+
+    async def close(self):
+        pass
+
+
 class AsyncpgTransaction(BaseTransaction):
     """
     A transaction that uses the `asyncpg <https://github.com/MagicStack/asyncpg>`_ library.
     """
 
-    def __init__(self, conn: 'AsyncpgConnector'):
-        super().__init__(conn)
+    def __init__(self, conn: 'AsyncpgConnector', **kwargs):
+        super().__init__(conn, **kwargs)
 
         #: The acquired connection from the connection pool.
         self.acquired_connection = None  # type: asyncpg.connection.Connection
@@ -97,11 +133,21 @@ class AsyncpgTransaction(BaseTransaction):
         Begins the transaction.
         """
         logger.debug("Acquiring new transaction...")
-        self.acquired_connection = \
-            await self.connector.pool.acquire()  # type: asyncpg.connection.Connection
+        self.acquired_connection = await self.connector._acquire_from_pool(
+            self.connector.pool.acquire
+        )  # type: asyncpg.connection.Connection
+        if self.autocommit:
+            # statements are run on the connection directly, so there's no BEGIN or COMMIT
+            return self
+
+        if self.snapshot:
+            transaction_options.setdefault("isolation", "repeatable_read")
+        if self.readonly:
+            transaction_options.setdefault("readonly", True)
+
         self.transaction = self.acquired_connection.transaction(**transaction_options)
         await self.transaction.start()
-        logger.debug("Acquired and started transaction {}".format(self.transaction))
+        logger.debug("Acquired and started transaction %s", self.transaction)
 
         return self
 
@@ -109,19 +155,23 @@ class AsyncpgTransaction(BaseTransaction):
         """
         Commits the transaction.
         """
+        if self.transaction is None:
+            return
+
         await self.transaction.commit()
 
     async def rollback(self, checkpoint: str = None):
         if checkpoint is not None:
             # execute the ROLLBACK TO
             await self.acquired_connection.execute("ROLLBACK TO {}".format(checkpoint))
-        else:
+        elif self.transaction is not None:
             await self.transaction.rollback()
 
     async def close(self, *, has_error: bool = False):
         if has_error:
             await self.acquired_connection.close()
         await self.connector.pool.release(self.acquired_connection)
+        self.connector._record_release(closed=has_error)
 
     async def execute(self, sql: str, params: typing.Mapping[str, typing.Any] = None):
         """
@@ -131,7 +181,7 @@ class AsyncpgTransaction(BaseTransaction):
         :param params: The parameters to excecute with.
         """
         # re-paramatarize the query
-        logger.debug("Executing query {} with params {}".format(sql, params))
+        logger.debug("Executing query %s with params %s", sql, params)
         query, params = get_param_query(sql, params)
 
         try:
@@ -147,13 +197,18 @@ class AsyncpgTransaction(BaseTransaction):
         return results
 
     async def cursor(self, sql: str, params: typing.Mapping[str, typing.Any] = None) \
-            -> AsyncpgResultSet:
+            -> BaseResultSet:
         """
         Executes a SQL statement and returns a cursor to iterate over the rows of the result.
         """
-        logger.debug("Transforming query {} with params {}".format(sql, params))
+        logger.debug("Transforming query %s with params %s", sql, params)
         query, params = get_param_query(sql, params)
-        logger.debug("Executing query {} with params {}".format(query, params))
+        logger.debug("Executing query %s with params %s", query, params)
+        if self.transaction is None:
+            # cursors can only be used inside a transaction
+            records = await self.acquired_connection.fetch(query, *params)
+            return AsyncpgRecordResultSet(records)
+
         cur = await self.acquired_connection.cursor(query, *params)
         result = AsyncpgResultSet(cur)
 
@@ -169,11 +224,19 @@ class AsyncpgTransaction(BaseTransaction):
 class AsyncpgConnector(BaseConnector):
     """
     A connector that uses the `asyncpg <https://github.com/MagicStack/asyncpg>`_ library.
+
+    DSN parameters are passed to :func:`asyncpg.create_pool`, so the size of the pool can be set
+    with ``min_size`` and ``max_size``, e.g. ``postgresql://localhost/app?min_size=2&max_size=8``.
     """
 
     def __init__(self, parsed, *, loop: asyncio.AbstractEventLoop = None):
         super().__init__(parsed, loop=loop)
 
+        # DSN params are strings, but asyncpg needs the pool options as numbers
+        for name in ("min_size", "max_size", "max_queries"):
+            if name in self.params:
+                self.params[name] = int(self.params[name])
+
         #: The :class:`asyncpg.pool.Pool` connection pool.
         self.pool = None  # type: asyncpg.pool.Pool
 
@@ -194,14 +257,26 @@ class AsyncpgConnector(BaseConnector):
     async def connect(self) -> 'BaseConnector':
         # create our connection pool
         port = self.port or 5432
-        logger.debug("Connecting to {}".format(self.dsn))
+        logger.debug("Connecting to %s", self.dsn)
         self.pool = await asyncpg.create_pool(host=self.host, port=port, user=self.username,
                                               password=self.password, database=self.db,
-                                              loop=self.loop, **self.params)
+                                              loop=self.loop, init=self._init_connection,
+                                              **self.params)
         return self
 
-    def get_transaction(self) -> 'AsyncpgTransaction':
-        return AsyncpgTransaction(self)
+    async def _init_connection(self, conn: 'asyncpg.connection.Connection'):
+        # called by asyncpg for every new connection in the pool
+        self._record_opened()
+
+    def get_pool_size(self):
+        # these were added in asyncpg 0.25
+        try:
+            return self.pool.get_size(), self.pool.get_idle_size()
+        except AttributeError:
+            return self.pool._maxsize, None
+
+    def get_transaction(self, **kwargs) -> 'AsyncpgTransaction':
+        return AsyncpgTransaction(self, **kwargs)
 
     async def get_db_server_version(self):
         tr = self.get_transaction()
@@ -2,6 +2,7 @@ import io
 import re
 from pkgutil import extend_path
 
+from asyncqlio import explain as md_explain
 from asyncqlio.exc import DatabaseException, UnsupportedOperationException
 from asyncqlio.sentinels import NO_DEFAULT
 from asyncqlio.backends.base import BaseDialect
@@ -14,6 +15,8 @@ __path__ = extend_path(__path__, __name__)
 DEFAULT_CONNECTOR = "sqlite3"
 
 find_col_expr = re.compile(r"\((.*)\)")
+explain_detail_expr = re.compile(r"^(SCAN|SEARCH)(?: TABLE)? (\S+)(?: AS \S+)?"
+                                 r"(?: USING (?:(INTEGER PRIMARY KEY)|.*?INDEX (\S+)))?")
 
 
 class Sqlite3Dialect(BaseDialect):
@@ -49,6 +52,10 @@ class Sqlite3Dialect(BaseDialect):
     def has_truncate(self):
         return False
 
+    @property
+    def has_snapshots(self):
+        return True
+
     def get_primary_key_index_name(self, table_name):
         return ""
 
@@ -67,6 +74,38 @@ class Sqlite3Dialect(BaseDialect):
                     .format(emitter("table_name")))
         return sql
 
+    def get_explain_sql(self, sql, *, analyze=False):
+        if analyze:
+            raise UnsupportedOperationException("Sqlite3 can't analyze queries")
+
+        return "EXPLAIN QUERY PLAN " + sql
+
+    def transform_explain_rows(self, rows, *, analyze=False):
+        nodes = {}
+        roots = []
+        for row in rows:
+            detail = row["detail"]
+            match = explain_detail_expr.match(detail)
+            if match is None:
+                node = md_explain.PlanNode(detail, details=row)
+            else:
+                operation, table, primary_key, index = match.groups()
+                node = md_explain.PlanNode(operation, table=table, index=primary_key or index,
+                                           full_scan=operation == "SCAN" and not index,
+                                           details=row)
+
+            # versions before 3.24 don't return the parent of each step
+            parent = nodes.get(row.get("parent"))
+            if parent is not None:
+                parent.children.append(node)
+            else:
+                roots.append(node)
+
+            if "id" in row:
+                nodes[row["id"]] = node
+
+        return md_explain.QueryPlan(roots, rows)
+
     def get_upsert_sql(self, table_name, *, on_conflict_update=True):
         sql = io.StringIO()
         params = {"insert"}
@@ -2,109 +2,431 @@
 A backend using the stdlib sqlite3 driver.
 """
 import asyncio
+import collections
 import logging
+import pathlib
+import queue
+import re
 import sqlite3
+import threading
 import typing
 
-from asyncio_extras import threadpool
-
 from asyncqlio.backends.base import BaseConnector, BaseResultSet, BaseTransaction, DictRow
 from asyncqlio.exc import DatabaseException, IntegrityError
 from asyncqlio.utils import separate_statements
 
 logger = logging.getLogger(__name__)
 
+#: The statements that usually only read, which run on a read-only connection when writes use a
+#: single writer. Statements that turn out to write are moved to the writer.
+_READ_STATEMENTS = ("SELECT", "EXPLAIN", "WITH", "VALUES", "PRAGMA")
+
+# matches the first keyword of a statement, after any comments and opening parentheses
+_FIRST_KEYWORD_RE = re.compile(r"(?:\s+|--[^\n]*|/\*.*?\*/|\()*(\w+)", re.DOTALL)
+
+#: The authorizer actions that write, which read-only connections deny as statements are prepared.
+_WRITE_ACTIONS = frozenset((
+    sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE,
+    sqlite3.SQLITE_CREATE_INDEX, sqlite3.SQLITE_CREATE_TABLE, sqlite3.SQLITE_CREATE_TRIGGER,
+    sqlite3.SQLITE_CREATE_VIEW, sqlite3.SQLITE_CREATE_TEMP_INDEX,
+    sqlite3.SQLITE_CREATE_TEMP_TABLE, sqlite3.SQLITE_CREATE_TEMP_TRIGGER,
+    sqlite3.SQLITE_CREATE_TEMP_VIEW, sqlite3.SQLITE_DROP_INDEX, sqlite3.SQLITE_DROP_TABLE,
+    sqlite3.SQLITE_DROP_TRIGGER, sqlite3.SQLITE_DROP_VIEW, sqlite3.SQLITE_DROP_TEMP_INDEX,
+    sqlite3.SQLITE_DROP_TEMP_TABLE, sqlite3.SQLITE_DROP_TEMP_TRIGGER,
+    sqlite3.SQLITE_DROP_TEMP_VIEW, sqlite3.SQLITE_ALTER_TABLE, sqlite3.SQLITE_REINDEX,
+    sqlite3.SQLITE_ANALYZE, sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH,
+))
+
+#: The PRAGMA settings of each profile, which can be chosen with the ``profile`` DSN parameter.
+#: Both profiles use WAL mode, so readers don't block the writer, and wait on locks for 5 seconds.
+PRAGMA_PROFILES = {
+    # every commit is durable
+    "safe": {
+        "busy_timeout": "5000",
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "foreign_keys": "ON",
+    },
+    # the last commits can be lost if the OS crashes, but the database can't be corrupted
+    "fast": {
+        "busy_timeout": "5000",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": str(256 * 1024 * 1024),
+        "cache_size": str(-64 * 1024),
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+}
+
+#: The PRAGMAs that can be set with DSN parameters, in the order they are applied, and the values
+#: they accept.
+_PRAGMAS = (
+    # set first, so that changing the journal mode waits for other connections
+    ("busy_timeout", re.compile(r"\d+")),
+    ("journal_mode", re.compile(r"(DELETE|TRUNCATE|PERSIST|MEMORY|WAL|OFF)", re.IGNORECASE)),
+    ("synchronous", re.compile(r"(OFF|NORMAL|FULL|EXTRA|[0-3])", re.IGNORECASE)),
+    ("mmap_size", re.compile(r"\d+")),
+    ("cache_size", re.compile(r"-?\d+")),
+    ("temp_store", re.compile(r"(DEFAULT|FILE|MEMORY|[0-2])", re.IGNORECASE)),
+    ("foreign_keys", re.compile(r"(ON|OFF|TRUE|FALSE|YES|NO|[01])", re.IGNORECASE)),
+)
+
+
+def _set_result(future: asyncio.Future, result):
+    if not future.cancelled():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc: BaseException):
+    if not future.cancelled():
+        future.set_exception(exc)
+
+
+def _is_read(sql: str) -> bool:
+    """
+    Checks if some SQL probably only reads, from its first keyword.
+    """
+    match = _FIRST_KEYWORD_RE.match(sql)
+    if match is None:
+        return False
+
+    keyword = match.group(1).upper()
+    if keyword == "PRAGMA":
+        # PRAGMAs that set a value only change the connection they are run on
+        return "=" not in sql
+
+    return keyword in _READ_STATEMENTS
+
+
+class _WriteDenied(DatabaseException):
+    """
+    Raised when a statement that writes is prepared on a read-only connection.
+    """
+
+
+def _get_loop(future: asyncio.Future) -> asyncio.AbstractEventLoop:
+    # Future.get_loop() was only added in Python 3.7
+    try:
+        return future.get_loop()
+    except AttributeError:
+        return future._loop
+
+
+class _SqliteConnection(object):
+    """
+    A sqlite3 connection that owns a dedicated thread, which makes every call on the connection.
+
+    Calls are submitted to the thread with :meth:`.run`, and run in the order they were submitted,
+    so a whole statement and the fetches of its rows can run in one submission without waiting on
+    a shared executor.
+
+    Results are handed back to the event loop that submitted each call, so the connection isn't
+    tied to the loop it was created in.
+    """
+
+    def __init__(self, *, pragmas: 'typing.Sequence[typing.Tuple[str, str]]' = (),
+                 readonly: bool = False, **connection_args):
+        #: The :class:`sqlite3.Connection`. This must only be used inside of :meth:`.run`.
+        self.connection = None  # type: sqlite3.Connection
+
+        #: If statements that write are denied when they are prepared.
+        self.readonly = readonly
+
+        #: If the last statement that was prepared was denied because it writes. This must only be
+        #: used inside of :meth:`.run`.
+        self.denied_write = False
+
+        self._connection_args = connection_args
+        self._pragmas = pragmas
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._work, name="asyncqlio-sqlite3", daemon=True)
+
+    def _work(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+
+            future, fn, args = request
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                _get_loop(future).call_soon_threadsafe(_set_exception, future, e)
+            else:
+                _get_loop(future).call_soon_threadsafe(_set_result, future, result)
+
+    def run(self, fn: typing.Callable, *args) -> asyncio.Future:
+        """
+        Runs a function in the thread of this connection.
+
+        :param fn: The function to run.
+        :param args: The arguments to call the function with.
+        :return: A future of the result of the function.
+        """
+        future = asyncio.get_event_loop().create_future()
+        self._requests.put((future, fn, args))
+        return future
+
+    def _connect(self):
+        self.connection = sqlite3.connect(**self._connection_args)
+        # this allows dict-like access
+        self.connection.row_factory = sqlite3.Row
+        for name, value in self._pragmas:
+            self.connection.execute("PRAGMA {} = {}".format(name, value))
+
+        if self.readonly:
+            self.connection.set_authorizer(self._authorize)
+
+    def _authorize(self, action: int, *args) -> int:
+        # this is called as statements are prepared, so a denied statement never starts running
+        if action in _WRITE_ACTIONS:
+            self.denied_write = True
+            return sqlite3.SQLITE_DENY
+
+        return sqlite3.SQLITE_OK
+
+    async def open(self) -> '_SqliteConnection':
+        """
+        Starts the thread, and opens the connection inside of it.
+        """
+        self._thread.start()
+        try:
+            await self.run(self._connect)
+        except Exception:
+            self._requests.put(None)
+            raise
+
+        return self
+
+    async def close(self):
+        """
+        Closes the connection, and stops the thread.
+        """
+        try:
+            await self.run(self.connection.close)
+        finally:
+            self._requests.put(None)
+
 
 class _SqlitePool:
     """
     A connection pool for sqlite3 connections.
+
+    Connections are handed to the tasks waiting on :meth:`.acquire` in the order they started
+    waiting, so that a task which releases a connection and immediately acquires one again can't
+    take it from a task that has been waiting longer.
     """
 
-    def __init__(self, max_size: int = 12, *, loop=None, **kwargs):
+    def __init__(self, max_size: int = 12, *, connector: 'Sqlite3Connector' = None,
+                 pragmas: 'typing.Sequence[typing.Tuple[str, str]]' = (), readonly: bool = False,
+                 **kwargs):
         """
         :param max_size: The maximum size of the pool.
+        :param connector: The :class:`.Sqlite3Connector` to record opened and closed connections on.
+        :param pragmas: The (name, value) pairs of the PRAGMAs to set on every new connection.
+        :param readonly: If the connections deny statements that write.
         """
-        self.queue = asyncio.Queue(maxsize=max_size, loop=loop)
+        #: The number of connections in the pool.
+        self.max_size = max_size
+
+        self.connector = connector
+
+        self.pragmas = pragmas
+
+        self.readonly = readonly
 
         self.connection_args = kwargs
 
-    def _new_connection(self) -> sqlite3.Connection:
-        # check_same_thread is needed because we're connecting from inside a threadpool.
-        conn = sqlite3.connect(**self.connection_args, check_same_thread=False)
-        # this allows dict-like access
-        conn.row_factory = sqlite3.Row
+        self._idle = collections.deque()
+        self._waiters = collections.deque()
+
+    @property
+    def idle(self) -> int:
+        """
+        :return: The number of connections that aren't in use.
+        """
+        return len(self._idle)
+
+    async def _new_connection(self) -> _SqliteConnection:
+        conn = await _SqliteConnection(pragmas=self.pragmas, readonly=self.readonly,
+                                       **self.connection_args).open()
+        if self.connector is not None:
+            self.connector._record_opened()
         return conn
 
+    async def _close_connection(self, conn: _SqliteConnection):
+        await conn.close()
+        if self.connector is not None:
+            self.connector._record_closed()
+
+    def _put(self, conn: _SqliteConnection):
+        """
+        Hands a connection to the longest waiting task, or makes it idle if no task is waiting.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return
+
+        self._idle.append(conn)
+
     async def connect(self, *args, **kwargs):
         """
         Connects this pool.
         """
-        async with threadpool():
-            for x in range(0, self.queue.maxsize):
-                conn = self._new_connection()
-                self.queue.put_nowait(conn)
+        connections = await asyncio.gather(*[self._new_connection()
+                                             for x in range(0, self.max_size)])
+        self._idle.extend(connections)
 
         return self
 
-    async def acquire(self) -> sqlite3.Connection:
+    async def acquire(self) -> _SqliteConnection:
         """
         Acquires a connection from the pool.
         """
-        return await self.queue.get()
+        if self._idle and not self._waiters:
+            return self._idle.popleft()
 
-    async def release(self, conn: sqlite3.Connection):
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # the connection may have been handed over before this task was cancelled
+            if waiter.done() and not waiter.cancelled():
+                self._put(waiter.result())
+            raise
+
+    async def release(self, conn: _SqliteConnection):
         """
         Releases a connection back to the pool of available connections.
         """
-        async with threadpool():
-            # rollback anything stale left in the DB
-            if conn.in_transaction:
-                conn.close()
-                conn = self._new_connection()
+        # rollback anything stale left in the DB
+        if await conn.run(getattr, conn.connection, "in_transaction"):
+            await self._close_connection(conn)
+            conn = await self._new_connection()
 
-        self.queue.put_nowait(conn)
+        self._put(conn)
 
     async def close(self):
         """
         Closes the pool.
         """
-        while True:
-            try:
-                conn = self.queue.get_nowait()
-            except asyncio.QueueEmpty:
-                return
-
-            conn.close()
+        while self._idle:
+            await self._close_connection(self._idle.popleft())
 
 
 class Sqlite3Connector(BaseConnector):
     """
     A connector powered by sqlite3.
+
+    The size of the connection pool can be set with the ``max_size`` DSN parameter, e.g.
+    ``sqlite3:///app.db?max_size=4``.
+
+    By default, connections use the default settings of SQLite. A set of PRAGMAs from
+    :data:`.PRAGMA_PROFILES` can be applied to every connection with the ``profile`` DSN parameter,
+    and the ``journal_mode``, ``synchronous``, ``mmap_size``, ``cache_size``, ``temp_store``,
+    ``busy_timeout`` and ``foreign_keys`` PRAGMAs can be set individually, overriding the profile:
+
+    .. code-block:: python3
+
+        db = DatabaseInterface("sqlite3:///app.db?profile=fast&cache_size=-131072")
+
+    With the ``single_writer`` DSN parameter, every write goes through one writer connection, which
+    transactions wait for in turn, and reads use a pool of ``max_size`` read-only connections. This
+    stops concurrent writers from failing with ``database is locked``, and in WAL mode readers
+    never wait for the writer:
+
+    .. code-block:: python3
+
+        db = DatabaseInterface("sqlite3:///app.db?profile=fast&single_writer=true")
+
+    Read-only transactions only use a read-only connection. Other transactions start on a
+    read-only connection, and move to the writer when they run their first statement that writes;
+    every later statement also runs on the writer, so that it sees the transaction's own writes.
+    SQLite itself checks if a statement writes as it is prepared on a read-only connection, so
+    CTEs and PRAGMAs that only read stay there.
     """
 
     def __init__(self, parsed, *, loop: asyncio.AbstractEventLoop = None,
                  max_size: int = 12):
         super().__init__(parsed, loop=loop)
 
-        self.max_size = max_size
+        #: The number of connections in the pool.
+        self.max_size = int(self.params.pop("max_size", max_size))
+
+        profile = self.params.pop("profile", None)
+        if profile is not None and profile not in PRAGMA_PROFILES:
+            raise ValueError("Unknown sqlite3 profile {}, expected one of: {}"
+                             .format(profile, ", ".join(sorted(PRAGMA_PROFILES))))
+
+        pragmas = dict(PRAGMA_PROFILES.get(profile, {}))
+        for name, pattern in _PRAGMAS:
+            if name not in self.params:
+                continue
+
+            value = self.params.pop(name)
+            if not pattern.fullmatch(value):
+                raise ValueError("Invalid value {!r} for PRAGMA {}".format(value, name))
+            pragmas[name] = value
+
+        #: The (name, value) pairs of the PRAGMAs set on every new connection, in order.
+        self.pragmas = [(name, pragmas[name]) for name, _ in _PRAGMAS if name in pragmas]
+
+        #: If writes go through a single writer connection, and reads use read-only connections.
+        self.single_writer = self.params.pop("single_writer", "false").lower() \
+            in ("1", "true", "yes", "on")
+        if self.single_writer and self.db in ("", ":memory:"):
+            raise ValueError("single_writer needs a database file, as every connection to an "
+                             "in-memory database opens a new database")
+
+        #: The pool of connections. With ``single_writer``, these connections are read-only.
         self.pool = None  # type: _SqlitePool
 
+        #: The pool of the single writer connection, if ``single_writer`` is set.
+        self.writer_pool = None  # type: _SqlitePool
+
     async def connect(self) -> 'BaseConnector':
         """
         Creates the new pool of sqlite3 connections.
         """
-        self.pool = _SqlitePool(max_size=self.max_size, database=self.db, **self.params)
+        if not self.single_writer:
+            self.pool = _SqlitePool(max_size=self.max_size, connector=self,
+                                    pragmas=self.pragmas, database=self.db, **self.params)
+            await self.pool.connect()
+            return self
+
+        # the writer creates the database file, and sets the journal mode that readers use
+        self.writer_pool = _SqlitePool(max_size=1, connector=self,
+                                       pragmas=self.pragmas, database=self.db, **self.params)
+        await self.writer_pool.connect()
+
+        uri = "{}?mode=ro".format(pathlib.Path(self.db).absolute().as_uri())
+        # read-only connections can't change the journal mode
+        pragmas = [(name, value) for name, value in self.pragmas if name != "journal_mode"]
+        self.pool = _SqlitePool(max_size=self.max_size, connector=self, pragmas=pragmas,
+                                readonly=True, database=uri, uri=True, **self.params)
         await self.pool.connect()
         return self
 
+    def get_pool_size(self):
+        if self.writer_pool is None:
+            return self.max_size, self.pool.idle
+
+        return self.max_size + 1, self.pool.idle + self.writer_pool.idle
+
     async def close(self):
         """
         Closes this connector.
         """
         await self.pool.close()
+        if self.writer_pool is not None:
+            await self.writer_pool.close()
 
-    def get_transaction(self) -> 'BaseTransaction':
-        return Sqlite3Transaction(self)
+    def get_transaction(self, **kwargs) -> 'BaseTransaction':
+        return Sqlite3Transaction(self, **kwargs)
 
     def emit_param(self, name: str) -> str:
         return ":{}".format(name)
@@ -118,49 +440,112 @@ class Sqlite3Transaction(BaseTransaction):
     Represents a sqlite3 transaction.
     """
 
-    def __init__(self, connector: 'Sqlite3Connector'):
-        super().__init__(connector)
+    def __init__(self, connector: 'Sqlite3Connector', **kwargs):
+        super().__init__(connector, **kwargs)
 
-        #: The connection for this transaction.
-        self.connection = None  # type: sqlite3.Connection
+        #: The connection for this transaction. Once this transaction has written with a single
+        #: writer, this is the writer connection.
+        self.connection = None  # type: _SqliteConnection
+
+        # the read-only connection, once this transaction has moved to the writer
+        self._reader = None  # type: _SqliteConnection
+        self._isolation_level = None
+
+    def _begin_autocommit(self, conn: _SqliteConnection):
+        # don't let the driver implicitly open a transaction before writes
+        self._isolation_level = conn.connection.isolation_level
+        conn.connection.isolation_level = None
+
+    def _end_autocommit(self, conn: _SqliteConnection):
+        conn.connection.isolation_level = self._isolation_level
+
+    async def _connection_for(self, sql: str) -> _SqliteConnection:
+        """
+        Gets the connection to run some SQL on. If the connector has a single writer and the SQL
+        doesn't look like it only reads, this transaction moves to the writer connection first.
+        """
+        if self.connector.writer_pool is None or self.readonly or self._reader is not None \
+                or _is_read(sql):
+            return self.connection
+
+        return await self._move_to_writer()
+
+    async def _move_to_writer(self) -> _SqliteConnection:
+        """
+        Moves this transaction to the writer connection.
+        """
+        writer = await self.connector._acquire_from_pool(self.connector.writer_pool.acquire)
+        if self.autocommit:
+            await writer.run(self._begin_autocommit, writer)
+        self._reader, self.connection = self.connection, writer
+        return writer
+
+    async def _run(self, fn: typing.Callable, sql: str, params, *args) \
+            -> typing.Tuple[_SqliteConnection, typing.Any]:
+        """
+        Runs a function that executes some SQL in the thread of the connection for the SQL. If the
+        SQL was run on a read-only connection but writes, it is run again on the writer.
+
+        :return: A two-item tuple of (the connection the SQL ran on, the result of the function).
+        """
+        logger.debug("Running SQL %s with params %s", sql, params)
+        conn = await self._connection_for(sql)
+        try:
+            return conn, await conn.run(fn, conn, sql, params, *args)
+        except _WriteDenied:
+            if self.readonly:
+                raise
 
-        self._lock = asyncio.Lock(loop=self.connector.loop)
+        conn = await self._move_to_writer()
+        return conn, await conn.run(fn, conn, sql, params, *args)
 
     async def begin(self):
         """
         Begins the current transaction.
         """
-        self.connection = await self.connector.pool.acquire()
+        self.connection = await self.connector._acquire_from_pool(self.connector.pool.acquire)
+        if self.autocommit:
+            await self.connection.run(self._begin_autocommit, self.connection)
+        elif self.snapshot:
+            # sqlite only opens a transaction before writes by default, so each SELECT would see
+            # the latest data
+            await self.execute("BEGIN")
+
+    def _execute(self, conn: _SqliteConnection, sql: str, params) -> sqlite3.Cursor:
+        """
+        Executes every statement in some SQL on a new cursor. This runs in the connection's thread.
+        """
+        cursor = conn.connection.cursor()
+        for stmt in separate_statements(sql):
+            conn.denied_write = False
+            try:
+                if params is None:
+                    cursor.execute(stmt)
+                else:
+                    cursor.execute(stmt, params)
+            except sqlite3.IntegrityError as e:
+                raise IntegrityError(*e.args)
+            except sqlite3.OperationalError as e:
+                raise DatabaseException(*e.args)
+            except sqlite3.DatabaseError as e:
+                if conn.denied_write:
+                    raise _WriteDenied("Cannot write on a read-only connection")
+                raise
+
+        return cursor
 
     async def execute(self, sql: str, params: typing.Union[typing.Mapping, typing.Iterable] = None):
         """
         Executes SQL in the current transaction.
         """
-        # lock to ensure nothing else is using the connection at once
-
-        logger.debug("Running SQL {} with params {}".format(sql, params))
-        async with self._lock:
-            async with threadpool():
-                for stmt in separate_statements(sql):
-                    try:
-                        if params is None:
-                            res = self.connection.execute(stmt)
-                        else:
-                            res = self.connection.execute(stmt, params)
-                    except sqlite3.IntegrityError as e:
-                        raise IntegrityError(*e.args)
-                    except sqlite3.OperationalError as e:
-                        raise DatabaseException(*e.args)
-
-            return res
+        _, cursor = await self._run(self._execute, sql, params)
+        return cursor
 
     async def commit(self):
         """
         Commits the current transaction.
         """
-        async with self._lock:
-            async with threadpool():
-                self.connection.commit()
+        await self.connection.run(self.connection.connection.commit)
 
     async def rollback(self, checkpoint: str = None):
         """
@@ -170,9 +555,7 @@ class Sqlite3Transaction(BaseTransaction):
             await self.execute("ROLLBACK TRANSACTION TO SAVEPOINT %s;", (checkpoint,))
             return
 
-        async with self._lock:
-            async with threadpool():
-                self.connection.rollback()
+        await self.connection.run(self.connection.connection.rollback)
 
     async def create_savepoint(self, name: str):
         """
@@ -191,22 +574,61 @@ class Sqlite3Transaction(BaseTransaction):
         """
         Gets a cursor for the specified SQL.
         """
+        conn, cur = await self._run(self._execute, sql, params)
+        return Sqlite3ResultSet(cur, conn)
+
+    def _fetch_one(self, conn: _SqliteConnection, sql: str, params) -> sqlite3.Row:
+        cursor = self._execute(conn, sql, params)
+        try:
+            return cursor.fetchone()
+        finally:
+            cursor.close()
 
-        logger.debug("Running SQL {} with params {}".format(sql, params))
+    def _fetch_all(self, conn: _SqliteConnection, sql: str, params) -> typing.List[sqlite3.Row]:
+        cursor = self._execute(conn, sql, params)
+        try:
+            return cursor.fetchall()
+        finally:
+            cursor.close()
 
-        async with self._lock:
-            async with threadpool():
-                for stmt in separate_statements(sql):
-                    cur = self.connection.cursor()
-                    try:
-                        if params is None:
-                            cur.execute(stmt)
-                        else:
-                            cur.execute(stmt, params)
-                    except sqlite3.OperationalError as e:
-                        raise DatabaseException(*e.args)
+    def _fetch_chunk(self, conn: _SqliteConnection, sql: str, params, size: int) \
+            -> typing.Tuple[sqlite3.Cursor, typing.List[sqlite3.Row]]:
+        cursor = self._execute(conn, sql, params)
+        rows = cursor.fetchmany(size)
+        if len(rows) < size:
+            cursor.close()
 
-        return Sqlite3ResultSet(cur)
+        return cursor, rows
+
+    async def fetch_one(self, sql: str,
+                        params: typing.Union[typing.Mapping, typing.Iterable] = None) -> DictRow:
+        """
+        Executes SQL, fetches the first row and closes the cursor in one call on the connection's
+        thread.
+        """
+        _, row = await self._run(self._fetch_one, sql, params)
+        return DictRow(row) if row is not None else None
+
+    async def fetch_all(self, sql: str,
+                        params: typing.Union[typing.Mapping, typing.Iterable] = None) \
+            -> typing.List[DictRow]:
+        """
+        Executes SQL, fetches every row and closes the cursor in one call on the connection's
+        thread.
+        """
+        _, rows = await self._run(self._fetch_all, sql, params)
+        return [DictRow(row) for row in rows]
+
+    async def fetch_chunk(self, sql: str,
+                          params: typing.Union[typing.Mapping, typing.Iterable] = None, *,
+                          size: int = 100) -> 'Sqlite3ResultSet':
+        """
+        Executes SQL and fetches the first ``size`` rows in one call on the connection's thread.
+        If there were fewer rows, the cursor is closed in the same call.
+        """
+        conn, (cur, rows) = await self._run(self._fetch_chunk, sql, params, size)
+        return Sqlite3ResultSet(cur, conn, rows, exhausted=len(rows) < size,
+                                chunk_size=size)
 
     async def close(self, *, has_error: bool = False):
         """
@@ -214,45 +636,96 @@ class Sqlite3Transaction(BaseTransaction):
         """
         # we can ignore has_error
         # because we try and do proper transaction logic
-        await self.connector.pool.release(self.connection)
+        if self._reader is not None:
+            await self._release(self.connector.writer_pool, self.connection)
+            self.connection, self._reader = self._reader, None
+
+        await self._release(self.connector.pool, self.connection)
         self.connection = None
 
+    async def _release(self, pool: _SqlitePool, conn: _SqliteConnection):
+        if self.autocommit:
+            await conn.run(self._end_autocommit, conn)
+        await pool.release(conn)
+        self.connector._record_release()
+
 
 class Sqlite3ResultSet(BaseResultSet):
     """
     A result set for a sqlite3 database.
+
+    Rows are fetched from the cursor in chunks, so that iterating over the rows doesn't need a
+    call on the connection's thread for every row. The cursor is closed as soon as the last chunk
+    is fetched.
     """
 
-    def __init__(self, cursor: sqlite3.Cursor):
+    def __init__(self, cursor: sqlite3.Cursor, connection: _SqliteConnection,
+                 rows: typing.Iterable[sqlite3.Row] = (), *, exhausted: bool = False,
+                 chunk_size: int = 100):
+        """
+        :param cursor: The :class:`sqlite3.Cursor` to fetch rows from.
+        :param connection: The connection the cursor belongs to.
+        :param rows: The rows that have already been fetched from the cursor.
+        :param exhausted: If every row has been fetched, and the cursor has been closed.
+        :param chunk_size: The number of rows to fetch from the cursor at once.
+        """
         self.cursor = cursor
 
-        self._keys = None
+        #: The number of rows to fetch from the cursor at once.
+        self.chunk_size = chunk_size
+
+        self._connection = connection
+        self._keys = [column[0] for column in cursor.description or ()]
+        self._buffer = collections.deque(rows)
+        self._exhausted = exhausted
 
     @property
     def keys(self) -> typing.Iterable[str]:
         return self._keys
 
-    async def close(self):
-        async with threadpool():
+    def _fetch(self, n: int) -> typing.List[sqlite3.Row]:
+        rows = self.cursor.fetchmany(n)
+        if len(rows) < n:
             self.cursor.close()
 
+        return rows
+
+    async def _fill(self, n: int):
+        """
+        Fetches up to N more rows from the cursor into the buffer.
+        """
+        if self._exhausted:
+            return
+
+        rows = await self._connection.run(self._fetch, n)
+        self._exhausted = len(rows) < n
+        self._buffer.extend(rows)
+
+    async def close(self):
+        self._buffer.clear()
+        if not self._exhausted:
+            self._exhausted = True
+            await self._connection.run(self.cursor.close)
+
     async def fetch_many(self, n: int) -> typing.List[typing.Mapping[str, typing.Any]]:
         """
         Fetches many rows.
         """
-        async with threadpool():
-            rows = self.cursor.fetchmany(size=n)
+        if len(self._buffer) < n:
+            await self._fill(max(n - len(self._buffer), self.chunk_size))
 
-        return [DictRow(r) for r in rows if r is not None]
+        return [DictRow(self._buffer.popleft()) for _ in range(min(n, len(self._buffer)))]
 
     async def fetch_row(self) -> typing.Mapping[str, typing.Any]:
         """
         Fetches one row.
         """
-        async with threadpool():
-            row = self.cursor.fetchone()
+        if not self._buffer:
+            await self._fill(self.chunk_size)
+            if not self._buffer:
+                return None
 
-        return DictRow(row) if row is not None else None
+        return DictRow(self._buffer.popleft())
 
 
 CONNECTOR_TYPE = Sqlite3Connector
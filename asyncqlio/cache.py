@@ -0,0 +1,389 @@
+"""
+Result caching for SELECT queries.
+"""
+import asyncio
+import collections
+import logging
+import sys
+import time
+import typing
+
+from asyncqlio.backends.base import BaseResultSet, DictRow
+from asyncqlio.utils import normalize_params
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(sql: str, params: typing.Mapping[str, typing.Any] = None) -> tuple:
+    """
+    Makes a key that identifies a query, for use in a :class:`.QueryCache` or
+    :class:`.SingleFlight`.
+
+    :param sql: The SQL of the query.
+    :param params: The params of the query.
+    :return: A hashable key, or None if the params can't be hashed.
+    """
+    sql, params = normalize_params(sql, params)
+    key = (sql, tuple(params.items()) if params else ())
+    try:
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
+def _estimate_size(rows: 'typing.List[DictRow]') -> int:
+    """
+    Estimates the number of bytes used by a list of rows.
+    """
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for key, value in row.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+
+    return size
+
+
+class CacheEntry(object):
+    """
+    Represents the stored results of a single query in a :class:`.QueryCache`.
+    """
+
+    __slots__ = ("key", "rows", "keys", "tables", "size", "expires")
+
+    def __init__(self, key: tuple, rows: 'typing.List[DictRow]', keys: 'typing.List[str]',
+                 tables: 'typing.Iterable[str]', expires: float):
+        #: The cache key of this entry.
+        self.key = key
+
+        #: The raw rows returned from the database.
+        self.rows = rows
+
+        #: The column names of the result set.
+        self.keys = keys
+
+        #: The names of the tables the query selected from.
+        self.tables = frozenset(tables)
+
+        #: The estimated size of this entry, in bytes.
+        self.size = _estimate_size(rows)
+
+        #: The :func:`time.monotonic` time this entry expires at.
+        self.expires = expires
+
+    def __repr__(self):
+        return "<CacheEntry rows={} size={}>".format(len(self.rows), self.size)
+
+
+class CachedResultSet(BaseResultSet):
+    """
+    A result set that returns rows that have already been fetched, such as from a
+    :class:`.CacheEntry`, instead of from the database.
+
+    Each row is copied as it is fetched, so that the stored rows can't be modified.
+    """
+
+    def __init__(self, rows: 'typing.List[DictRow]', keys: 'typing.List[str]', *,
+                 copy: bool = True):
+        """
+        :param rows: The rows to return.
+        :param keys: The keys of the rows.
+        :param copy: If each row should be copied as it is fetched. Rows that are only read once \
+            don't need to be copied.
+        """
+        self._rows = rows
+        self._keys = keys
+        self._copy = copy
+        self._position = 0
+
+    @property
+    def keys(self) -> typing.Iterable[str]:
+        return self._keys
+
+    async def fetch_row(self) -> 'DictRow':
+        try:
+            row = self._rows[self._position]
+        except IndexError:
+            return None
+
+        self._position += 1
+        return DictRow(row) if self._copy else row
+
+    async def fetch_many(self, n: int) -> 'typing.List[DictRow]':
+        rows = self._rows[self._position:self._position + n]
+        self._position += len(rows)
+        if not self._copy:
+            return rows
+
+        return [DictRow(row) for row in rows]
+
+    async def close(self):
+        self._position = len(self._rows)
+
+
+class PrefetchedResultSet(BaseResultSet):
+    """
+    A result set that returns some rows that have already been fetched from another result set,
+    and then the rest of the rows of that result set.
+    """
+
+    def __init__(self, rows: 'typing.List[DictRow]', results: BaseResultSet):
+        """
+        :param rows: The rows that have already been fetched.
+        :param results: The :class:`.BaseResultSet` the rows were fetched from.
+        """
+        self._rows = collections.deque(rows)
+        self._results = results
+
+    @property
+    def keys(self) -> typing.Iterable[str]:
+        return self._results.keys
+
+    async def fetch_row(self) -> 'DictRow':
+        if self._rows:
+            return self._rows.popleft()
+
+        return await self._results.fetch_row()
+
+    async def fetch_many(self, n: int) -> 'typing.List[DictRow]':
+        rows = [self._rows.popleft() for _ in range(min(n, len(self._rows)))]
+        if len(rows) < n:
+            rows.extend(await self._results.fetch_many(n - len(rows)))
+
+        return rows
+
+    async def close(self):
+        self._rows.clear()
+        await self._results.close()
+
+
+class QueryCache(object):
+    """
+    A cache of the results of SELECT queries, bounded by an estimate of the memory used.
+
+    .. code-block:: python3
+
+        db = DatabaseInterface(dsn, cache=QueryCache(max_size=64 * 1024 * 1024))
+        # only queries that opt in are cached
+        settings = await sess.select(Setting).cache(ttl=300).all()
+
+    The raw rows returned from the database are stored, rather than :class:`.Table` instances, so
+    every query returns new rows. When the cache is full, the least recently used entries are
+    removed first.
+
+    Entries are invalidated whenever a :class:`.Session` using the same
+    :class:`.DatabaseInterface` inserts, updates or deletes rows in a table that the query selected
+    from. Writes made by other processes, or with raw SQL, are not seen, so the TTL should be kept
+    short enough that stale results are acceptable.
+    """
+
+    def __init__(self, max_size: int = 16 * 1024 * 1024, default_ttl: float = 60.0):
+        """
+        :param max_size: The maximum estimated size of the cache, in bytes.
+        :param default_ttl: The number of seconds queries are cached for, if they don't specify a \
+            TTL themselves.
+        """
+        #: The maximum estimated size of the cache, in bytes.
+        self.max_size = max_size
+
+        #: The default number of seconds entries are kept for.
+        self.default_ttl = default_ttl
+
+        #: The number of lookups that returned an entry.
+        self.hits = 0
+
+        #: The number of lookups that didn't return an entry.
+        self.misses = 0
+
+        self._entries = collections.OrderedDict()  # type: typing.Dict[tuple, CacheEntry]
+        self._tables = collections.defaultdict(set)  # type: typing.Dict[str, typing.Set[tuple]]
+        self._size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return "<QueryCache entries={} size={} max_size={}>".format(len(self), self._size,
+                                                                   self.max_size)
+
+    @property
+    def size(self) -> int:
+        """
+        :return: The estimated size of every entry in this cache, in bytes.
+        """
+        return self._size
+
+    def get(self, key: tuple) -> 'typing.Union[CacheEntry, None]':
+        """
+        Gets an entry from this cache.
+
+        :param key: The key made with :func:`.make_key`.
+        :return: The :class:`.CacheEntry`, or None if there is no entry or it has expired.
+        """
+        try:
+            entry = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        if entry.expires <= time.monotonic():
+            self._remove(entry)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, rows: 'typing.List[DictRow]', keys: 'typing.Iterable[str]',
+            tables: 'typing.Iterable[str]', ttl: float = None) -> 'typing.Union[CacheEntry, None]':
+        """
+        Stores the results of a query in this cache.
+
+        :param key: The key made with :func:`.make_key`.
+        :param rows: The rows returned from the query.
+        :param keys: The column names returned from the query.
+        :param tables: The names of the tables the query selected from.
+        :param ttl: The number of seconds to keep the entry for. Defaults to \
+            :attr:`.QueryCache.default_ttl`.
+        :return: The new :class:`.CacheEntry`, or None if it was too large to store.
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+
+        entry = CacheEntry(key, rows, list(keys), tables, time.monotonic() + ttl)
+        if entry.size > self.max_size:
+            logger.debug("Not caching result of %d bytes, as it is larger than the cache",
+                         entry.size)
+            return None
+
+        old = self._entries.get(key)
+        if old is not None:
+            self._remove(old)
+
+        self._entries[key] = entry
+        self._size += entry.size
+        for table in entry.tables:
+            self._tables[table].add(key)
+
+        # evict the least recently used entries
+        while self._size > self.max_size:
+            self._remove(next(iter(self._entries.values())))
+
+        return entry
+
+    def invalidate(self, *tables: str):
+        """
+        Removes every entry that selected from any of the specified tables.
+
+        :param tables: The names of the tables to invalidate.
+        """
+        for table in tables:
+            for key in list(self._tables.get(table, ())):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._remove(entry)
+
+    def clear(self):
+        """
+        Removes every entry from this cache.
+        """
+        self._entries.clear()
+        self._tables.clear()
+        self._size = 0
+
+    def _remove(self, entry: CacheEntry):
+        del self._entries[entry.key]
+        self._size -= entry.size
+        for table in entry.tables:
+            keys = self._tables[table]
+            keys.discard(entry.key)
+            if not keys:
+                del self._tables[table]
+
+
+class SingleFlight(object):
+    """
+    Coalesces identical queries that are running at the same time, so that only one of them is
+    executed and every caller receives its rows.
+
+    .. code-block:: python3
+
+        db = DatabaseInterface(dsn, singleflight=True)
+
+    The first caller for a key (the leader) runs the query. Any callers for the same key that arrive
+    before it has finished wait for the leader's rows instead of running the query themselves. If
+    the leader fails, every waiting caller receives the same exception; if the leader is
+    cancelled, the waiting callers try again.
+
+    Only results of up to ``max_rows`` rows are shared, so that large results don't have to be
+    held in memory. If the leader's function returns None, its result couldn't be shared, and the
+    waiting callers run their own function instead.
+    """
+
+    def __init__(self, *, loop: asyncio.AbstractEventLoop = None, max_rows: int = 1000):
+        """
+        :param loop: Ignored; waiting callers use the running event loop.
+        :param max_rows: The maximum number of rows in a result that can be shared.
+        """
+        #: The maximum number of rows in a result that can be shared.
+        self.max_rows = max_rows
+
+        #: The number of callers that shared the results of another caller.
+        self.shared = 0
+
+        self._calls = {}  # type: typing.Dict[tuple, asyncio.Future]
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key: tuple, fn: 'typing.Callable[[], typing.Awaitable[typing.Any]]'):
+        """
+        Runs a function, or waits for the result of an identical call that is already running.
+
+        :param key: The key that identifies the call, made with :func:`.make_key`.
+        :param fn: A no-argument coroutine function that produces the result.
+        :return: The result of the function.
+        """
+        while True:
+            fut = self._calls.get(key)
+            if fut is None:
+                break
+
+            try:
+                # shielded so that a waiter being cancelled doesn't cancel the leader
+                result = await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if fut.cancelled():
+                    # the leader was cancelled, so try again
+                    continue
+
+                raise
+
+            if result is None:
+                # the leader's result couldn't be shared
+                return await fn()
+
+            self.shared += 1
+            return result
+
+        fut = asyncio.get_event_loop().create_future()
+        self._calls[key] = fut
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            # don't warn about the exception if nobody was waiting for it
+            fut.exception()
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is fut:
+                del self._calls[key]
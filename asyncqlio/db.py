@@ -5,13 +5,19 @@ import asyncio
 import importlib
 import itertools
 import logging
-from typing import Tuple, Type, Union
+import time
+from typing import Iterable, List, Tuple, Type, Union
 from urllib.parse import ParseResult, urlparse
 
 from asyncqlio.backends.base import BaseConnector, BaseDialect, BaseTransaction
+from asyncqlio.cache import QueryCache, SingleFlight
+from asyncqlio.events import EventDispatcher, StatementStatistics
+from asyncqlio import metrics as md_metrics
 from asyncqlio.orm import session as md_session
 from asyncqlio.orm.ddl import ddlsession as md_ddlsession
 from asyncqlio.orm.schema import table as md_table
+from asyncqlio.routing import BaseBalancer, RoundRobinBalancer
+from asyncqlio.slowlog import SlowQueryLog
 
 # sentinels
 NO_CONNECTOR = object()
@@ -38,15 +44,83 @@ class DatabaseInterface(object):
     param_counter = itertools.count()
 
     def __init__(self, dsn: str, *, loop: asyncio.AbstractEventLoop = None,
-                 connector: Type[BaseConnector] = None):
+                 connector: Type[BaseConnector] = None,
+                 cache: QueryCache = None,
+                 singleflight: bool = False,
+                 replicas: Iterable[str] = (),
+                 balancer: BaseBalancer = None,
+                 read_your_writes: float = 0.0,
+                 slow_query_threshold: float = None,
+                 explain_slow_queries: bool = False,
+                 metrics: 'md_metrics.MetricsRegistry' = None,
+                 track_statements: bool = False):
         """
         :param dsn:
             The `Data Source Name <http://whatis.techtarget.com/definition/data-source-name-DSN>_`
             to connect to the database on.
+
+        :param cache:
+            The :class:`.QueryCache` to store the results of cached queries in. If this is None,
+            no results are cached.
+
+        :param singleflight:
+            If identical SELECT queries that run at the same time should share one execution.
+            Queries made by sessions that have written to the database are never shared.
+
+        :param replicas:
+            The DSNs of read replicas of the database. Read-only sessions are run on a replica,
+            and every other session runs on the primary database. Replicas use the same connector
+            as the primary database.
+
+        :param balancer:
+            The :class:`.BaseBalancer` used to choose the replica for each transaction. Defaults to
+            a :class:`.RoundRobinBalancer`.
+
+        :param read_your_writes:
+            The number of seconds read-only sessions use the primary database after any session
+            commits a write, so that replication lag doesn't hide the write.
+
+        :param slow_query_threshold:
+            The number of seconds a query can take before it is recorded in
+            :attr:`.DatabaseInterface.slow_queries`. If this is None, slow queries aren't recorded.
+
+        :param explain_slow_queries:
+            If the plans of slow queries should be recorded too. See :class:`.SlowQueryLog`.
+
+        :param metrics:
+            The :class:`.MetricsRegistry` to record the metrics of this database in.
+
+        :param track_statements:
+            If statistics should be kept for every statement, grouped by fingerprint. See
+            :meth:`.DatabaseInterface.statement_stats`.
         """
+        #: The :class:`.QueryCache` used for queries made with :meth:`.SelectQuery.cache`.
+        self.cache = cache
+
         self._dsn = dsn
         self.loop = loop or asyncio.get_event_loop()
 
+        #: The :class:`.SingleFlight` used to coalesce identical queries, or None if disabled.
+        self.singleflight = SingleFlight(loop=self.loop) if singleflight else None
+
+        #: The :class:`.EventDispatcher` that dispatches events for queries run by sessions.
+        self.events = EventDispatcher()
+
+        #: The :class:`.StatementStatistics` of every statement run, or None if statements aren't
+        #: tracked.
+        self.statements = None  # type: StatementStatistics
+        if track_statements:
+            self.statements = StatementStatistics()
+            self.statements.attach(self.events)
+
+        #: The :class:`.SlowQueryLog` of queries slower than the slow query threshold, or None if
+        #: slow queries aren't recorded.
+        self.slow_queries = None  # type: SlowQueryLog
+        if slow_query_threshold is not None:
+            self.slow_queries = SlowQueryLog(self, slow_query_threshold,
+                                             explain=explain_slow_queries)
+            self.slow_queries.attach()
+
         parsed_dsn = urlparse(self._dsn)  # type: ParseResult
         # db type must always exist
         # the connector doesn't have to exist, however
@@ -61,6 +135,9 @@ class DatabaseInterface(object):
         import_path = "asyncqlio.backends.{}".format(db_type)
         package = importlib.import_module(import_path)
 
+        #: The name of the database backend, e.g. ``postgresql``.
+        self.backend = db_type
+
         #: The current Dialect instance.
         self.dialect = getattr(package, "{}Dialect".format(db_type.title()))()  # type: BaseDialect
 
@@ -70,7 +147,7 @@ class DatabaseInterface(object):
             else:
                 mod_path = ".".join([import_path, package.DEFAULT_CONNECTOR])
 
-            logger.debug("Loading connector {}".format(mod_path))
+            logger.debug("Loading connector %s", mod_path)
             connector_mod = importlib.import_module(mod_path)
             connector = connector_mod.CONNECTOR_TYPE
 
@@ -80,6 +157,25 @@ class DatabaseInterface(object):
         #: The current connector instance.
         self.connector = None  # type: BaseConnector
 
+        self._replica_dsns = [urlparse(replica) for replica in replicas]
+
+        #: The connector instances for each replica.
+        self.replica_connectors = []  # type: List[BaseConnector]
+
+        #: The :class:`.BaseBalancer` used to choose replicas.
+        self.balancer = balancer or RoundRobinBalancer()
+
+        #: The number of seconds read-only sessions use the primary database after a write.
+        self.read_your_writes = read_your_writes
+
+        #: The :func:`time.monotonic` time until which read-only sessions use the primary database.
+        self._pinned_until = 0.0
+
+        #: The :class:`.MetricsRegistry` this database records metrics in, or None.
+        self.metrics = None  # type: md_metrics.MetricsRegistry
+        if metrics is not None:
+            metrics.attach(self)
+
     async def __aenter__(self):
         if not self.connected:
             await self.connect()
@@ -125,6 +221,16 @@ class DatabaseInterface(object):
             self.connector = None
             raise
 
+        for dsn in self._replica_dsns:
+            replica = self._connector_type(dsn, loop=self.loop)
+            try:
+                await replica.connect(**kwargs)
+            except Exception:
+                await self.close()
+                raise
+
+            self.replica_connectors.append(replica)
+
         return self.connector
 
     def emit_param(self, name: str = None) -> Union[Tuple[str, str], str]:
@@ -149,12 +255,86 @@ class DatabaseInterface(object):
 
             async with db.get_transaction() as transaction:
                 results = await transaction.cursor("SELECT 1;")
+
+        :param kwargs: The options for the transaction, such as ``autocommit``, ``readonly`` or \
+            ``snapshot``. See :class:`.BaseTransaction`.
         """
         return self.connector.get_transaction(**kwargs)
 
+    @property
+    def has_replicas(self) -> bool:
+        """
+        Checks if this DB has any connected replicas.
+        """
+        return bool(self.replica_connectors)
+
+    def get_replica_transaction(self, **kwargs) -> BaseTransaction:
+        """
+        Gets a low-level :class:`.BaseTransaction` on a replica, chosen by the balancer. If there
+        are no replicas, or a session committed a write in the last ``read_your_writes`` seconds, a
+        transaction on the primary database is returned.
+
+        The transaction must be passed to :meth:`.DatabaseInterface.release_transaction` once it is
+        closed.
+        """
+        if not self.replica_connectors or time.monotonic() < self._pinned_until:
+            return self.get_transaction(**kwargs)
+
+        connector = self.balancer.acquire(self.replica_connectors)
+        return connector.get_transaction(**kwargs)
+
+    def _record_write(self):
+        """
+        Records that a session committed a write, which replicas may not have seen yet.
+        """
+        if self.read_your_writes:
+            self._pinned_until = max(self._pinned_until,
+                                     time.monotonic() + self.read_your_writes)
+
+    def release_transaction(self, transaction: BaseTransaction):
+        """
+        Releases a transaction returned from :meth:`.DatabaseInterface.get_replica_transaction`.
+
+        :param transaction: The :class:`.BaseTransaction` to release.
+        """
+        if transaction.connector in self.replica_connectors:
+            self.balancer.release(transaction.connector)
+
+    def statement_stats(self, limit: int = None) -> 'List[dict]':
+        """
+        Gets the statistics of the statements run on this database, grouped by fingerprint and
+        sorted by the total time spent on them.
+
+        .. code-block:: python3
+
+            for entry in db.statement_stats(limit=10):
+                print(entry["calls"], entry["mean_time"], entry["p99_bucket"], entry["fingerprint"])
+
+        :param limit: The maximum number of fingerprints to return.
+        :return: A list of dicts, each with the ``fingerprint``, ``calls``, ``errors``, ``rows``, \
+            ``total_time``, ``mean_time``, ``p99_bucket`` and ``max_time`` of a fingerprint. See \
+            :meth:`.StatementEntry.as_dict`.
+        """
+        if self.statements is None:
+            raise RuntimeError("Statements are not tracked; pass track_statements=True")
+
+        return self.statements.top(limit)
+
     def get_session(self, **kwargs) -> 'md_session.Session':
         """
         Gets a new :class:`.Session` bound to this instance.
+
+        .. code-block:: python3
+
+            # runs on a replica, if there are any
+            async with db.get_session(readonly=True) as sess:
+                ...
+
+            # skips BEGIN and COMMIT
+            async with db.get_session(readonly=True, autocommit=True) as sess:
+                user = await sess.select(User).where(User.id == 1).first()
+
+        See :class:`.Session` for the available options.
         """
         return md_session.Session(self, **kwargs)
 
@@ -171,6 +351,11 @@ class DatabaseInterface(object):
         if self.connector is not None:
             await self.connector.close()
 
+        for replica in self.replica_connectors:
+            await replica.close()
+
+        self.replica_connectors = []
+
     # db server stuff
     async def get_db_server_version(self) -> str:
         """
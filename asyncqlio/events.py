@@ -0,0 +1,456 @@
+"""
+Events that are fired while queries are run, for logging, tracing and metrics.
+"""
+import collections
+import logging
+import typing
+
+from asyncqlio.utils import Histogram, fingerprint
+
+logger = logging.getLogger(__name__)
+
+#: The names of every event that can be listened to.
+EVENTS = ("before_execute", "after_execute", "on_error", "on_fetch", "on_hydrate")
+
+
+class QueryEvent(object):
+    """
+    Represents a single query being run. The same object is passed to every event fired for the
+    query, and is updated as the query progresses.
+
+    Every timing is in seconds.
+    """
+
+    __slots__ = ("session", "sql", "params", "pool_wait", "execute_time", "fetch_time",
+                 "hydrate_time", "rowcount", "hydrated", "error")
+
+    def __init__(self, session, sql: str, params: typing.Any = None):
+        #: The :class:`.Session` running the query.
+        self.session = session
+
+        #: The SQL of the query.
+        self.sql = sql
+
+        #: The params of the query. These are redacted if the dispatcher redacts params.
+        self.params = params
+
+        #: The time spent waiting for a connection from the pool. This is only set on the first
+        #: query of a session, as the connection is held until the session is closed.
+        self.pool_wait = 0.0
+
+        #: The time spent running the query on the server, until the first results were returned.
+        self.execute_time = 0.0
+
+        #: The time spent fetching rows from the server.
+        self.fetch_time = 0.0
+
+        #: The time spent creating :class:`.Table` rows from the fetched rows.
+        self.hydrate_time = 0.0
+
+        #: The number of rows fetched, or None if the rows haven't been fetched.
+        self.rowcount = None  # type: int
+
+        #: The number of results created from the fetched rows.
+        self.hydrated = 0
+
+        #: The exception raised by the query, if there was one.
+        self.error = None  # type: Exception
+
+    def __repr__(self):
+        return "<QueryEvent sql={!r}>".format(self.sql)
+
+    @property
+    def total_time(self) -> float:
+        """
+        :return: The total time spent on this query, in seconds.
+        """
+        return self.pool_wait + self.execute_time + self.fetch_time + self.hydrate_time
+
+
+class EventDispatcher(object):
+    """
+    Dispatches query events to listeners. Every :class:`.DatabaseInterface` has one of these as
+    :attr:`.DatabaseInterface.events`.
+
+    .. code-block:: python3
+
+        @db.events.listen("after_execute")
+        def log_query(event: QueryEvent):
+            print(event.sql, event.execute_time)
+
+    The events are:
+
+        - ``before_execute``: Before a query is sent to the server.
+        - ``after_execute``: After the server has run a query.
+        - ``on_error``: When a query raises an exception; see :attr:`.QueryEvent.error`.
+        - ``on_fetch``: When every row of a SELECT query has been fetched.
+        - ``on_hydrate``: When every row of a SELECT query has been turned into results.
+
+    Listeners are called with a :class:`.QueryEvent`, and should not block. If no listeners are
+    registered, no events are created, so there is no overhead.
+
+    Queries answered by the :class:`.QueryCache`, or by another session's identical query (see
+    :class:`.SingleFlight`), aren't run, so they don't dispatch any events.
+    """
+
+    def __init__(self, *, redact_params: bool = False):
+        """
+        :param redact_params: If the params of queries should be hidden from listeners.
+        """
+        #: If the params of queries are hidden from listeners.
+        self.redact_params = redact_params
+
+        self._listeners = collections.defaultdict(list)
+
+        #: If any listeners are registered. This is checked before creating any events.
+        self.active = False
+
+    def add_listener(self, event: str, listener: 'typing.Callable[[QueryEvent], None]'):
+        """
+        Adds a listener for an event.
+
+        :param event: The name of the event.
+        :param listener: The callable to call with the :class:`.QueryEvent`.
+        """
+        if event not in EVENTS:
+            raise ValueError("Unknown event {}".format(event))
+
+        self._listeners[event].append(listener)
+        self.active = True
+
+    def remove_listener(self, event: str, listener: 'typing.Callable[[QueryEvent], None]'):
+        """
+        Removes a listener for an event.
+
+        :param event: The name of the event.
+        :param listener: The callable to remove.
+        """
+        self._listeners[event].remove(listener)
+        self.active = any(self._listeners.values())
+
+    def listen(self, event: str):
+        """
+        A decorator that adds the decorated function as a listener for an event.
+
+        :param event: The name of the event.
+        """
+        def decorator(func):
+            self.add_listener(event, func)
+            return func
+
+        return decorator
+
+    def create_event(self, session, sql: str, params: typing.Any = None) -> QueryEvent:
+        """
+        Creates a new :class:`.QueryEvent` for a query.
+
+        :param session: The session running the query.
+        :param sql: The SQL of the query.
+        :param params: The params of the query.
+        """
+        if self.redact_params and params:
+            if isinstance(params, typing.Mapping):
+                params = {key: "?" for key in params}
+            else:
+                params = ["?"] * len(params)
+
+        return QueryEvent(session, sql, params)
+
+    def dispatch(self, event: str, query_event: QueryEvent):
+        """
+        Calls every listener for an event. Exceptions raised by listeners are logged, rather than
+        interrupting the query.
+
+        :param event: The name of the event.
+        :param query_event: The :class:`.QueryEvent` to pass to the listeners.
+        """
+        for listener in self._listeners.get(event, ()):
+            try:
+                listener(query_event)
+            except Exception:
+                logger.exception("Error in %s listener %r", event, listener)
+
+
+class SessionStats(object):
+    """
+    Statistics about the queries run by a single :class:`.Session`, enabled with
+    ``db.get_session(collect_stats=True)``.
+
+    .. code-block:: python3
+
+        async with db.get_session(collect_stats=True) as sess:
+            ...
+
+        print(sess.stats.statements, sess.stats.db_time, sess.stats.python_time)
+        for shape, count in sess.stats.repeated_shapes():
+            print(count, shape)
+
+    The rows fetched and hydrated by a query are only counted once the query's rows are iterated
+    over. Only the most recent events are kept; older events are added to running totals, so rows
+    fetched from a query after ``max_events`` newer queries have been run aren't counted.
+    """
+
+    def __init__(self, max_events: int = 100):
+        """
+        :param max_events: The number of recent :class:`.QueryEvent` objects to keep.
+        """
+        #: The :class:`.QueryEvent` of the most recent queries run by the session.
+        self.events = collections.deque(maxlen=max_events)  # type: typing.Deque[QueryEvent]
+
+        #: The number of statements executed.
+        self.statements = 0
+
+        # the totals of the events that have been removed from the deque
+        self._totals = collections.Counter()
+
+        #: A counter of fingerprint -> the number of times a query with that fingerprint was run.
+        #: See :func:`.fingerprint`.
+        self.shapes = collections.Counter()
+
+    def __repr__(self):
+        return "<SessionStats statements={} rows_fetched={}>".format(self.statements,
+                                                                   self.rows_fetched)
+
+    def record(self, event: QueryEvent):
+        """
+        Records a query run by the session.
+
+        :param event: The :class:`.QueryEvent` of the query.
+        """
+        if len(self.events) == self.events.maxlen:
+            old = self.events.popleft()
+            self._totals.update(errors=old.error is not None, rows_fetched=old.rowcount or 0,
+                                rows_hydrated=old.hydrated,
+                                db_time=old.pool_wait + old.execute_time + old.fetch_time,
+                                python_time=old.hydrate_time)
+
+        self.events.append(event)
+        self.statements += 1
+        self.shapes[fingerprint(event.sql)] += 1
+
+    @property
+    def errors(self) -> int:
+        """
+        :return: The number of statements that raised an exception.
+        """
+        return self._totals["errors"] + sum(1 for event in self.events if event.error is not None)
+
+    @property
+    def rows_fetched(self) -> int:
+        """
+        :return: The number of rows fetched from the database.
+        """
+        return self._totals["rows_fetched"] + sum(event.rowcount or 0 for event in self.events)
+
+    @property
+    def rows_hydrated(self) -> int:
+        """
+        :return: The number of results created from fetched rows.
+        """
+        return self._totals["rows_hydrated"] + sum(event.hydrated for event in self.events)
+
+    @property
+    def db_time(self) -> float:
+        """
+        :return: The time spent waiting for the database, in seconds. This includes waiting for a
+            connection, executing queries and fetching rows.
+        """
+        return self._totals["db_time"] + sum(event.pool_wait + event.execute_time
+                                             + event.fetch_time for event in self.events)
+
+    @property
+    def python_time(self) -> float:
+        """
+        :return: The time spent creating results from fetched rows, in seconds.
+        """
+        return self._totals["python_time"] + sum(event.hydrate_time for event in self.events)
+
+    def repeated_shapes(self, min_count: int = 2) -> 'typing.List[typing.Tuple[str, int]]':
+        """
+        Gets the shapes of the queries that were run several times, most common first.
+
+        :param min_count: The number of times a shape must have been run to be included.
+        :return: A list of (shape, count) tuples.
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common()
+                if count >= min_count]
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        """
+        :return: A dict of every counter.
+        """
+        return {
+            "statements": self.statements,
+            "errors": self.errors,
+            "rows_fetched": self.rows_fetched,
+            "rows_hydrated": self.rows_hydrated,
+            "db_time": self.db_time,
+            "python_time": self.python_time,
+        }
+
+
+class StatementEntry(object):
+    """
+    The statistics of every statement with the same fingerprint, in a
+    :class:`.StatementStatistics` table.
+    """
+
+    __slots__ = ("fingerprint", "calls", "errors", "rows", "execute_time", "fetch_time")
+
+    def __init__(self, fingerprint: str):
+        #: The fingerprint of the statements. See :func:`.fingerprint`.
+        self.fingerprint = fingerprint
+
+        #: The number of times the statements were executed.
+        self.calls = 0
+
+        #: The number of times the statements raised an exception.
+        self.errors = 0
+
+        #: The number of rows fetched from the statements.
+        self.rows = 0
+
+        #: A :class:`.Histogram` of the time taken to execute the statements, in seconds.
+        self.execute_time = Histogram()
+
+        #: The total time spent fetching rows from the statements, in seconds.
+        self.fetch_time = 0.0
+
+    def __repr__(self):
+        return "<StatementEntry calls={} fingerprint={!r}>".format(self.calls, self.fingerprint)
+
+    @property
+    def total_time(self) -> float:
+        """
+        :return: The total time spent executing the statements and fetching their rows.
+        """
+        return self.execute_time.sum + self.fetch_time
+
+    @property
+    def mean_time(self) -> float:
+        """
+        :return: The mean time spent executing the statements and fetching their rows.
+        """
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        """
+        :return: A dict of the statistics of this entry. ``p99_bucket`` is the upper bound of the \
+            :class:`.Histogram` bucket that the 99th percentile execute time falls in, not the \
+            exact percentile.
+        """
+        return {
+            "fingerprint": self.fingerprint,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_time": self.total_time,
+            "mean_time": self.mean_time,
+            "p99_bucket": self.execute_time.percentile(99),
+            "max_time": self.execute_time.max,
+        }
+
+
+class StatementStatistics(object):
+    """
+    A bounded table of statistics for every statement run by a :class:`.DatabaseInterface`,
+    grouped by fingerprint. This is like ``pg_stat_statements``, but measured by the client, so
+    it works the same on every backend.
+
+    .. code-block:: python3
+
+        db = DatabaseInterface(dsn, track_statements=True)
+        ...
+        for entry in db.statement_stats(limit=10):
+            print(entry["total_time"], entry["calls"], entry["fingerprint"])
+
+    When the table is full, the entry with the fewest calls is removed to make room for a new
+    fingerprint.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        """
+        :param max_entries: The maximum number of fingerprints to keep statistics for.
+        """
+        #: The maximum number of fingerprints to keep statistics for.
+        self.max_entries = max_entries
+
+        self._entries = {}  # type: typing.Dict[str, StatementEntry]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def attach(self, dispatcher: EventDispatcher):
+        """
+        Starts recording the statements dispatched by an :class:`.EventDispatcher`.
+        """
+        dispatcher.add_listener("after_execute", self._on_execute)
+        dispatcher.add_listener("on_error", self._on_error)
+        dispatcher.add_listener("on_fetch", self._on_fetch)
+
+    def detach(self, dispatcher: EventDispatcher):
+        """
+        Stops recording the statements dispatched by an :class:`.EventDispatcher`.
+        """
+        dispatcher.remove_listener("after_execute", self._on_execute)
+        dispatcher.remove_listener("on_error", self._on_error)
+        dispatcher.remove_listener("on_fetch", self._on_fetch)
+
+    def get(self, sql: str) -> 'typing.Union[StatementEntry, None]':
+        """
+        Gets the entry for a statement.
+
+        :param sql: The SQL of the statement.
+        :return: The :class:`.StatementEntry` for the fingerprint of the statement, or None.
+        """
+        return self._entries.get(fingerprint(sql))
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        self._entries.clear()
+
+    def _get_entry(self, event: QueryEvent) -> StatementEntry:
+        key = fingerprint(event.sql)
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                least_called = min(self._entries.values(), key=lambda entry: entry.calls)
+                del self._entries[least_called.fingerprint]
+
+            entry = self._entries[key] = StatementEntry(key)
+
+        return entry
+
+    def _on_execute(self, event: QueryEvent):
+        entry = self._get_entry(event)
+        entry.calls += 1
+        entry.execute_time.observe(event.execute_time)
+
+    def _on_error(self, event: QueryEvent):
+        entry = self._get_entry(event)
+        entry.calls += 1
+        entry.errors += 1
+
+    def _on_fetch(self, event: QueryEvent):
+        # the entry may have been removed to make room since the statement was executed
+        entry = self._entries.get(fingerprint(event.sql))
+        if entry is None:
+            return
+
+        entry.rows += event.rowcount or 0
+        entry.fetch_time += event.fetch_time
+
+    def top(self, limit: int = None, *, key: str = "total_time") \
+            -> 'typing.List[typing.Dict[str, typing.Any]]':
+        """
+        Gets the statistics of the statements, sorted by the time spent on them.
+
+        :param limit: The maximum number of entries to return.
+        :param key: The key of :meth:`.StatementEntry.as_dict` to sort by, largest first.
+        :return: A list of dicts returned from :meth:`.StatementEntry.as_dict`.
+        """
+        entries = sorted((entry.as_dict() for entry in self._entries.values()),
+                         key=lambda entry: entry[key], reverse=True)
+        return entries[:limit]
@@ -39,3 +39,16 @@ class UnsupportedOperationException(DatabaseException):
     """
     Raised when an operation that the database driver doesn't support is attempted.
     """
+
+
+class NPlusOneWarning(UserWarning):
+    """
+    Warned when a session lazily loads the same relationship query more times than its N+1
+    threshold, which normally means that the relationship should be join-loaded instead.
+
+    To raise instead of warning, use a warnings filter:
+
+    .. code-block:: python3
+
+        warnings.simplefilter("error", NPlusOneWarning)
+    """
@@ -0,0 +1,138 @@
+"""
+Structured query plans, returned from explaining queries.
+"""
+import typing
+
+
+class PlanNode(object):
+    """
+    Represents a single step of a :class:`.QueryPlan`, such as a scan of a table or a join.
+    """
+
+    __slots__ = ("operation", "table", "index", "estimated_rows", "actual_rows", "full_scan",
+                 "children", "details")
+
+    def __init__(self, operation: str, *, table: str = None, index: str = None,
+                 estimated_rows: int = None, actual_rows: int = None, full_scan: bool = False,
+                 children: 'typing.List[PlanNode]' = None, details: typing.Any = None):
+        #: The name of the operation, as named by the database, e.g. ``Seq Scan`` or ``SEARCH``.
+        self.operation = operation
+
+        #: The name of the table this step reads from, if it reads from a table.
+        self.table = table
+
+        #: The name of the index this step uses, if it uses an index.
+        self.index = index
+
+        #: The number of rows the database estimates this step will return, if known.
+        self.estimated_rows = estimated_rows
+
+        #: The number of rows this step returned, if the query was analyzed.
+        self.actual_rows = actual_rows
+
+        #: If this step reads every row of a table without using an index.
+        self.full_scan = full_scan
+
+        #: The steps that this step reads the rows of.
+        self.children = children or []
+
+        #: The raw description of this step returned from the database.
+        self.details = details
+
+    def __repr__(self):
+        return "<PlanNode operation={!r} table={!r} index={!r}>".format(self.operation,
+                                                                        self.table, self.index)
+
+    def walk(self) -> 'typing.Iterator[PlanNode]':
+        """
+        Iterates over this node, and every node below it.
+        """
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def format(self, indent: int = 0) -> str:
+        """
+        Formats this node and every node below it as an indented tree.
+        """
+        line = "  " * indent + self.operation
+        if self.table is not None:
+            line += " on {}".format(self.table)
+        if self.index is not None:
+            line += " using {}".format(self.index)
+        if self.estimated_rows is not None:
+            line += " (rows={})".format(self.estimated_rows)
+        if self.actual_rows is not None:
+            line += " (actual rows={})".format(self.actual_rows)
+
+        return "\n".join([line] + [child.format(indent + 1) for child in self.children])
+
+
+class QueryPlan(object):
+    """
+    Represents the plan a database uses to run a query, returned from
+    :meth:`.SelectQuery.explain`.
+
+    .. code-block:: python3
+
+        plan = await sess.select(User).where(User.email == email).explain()
+        assert plan.uses_index("user_email_idx")
+        assert not plan.full_scans
+
+    The plan is a tree of :class:`.PlanNode`, which is normalized between dialects, so the
+    names of operations are still specific to each database.
+    """
+
+    def __init__(self, nodes: 'typing.List[PlanNode]', rows: typing.List[typing.Mapping], *,
+                 analyzed: bool = False):
+        """
+        :param nodes: The top-level :class:`.PlanNode` instances of the plan.
+        :param rows: The raw rows returned from the database.
+        :param analyzed: If the query was run to get the actual rows of each step.
+        """
+        #: The top-level :class:`.PlanNode` instances of this plan.
+        self.nodes = nodes
+
+        #: The raw rows returned from the database.
+        self.rows = rows
+
+        #: If the query was run to get the actual rows of each step.
+        self.analyzed = analyzed
+
+    def __repr__(self):
+        return "<QueryPlan nodes={}>".format(len(self.nodes))
+
+    def __str__(self):
+        return "\n".join(node.format() for node in self.nodes)
+
+    def walk(self) -> 'typing.Iterator[PlanNode]':
+        """
+        Iterates over every node in this plan, depth-first.
+        """
+        for node in self.nodes:
+            yield from node.walk()
+
+    @property
+    def indexes(self) -> typing.Set[str]:
+        """
+        :return: The names of every index used by this plan.
+        """
+        return {node.index for node in self.walk() if node.index is not None}
+
+    @property
+    def full_scans(self) -> typing.List[str]:
+        """
+        :return: The names of every table that is read without an index.
+        """
+        return [node.table for node in self.walk() if node.full_scan]
+
+    def uses_index(self, name: str = None) -> bool:
+        """
+        Checks if this plan uses an index.
+
+        :param name: The name of the index to check for. If this is None, any index is checked for.
+        """
+        if name is None:
+            return bool(self.indexes)
+
+        return name in self.indexes
@@ -0,0 +1,276 @@
+"""
+Metrics for queries, connection pools, caches and transactions, with Prometheus text exposition.
+"""
+import collections
+import io
+import re
+import typing
+
+from asyncqlio import db as md_db
+from asyncqlio.events import QueryEvent
+from asyncqlio.utils import Histogram
+
+# matches the first table a statement reads from or writes to
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE)\s+["`]?([\w.]+)', re.IGNORECASE)
+
+
+def _get_statement_labels(sql: str) -> typing.Tuple[str, str]:
+    """
+    Gets the statement kind and table labels for a statement.
+    """
+    stripped = sql.lstrip()
+    kind = stripped.split(None, 1)[0].upper() if stripped else ""
+    match = _TABLE_RE.search(sql)
+    return kind, match.group(1) if match is not None else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: typing.Sequence[str], values: typing.Sequence[typing.Any]) -> str:
+    if not names:
+        return ""
+
+    return "{" + ",".join('{}="{}"'.format(name, _escape(str(value)))
+                          for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+
+    if isinstance(value, int):
+        return str(value)
+
+    return repr(float(value))
+
+
+class MetricsRegistry(object):
+    """
+    Aggregates metrics from one or more :class:`.DatabaseInterface` instances, and renders them in
+    the Prometheus text format.
+
+    .. code-block:: python3
+
+        metrics = MetricsRegistry()
+        db = DatabaseInterface(dsn, metrics=metrics)
+
+        # e.g. in an aiohttp handler
+        async def handle_metrics(request):
+            return web.Response(text=metrics.render(), content_type="text/plain")
+
+    Query metrics are labelled by backend, statement kind (``SELECT``, ``INSERT``, ...) and the
+    first table the statement uses. The pool, cache and coalescing metrics are read from each
+    database when rendering, so they cost nothing until they are scraped.
+
+    Recording metrics uses the events of :attr:`.DatabaseInterface.events`.
+    """
+
+    #: The default upper bounds of the buckets for the number of rows fetched by a query.
+    DEFAULT_ROW_BOUNDS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+    def __init__(self, *, prefix: str = "asyncqlio",
+                 duration_bounds: typing.Sequence[float] = Histogram.DEFAULT_BOUNDS,
+                 row_bounds: typing.Sequence[float] = DEFAULT_ROW_BOUNDS):
+        """
+        :param prefix: The prefix of the name of every metric.
+        :param duration_bounds: The bucket bounds of the query and transaction duration \
+            histograms, in seconds.
+        :param row_bounds: The bucket bounds of the rows per query histogram.
+        """
+        #: The prefix of the name of every metric.
+        self.prefix = prefix
+
+        self._duration_bounds = tuple(duration_bounds)
+        self._row_bounds = tuple(row_bounds)
+
+        #: A mapping of database -> the value of its backend label.
+        self._databases = collections.OrderedDict()
+
+        #: A mapping of (backend, kind, table) -> :class:`.Histogram` of query durations.
+        self.query_duration = {}  # type: typing.Dict[tuple, Histogram]
+
+        #: A mapping of (backend, kind, table) -> :class:`.Histogram` of rows fetched per query.
+        self.query_rows = {}  # type: typing.Dict[tuple, Histogram]
+
+        #: A counter of (backend, kind, table) -> the number of queries that raised an error.
+        self.query_errors = collections.Counter()
+
+        #: A mapping of (backend, outcome) -> :class:`.Histogram` of transaction durations.
+        self.transaction_duration = {}  # type: typing.Dict[tuple, Histogram]
+
+    def attach(self, bind: 'md_db.DatabaseInterface', *, name: str = None):
+        """
+        Starts recording metrics for a database.
+
+        :param bind: The :class:`.DatabaseInterface` to record the metrics of.
+        :param name: The value of the ``backend`` label for this database. Defaults to the name of \
+            the backend, e.g. ``postgresql``. This must be different for every attached database.
+        """
+        name = name or bind.backend
+        if name in self._databases.values():
+            raise ValueError("A database with the backend label {} is already attached"
+                             .format(name))
+
+        self._databases[bind] = name
+        bind.metrics = self
+        bind.events.add_listener("after_execute", self._on_execute)
+        bind.events.add_listener("on_error", self._on_error)
+        bind.events.add_listener("on_fetch", self._on_fetch)
+
+    def detach(self, bind: 'md_db.DatabaseInterface'):
+        """
+        Stops recording metrics for a database.
+
+        :param bind: The :class:`.DatabaseInterface` to stop recording the metrics of.
+        """
+        del self._databases[bind]
+        bind.metrics = None
+        bind.events.remove_listener("after_execute", self._on_execute)
+        bind.events.remove_listener("on_error", self._on_error)
+        bind.events.remove_listener("on_fetch", self._on_fetch)
+
+    def _get_labels(self, event: QueryEvent) -> tuple:
+        return (self._databases.get(event.session.bind, ""),) + _get_statement_labels(event.sql)
+
+    def _on_execute(self, event: QueryEvent):
+        labels = self._get_labels(event)
+        histogram = self.query_duration.get(labels)
+        if histogram is None:
+            histogram = self.query_duration[labels] = Histogram(self._duration_bounds)
+
+        histogram.observe(event.execute_time)
+
+    def _on_error(self, event: QueryEvent):
+        self.query_errors[self._get_labels(event)] += 1
+
+    def _on_fetch(self, event: QueryEvent):
+        labels = self._get_labels(event)
+        histogram = self.query_rows.get(labels)
+        if histogram is None:
+            histogram = self.query_rows[labels] = Histogram(self._row_bounds)
+
+        histogram.observe(event.rowcount or 0)
+
+    def observe_transaction(self, bind: 'md_db.DatabaseInterface', duration: float, *,
+                            has_error: bool = False):
+        """
+        Records the duration of a transaction. This is called by sessions when they are closed.
+
+        :param bind: The :class:`.DatabaseInterface` the transaction was on.
+        :param duration: The number of seconds the transaction was open for.
+        :param has_error: If the session was closed because of an error.
+        """
+        labels = (self._databases.get(bind, ""), "error" if has_error else "ok")
+        histogram = self.transaction_duration.get(labels)
+        if histogram is None:
+            histogram = self.transaction_duration[labels] = Histogram(self._duration_bounds)
+
+        histogram.observe(duration)
+
+    def render(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        :return: The rendered metrics.
+        """
+        out = io.StringIO()
+        query_labels = ("backend", "kind", "table")
+        self._write_histograms(out, "query_duration_seconds", "The time taken to execute queries.",
+                               query_labels, self.query_duration)
+        self._write_histograms(out, "query_rows", "The number of rows fetched per query.",
+                               query_labels, self.query_rows)
+        self._write_values(out, "query_errors_total", "counter",
+                           "The number of queries that raised an error.", query_labels,
+                           self.query_errors)
+        self._write_histograms(out, "transaction_duration_seconds",
+                               "The time sessions held a transaction open for.",
+                               ("backend", "outcome"), self.transaction_duration)
+
+        acquire_time = {}
+        pool_values = collections.defaultdict(dict)
+        cache_values = collections.defaultdict(dict)
+        for bind, name in self._databases.items():
+            connectors = [("primary", bind.connector)] + \
+                [("replica{}".format(i), connector)
+                 for i, connector in enumerate(bind.replica_connectors)]
+            for role, connector in connectors:
+                if connector is None:
+                    continue
+
+                labels = (name, role)
+                stats = connector.pool_statistics
+                size, idle = connector.get_pool_size()
+                acquire_time[labels] = stats.acquire_time
+                pool_values["pool_size"][labels] = size
+                pool_values["pool_idle"][labels] = idle
+                pool_values["pool_in_use"][labels] = stats.in_use
+                pool_values["pool_waiting"][labels] = stats.waiting
+                pool_values["pool_timeouts_total"][labels] = stats.timeouts
+
+            if bind.cache is not None:
+                cache_values["cache_hits_total"][(name,)] = bind.cache.hits
+                cache_values["cache_misses_total"][(name,)] = bind.cache.misses
+                cache_values["cache_size_bytes"][(name,)] = bind.cache.size
+
+            if bind.singleflight is not None:
+                cache_values["singleflight_shared_total"][(name,)] = bind.singleflight.shared
+
+        pool_labels = ("backend", "role")
+        self._write_histograms(out, "pool_acquire_seconds",
+                               "The time spent waiting to acquire a connection.", pool_labels,
+                               acquire_time)
+        for name, kind, help_text in (
+            ("pool_size", "gauge", "The number of connections in the pool."),
+            ("pool_idle", "gauge", "The number of idle connections in the pool."),
+            ("pool_in_use", "gauge", "The number of connections acquired from the pool."),
+            ("pool_waiting", "gauge", "The number of tasks waiting for a connection."),
+            ("pool_timeouts_total", "counter", "The number of acquires that timed out."),
+        ):
+            self._write_values(out, name, kind, help_text, pool_labels, pool_values[name])
+
+        for name, kind, help_text in (
+            ("cache_hits_total", "counter", "The number of query cache lookups that hit."),
+            ("cache_misses_total", "counter", "The number of query cache lookups that missed."),
+            ("cache_size_bytes", "gauge", "The estimated size of the query cache."),
+            ("singleflight_shared_total", "counter",
+             "The number of queries that shared the results of an identical query."),
+        ):
+            self._write_values(out, name, kind, help_text, ("backend",), cache_values[name])
+
+        return out.getvalue()
+
+    def _write_header(self, out: io.StringIO, name: str, kind: str, help_text: str):
+        out.write("# HELP {}_{} {}\n".format(self.prefix, name, help_text))
+        out.write("# TYPE {}_{} {}\n".format(self.prefix, name, kind))
+
+    def _write_values(self, out: io.StringIO, name: str, kind: str, help_text: str,
+                      label_names: typing.Sequence[str], values: typing.Mapping[tuple, float]):
+        # drivers don't always expose every value, e.g. the number of idle connections
+        values = {labels: value for labels, value in values.items() if value is not None}
+        if not values:
+            return
+
+        self._write_header(out, name, kind, help_text)
+        for labels, value in sorted(values.items()):
+            out.write("{}_{}{} {}\n".format(self.prefix, name, _format_labels(label_names, labels),
+                                            _format_value(value)))
+
+    def _write_histograms(self, out: io.StringIO, name: str, help_text: str,
+                          label_names: typing.Sequence[str],
+                          histograms: typing.Mapping[tuple, Histogram]):
+        if not histograms:
+            return
+
+        self._write_header(out, name, "histogram", help_text)
+        bucket_names = tuple(label_names) + ("le",)
+        for labels, histogram in sorted(histograms.items()):
+            for bound, count in histogram.as_dict()["buckets"].items():
+                bucket_labels = _format_labels(bucket_names, labels + (_format_value(bound),))
+                out.write("{}_{}_bucket{} {}\n".format(self.prefix, name, bucket_labels, count))
+
+            formatted = _format_labels(label_names, labels)
+            out.write("{}_{}_sum{} {}\n".format(self.prefix, name, formatted,
+                                                _format_value(histogram.sum)))
+            out.write("{}_{}_count{} {}\n".format(self.prefix, name, formatted, histogram.count))
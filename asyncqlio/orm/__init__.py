@@ -12,6 +12,7 @@ The core code for the ORM.
     query
     session
 
+    functions
     inspection
     operators
 
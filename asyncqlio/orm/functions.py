@@ -0,0 +1,192 @@
+"""
+SQL functions, such as aggregates, that can be selected in queries.
+"""
+import functools
+import hashlib
+import typing
+
+from asyncqlio.orm import operators as md_operators
+from asyncqlio.orm.schema import column as md_column, table as md_table
+
+
+class Function(object):
+    """
+    Represents a call to a SQL function, such as ``COUNT("order"."id")``.
+
+    These are not normally created directly, but through :data:`.func`:
+
+    .. code-block:: python3
+
+        query = sess.select(func.count(Order.id), Order.user_id).group_by(Order.user_id)
+        async for count, user_id in await query.all():
+            ...
+
+    Functions can be compared in the same way as columns, which is mostly useful in
+    :meth:`.SelectQuery.having`:
+
+    .. code-block:: python3
+
+        query.having(func.count(Order.id) > 5)
+    """
+
+    def __init__(self, function_name: str, *args: 'typing.Union[md_column.Column, str]',
+                 distinct: bool = False):
+        """
+        :param function_name: The name of the SQL function to call.
+        :param args: The :class:`.Column` objects to pass to the function. If no arguments are \
+            passed, ``*`` is used.
+        :param distinct: If this function should only use distinct values.
+        """
+        #: The name of the SQL function being called.
+        self.function_name = function_name.upper()
+
+        #: The arguments to this function.
+        self.args = args
+
+        #: If the DISTINCT keyword is passed to the function.
+        self.distinct = distinct
+
+        #: The label of this function, if one was set.
+        self.label_name = None  # type: str
+
+        self._digest = None  # type: str
+
+    def __repr__(self):
+        return "<Function {}>".format(self.quoted_fullname)
+
+    def label(self, name: str) -> 'Function':
+        """
+        Sets the name this function is returned with.
+
+        :param name: The name to use.
+        :return: This function.
+        """
+        self.label_name = name
+        return self
+
+    @property
+    def table(self) -> 'typing.Union[md_table.TableMeta, None]':
+        """
+        :return: The table of the first column passed to this function, or None if there isn't one.
+        """
+        for arg in self.args:
+            if isinstance(arg, md_column.Column):
+                return arg.table
+
+        return None
+
+    def iter_columns(self) -> 'typing.Iterator[md_column.Column]':
+        """
+        Iterates over the columns passed to this function.
+        """
+        for arg in self.args:
+            if isinstance(arg, md_column.Column):
+                yield arg
+
+    @property
+    def name(self) -> str:
+        """
+        :return: The name of this function in results, i.e ``count_id``.
+        """
+        if self.label_name is not None:
+            return self.label_name
+
+        names = [arg.name for arg in self.args if isinstance(arg, md_column.Column)]
+        return "_".join([self.function_name.lower()] + names)
+
+    @property
+    def quoted_fullname(self) -> str:
+        """
+        :return: The SQL for this function call.
+        """
+        if self.args:
+            args = ", ".join(arg.quoted_fullname if isinstance(arg, md_column.Column) else arg
+                             for arg in self.args)
+        else:
+            args = "*"
+
+        if self.distinct:
+            args = "DISTINCT {}".format(args)
+
+        return "{}({})".format(self.function_name, args)
+
+    def quoted_fullname_with_table(self, table: 'md_table.TableMeta') -> str:
+        """
+        :return: The SQL for this function call. The table is ignored.
+        """
+        return self.quoted_fullname
+
+    def alias_name(self, table=None, quoted: bool = False) -> str:
+        """
+        Gets the alias name for this function, in the format of `f_<name>_<hash>`.
+
+        The hash is of the SQL of the call, so that calls with the same name but different
+        arguments, such as ``COUNT(x)`` and ``COUNT(DISTINCT x)``, don't share an alias.
+
+        :param table: Ignored; exists for compatibility with :meth:`.Column.alias_name`.
+        :param quoted: Should the name be quoted?
+        """
+        if self._digest is None:
+            self._digest = hashlib.sha1(self.quoted_fullname.encode("utf-8")).hexdigest()[:8]
+
+        fmt = "f_{}_{}".format(self.name, self._digest)
+        if quoted:
+            return '"{}"'.format(fmt)
+
+        return fmt
+
+    # Operators
+    __hash__ = object.__hash__
+
+    def __eq__(self, other) -> 'md_operators.Eq':
+        return md_operators.Eq(self, other)
+
+    def __ne__(self, other) -> 'md_operators.NEq':
+        return md_operators.NEq(self, other)
+
+    def __lt__(self, other) -> 'md_operators.Lt':
+        return md_operators.Lt(self, other)
+
+    def __gt__(self, other) -> 'md_operators.Gt':
+        return md_operators.Gt(self, other)
+
+    def __le__(self, other) -> 'md_operators.Lte':
+        return md_operators.Lte(self, other)
+
+    def __ge__(self, other) -> 'md_operators.Gte':
+        return md_operators.Gte(self, other)
+
+    def asc(self) -> 'md_operators.AscSorter':
+        """
+        Returns the ascending sorter operator for this function.
+        """
+        return md_operators.AscSorter(self)
+
+    def desc(self) -> 'md_operators.DescSorter':
+        """
+        Returns the descending sorter operator for this function.
+        """
+        return md_operators.DescSorter(self)
+
+
+class FunctionGenerator(object):
+    """
+    Creates :class:`.Function` objects via attribute access. The attribute name is used as the name
+    of the SQL function.
+
+    .. code-block:: python3
+
+        func.count()  # COUNT(*)
+        func.max(User.xp)  # MAX("user"."xp")
+        func.count(User.name, distinct=True)  # COUNT(DISTINCT "user"."name")
+    """
+
+    def __getattr__(self, item: str) -> 'typing.Callable[..., Function]':
+        if item.startswith("_"):
+            raise AttributeError(item)
+
+        return functools.partial(Function, item)
+
+
+#: The default :class:`.FunctionGenerator`.
+func = FunctionGenerator()
@@ -8,6 +8,17 @@ import typing
 from asyncqlio.orm.schema import column as md_column
 
 
+def _iter_operand_columns(operand: typing.Any) -> 'typing.Iterator[md_column.Column]':
+    """
+    Iterates over the columns used by an operand of an operator, which may be a column, a
+    :class:`.Function` or a plain value.
+    """
+    if isinstance(operand, md_column.Column):
+        yield operand
+    elif hasattr(operand, "iter_columns"):
+        yield from operand.iter_columns()
+
+
 class OperatorResponse:
     """
     A storage class for the generated SQL from an operator.
@@ -62,6 +73,12 @@ class BaseOperator(abc.ABC):
             The param name and the param can be empty if none is to be returned.
         """
 
+    def iter_columns(self) -> 'typing.Iterator[md_column.Column]':
+        """
+        Iterates over the columns this operator uses.
+        """
+        return iter(())
+
     @requires_bop
     def __and__(self, other: 'BaseOperator'):
         if isinstance(self, And):
@@ -99,6 +116,10 @@ class And(BaseOperator):
     def __init__(self, *ops: 'BaseOperator'):
         self.operators = list(ops)
 
+    def iter_columns(self):
+        for op in self.operators:
+            yield from op.iter_columns()
+
     def generate_sql(self, emitter):
         final = []
         vals = {}
@@ -122,6 +143,10 @@ class Or(BaseOperator):
     def __init__(self, *ops: 'BaseOperator'):
         self.operators = list(ops)
 
+    def iter_columns(self):
+        for op in self.operators:
+            yield from op.iter_columns()
+
     def generate_sql(self, emitter):
         final = []
         vals = {}
@@ -150,6 +175,17 @@ class Sorter(BaseOperator, metaclass=abc.ABCMeta):
         """
         pass
 
+    @property
+    def sort_keys(self) -> 'typing.List[typing.Tuple[md_column.Column, str]]':
+        """
+        :return: A list of (column, sort order) pairs for this sorter.
+        """
+        return [(col, self.sort_order) for col in self.cols]
+
+    def iter_columns(self):
+        for col in self.cols:
+            yield from _iter_operand_columns(col)
+
     def generate_sql(self, emitter):
         names = ", ".join(col.alias_name(quoted=True) for col in self.cols)
         sql = "{} {}".format(names, self.sort_order)
@@ -165,6 +201,130 @@ class DescSorter(Sorter):
     sort_order = "DESC"
 
 
+class MultiSorter(BaseOperator):
+    """
+    Represents several sorters combined into one ORDER BY, allowing each column to have its own
+    sort order.
+
+    .. code-block:: python3
+
+        sess.select(User).order_by(User.level.desc(), User.id.asc())
+    """
+
+    def __init__(self, *sorters: 'Sorter'):
+        self.sorters = list(sorters)
+
+    @property
+    def sort_keys(self) -> 'typing.List[typing.Tuple[md_column.Column, str]]':
+        """
+        :return: A list of (column, sort order) pairs for every sorter in this object.
+        """
+        keys = []
+        for sorter in self.sorters:
+            keys.extend(sorter.sort_keys)
+
+        return keys
+
+    def iter_columns(self):
+        for sorter in self.sorters:
+            yield from sorter.iter_columns()
+
+    def generate_sql(self, emitter):
+        sql = ", ".join(sorter.generate_sql(emitter).sql for sorter in self.sorters)
+        return OperatorResponse(sql, {})
+
+
+class Seek(BaseOperator):
+    """
+    Represents a keyset (or "seek") condition. This matches every row that comes after the
+    specified values when sorted by the specified keys.
+
+    If every key is sorted the same way, this generates a row value comparison
+    (``("a", "b") > (?, ?)``) which can use a composite index directly. Mixed sort orders, nullable
+    columns and NULL values are expanded into the equivalent ``a > ? OR (a = ? AND b < ?)`` form,
+    where NULLs come before or after every other value in the same place the database sorts them.
+    """
+
+    def __init__(self, sort_keys: 'typing.List[typing.Tuple[md_column.Column, str]]',
+                 values: typing.Sequence[typing.Any], *, nulls_high: bool = False):
+        """
+        :param sort_keys: A list of (column, sort order) pairs, as returned from \
+            :attr:`.Sorter.sort_keys`.
+        :param values: The values of the last row seen, in the same order as the sort keys.
+        :param nulls_high: If the database sorts NULL as larger than every other value, like \
+            PostgreSQL, rather than smaller, like SQLite and MySQL.
+        """
+        if len(sort_keys) != len(values):
+            raise ValueError("Expected {} seek values, got {}".format(len(sort_keys),
+                                                                      len(values)))
+
+        self.sort_keys = list(sort_keys)
+        self.values = list(values)
+        self.nulls_high = nulls_high
+
+    def iter_columns(self):
+        for col, _ in self.sort_keys:
+            yield from _iter_operand_columns(col)
+
+    @staticmethod
+    def _get_operator(sort_order: str) -> str:
+        return ">" if sort_order == "ASC" else "<"
+
+    def generate_sql(self, emitter):
+        params = {}
+        names = []
+        for value in self.values:
+            if value is None:
+                names.append(None)
+                continue
+
+            param_name, name = emitter()
+            params[name] = value
+            names.append(param_name)
+
+        columns = [col.quoted_fullname for col, _ in self.sort_keys]
+        orders = set(order for _, order in self.sort_keys)
+        # functions can return NULL for any row
+        has_nulls = any(value is None or getattr(col, "nullable", True)
+                        for (col, _), value in zip(self.sort_keys, self.values))
+
+        if len(orders) == 1 and not has_nulls:
+            op = self._get_operator(orders.pop())
+            if len(columns) == 1:
+                sql = "{} {} {}".format(columns[0], op, names[0])
+            else:
+                sql = "({}) {} ({})".format(", ".join(columns), op, ", ".join(names))
+
+            return OperatorResponse(sql, params)
+
+        # mixed orders and NULLs need the expanded form, which re-uses params
+        # a > :a OR (a = :a AND b < :b) OR ...
+        clauses = []
+        equal = []
+        for (col, order), column, name in zip(self.sort_keys, columns, names):
+            nulls_after = self.nulls_high == (order == "ASC")
+            if name is None:
+                # only non-NULL values can come after a NULL, if NULLs sort first
+                after = None if nulls_after else "{} IS NOT NULL".format(column)
+                equal_sql = "{} IS NULL".format(column)
+            else:
+                after = "{} {} {}".format(column, self._get_operator(order), name)
+                if getattr(col, "nullable", True) and nulls_after:
+                    after = "({} OR {} IS NULL)".format(after, column)
+                equal_sql = "{} = {}".format(column, name)
+
+            if after is not None:
+                clauses.append("({})".format(" AND ".join(equal + [after])))
+            equal.append(equal_sql)
+
+        if not clauses:
+            # the last row seen is the last possible row
+            return OperatorResponse("1 = 0", params)
+
+        sql = "({})".format(" OR ".join(clauses))
+        return OperatorResponse(sql, params)
+
+
 class ColumnValueMixin(object):
     """
     A mixin that specifies that an operator takes both a Column and a Value as arguments.
@@ -181,6 +341,10 @@ class ColumnValueMixin(object):
         self.column = column
         self.value = value
 
+    def iter_columns(self):
+        yield from _iter_operand_columns(self.column)
+        yield from _iter_operand_columns(self.value)
+
 
 class BasicSetter(BaseOperator, ColumnValueMixin, metaclass=abc.ABCMeta):
     """
@@ -2,15 +2,22 @@
 Classes for query objects.
 """
 import abc
+import base64
 import collections
+import datetime
+import decimal
 import io
 import itertools
+import json
+import time
 import typing
+import uuid
 
+from asyncqlio import explain as md_explain
 from asyncqlio.backends.base import BaseResultSet
 from asyncqlio.meta import AsyncABC
-from asyncqlio.orm import inspection as md_inspection, operators as md_operators, \
-    session as md_session
+from asyncqlio.orm import functions as md_functions, inspection as md_inspection, \
+    operators as md_operators, session as md_session
 from asyncqlio.orm.schema import column as md_column, relationship as md_relationship, \
     table as md_table
 from asyncqlio.sentinels import NO_VALUE
@@ -55,6 +62,112 @@ class ResultGenerator(collections.AsyncIterator):
 
         self._result_deque = collections.deque()
 
+        self._fetch_dispatched = False
+        self._hydrate_dispatched = False
+
+    def _get_pkey(self, row: typing.Mapping[str, typing.Any]) -> tuple:
+        """
+        Gets the primary key of the main query table from a raw row.
+        """
+        return tuple(row[col.alias_name(quoted=False)]
+                     for col in self.query.table.primary_key.columns)
+
+    def _pop_groups(self, final: bool = False) -> 'typing.List[typing.List[typing.Mapping]]':
+        """
+        Pops every complete group of rows (rows that share a primary key) off of the stored rows.
+
+        :param final: If there are no more rows to be fetched. If this is False, the last group \
+            is kept, as more rows for it may still be fetched.
+        """
+        groups = []
+        current = []
+        last_pkey = None
+        for row in self._result_deque:
+            pkey = self._get_pkey(row)
+            if current and pkey != last_pkey:
+                groups.append(current)
+                current = []
+
+            current.append(row)
+            last_pkey = pkey
+
+        self._result_deque.clear()
+        if final:
+            if current:
+                groups.append(current)
+        else:
+            self._result_deque.extend(current)
+
+        return groups
+
+    def _map_group(self, rows: 'typing.List[typing.Mapping]'):
+        """
+        Maps a group of rows that share a primary key to a single result.
+        """
+        if len(rows) == 1:
+            return self._hydrate(self.query.map_columns, rows[0])
+
+        return self._hydrate(self.query.map_many, *rows)
+
+    def _hydrate(self, map_func, *rows: typing.Mapping):
+        """
+        Maps rows with a mapping function of the query, recording the time taken if events are
+        enabled.
+        """
+        event = self._results.event
+        if event is None:
+            return map_func(*rows)
+
+        start = time.perf_counter()
+        result = map_func(*rows)
+        event.hydrate_time += time.perf_counter() - start
+        event.hydrated += 1
+        return result
+
+    async def _fetch_row(self) -> typing.Mapping:
+        """
+        Fetches the next row from the result set, recording the time taken if events are enabled.
+        """
+        event = self._results.event
+        if event is None:
+            return await self._results.fetch_row()
+
+        start = time.perf_counter()
+        row = await self._results.fetch_row()
+        event.fetch_time += time.perf_counter() - start
+        self._record_fetched(event, 0 if row is None else 1, done=row is None)
+        return row
+
+    async def _fetch_many(self, n: int) -> 'typing.List[typing.Mapping]':
+        """
+        Fetches the next N rows from the result set, recording the time taken if events are
+        enabled.
+        """
+        event = self._results.event
+        if event is None:
+            return await self._results.fetch_many(n)
+
+        start = time.perf_counter()
+        rows = await self._results.fetch_many(n)
+        event.fetch_time += time.perf_counter() - start
+        self._record_fetched(event, len(rows), done=len(rows) < n)
+        return rows
+
+    def _record_fetched(self, event, count: int, *, done: bool):
+        event.rowcount = (event.rowcount or 0) + count
+        if done and not self._fetch_dispatched:
+            self._fetch_dispatched = True
+            self.query.session.bind.events.dispatch("on_fetch", event)
+
+    def _finish(self):
+        """
+        Called when there are no more results, to dispatch the hydration event.
+        """
+        event = self._results.event if self._results is not None else None
+        if event is not None and not self._hydrate_dispatched:
+            self._hydrate_dispatched = True
+            self.query.session.bind.events.dispatch("on_hydrate", event)
+
     async def _fill(self):
         # peek from the first item
         try:
@@ -65,22 +178,20 @@ class ResultGenerator(collections.AsyncIterator):
             rows_filled = 0
         else:
             # there was a row from last time, so we need to check for any run-off rows for that
-            last_pkey = tuple(first[col.alias_name(quoted=False)]
-                              for col in self.query.table.primary_key.columns)
+            last_pkey = self._get_pkey(first)
             # also, since there was technically one row before, we start at 1 here
             rows_filled = 1
 
         while True:
             # fetch a new row, make sure its not none
-            row = await self._results.fetch_row()
+            row = await self._fetch_row()
             if row is None:
                 break
 
             # add it to the results
             self._result_deque.append(row)
             # load the primary key via getting every column through alias name
-            pkey = tuple(row[col.alias_name(quoted=False)] for col in
-                         self.query.table.primary_key.columns)
+            pkey = self._get_pkey(row)
 
             # if there was no results before, we just set the primary key and continue
             if last_pkey is None:
@@ -103,19 +214,26 @@ class ResultGenerator(collections.AsyncIterator):
     async def __anext__(self):
         # ensure we have a BaseResultSet
         if self._results is None:
-            self._results = await self.query.session.cursor(*self.query.generate_sql())
+            self._results = await self.query.session.get_select_cursor(self.query)
+
+        # raw rows don't need to be grouped
+        if self.query.result_mode is not None:
+            row = await self._fetch_row()
+            if row is None:
+                self._finish()
+                raise StopAsyncIteration
+
+            return self._hydrate(self.query.map_raw, row)
 
         # get the number of rows filled off of the end
         filled = await self._fill()
 
         if filled == 0:
+            self._finish()
             raise StopAsyncIteration
 
         rows = [self._result_deque.popleft() for x in range(0, filled)]
-        if len(rows) == 1:
-            return self.query.map_columns(rows[0])
-
-        return self.query.map_many(*rows)
+        return self._map_group(rows)
 
     async def next(self):
         try:
@@ -123,17 +241,299 @@ class ResultGenerator(collections.AsyncIterator):
         except StopAsyncIteration:
             return None
 
+    def batches(self, size: int) -> 'BatchGenerator':
+        """
+        Gets a :class:`.BatchGenerator` that yields lists of results from this generator.
+
+        :param size: The number of rows to fetch from the database at once. See \
+            :class:`.BatchGenerator`.
+        """
+        return BatchGenerator(self, size)
+
     async def flatten(self) -> 'typing.List[md_table.Table]':
         """
         Flattens this query into a single list.
+
+        If the query hasn't been run yet, every row is fetched as it is run, with
+        :meth:`.BaseTransaction.fetch_all`.
         """
+        if self._results is None:
+            self._results = await self.query.session.get_select_cursor(self.query, fetch="all")
+
         l = []
         async for result in self:
             l.append(result)
 
+        await self._results.close()
         return l
 
 
+class BatchGenerator(collections.AsyncIterator):
+    """
+    A helper class that yields lists of results from a query, fetching rows from the database in
+    chunks with :meth:`.BaseResultSet.fetch_many`.
+
+    Only one chunk of rows is kept in memory at a time, so this can be used to process result sets
+    that are too large to fit into memory.
+
+    .. code-block:: python3
+
+        async for batch in sess.select(User).where(User.active == True).batches(5000):
+            for user in batch:
+                ...
+
+    The batch size counts database rows, not results. When one-to-many relationships are joined,
+    each result can span several rows, so a batch may contain fewer results than the batch size,
+    and the last result of each chunk is held back until the next chunk is fetched.
+    """
+
+    def __init__(self, gen: 'ResultGenerator', size: int):
+        """
+        :param gen: The :class:`.ResultGenerator` to fetch rows with.
+        :param size: The number of rows to fetch from the database at once.
+        """
+        if size < 1:
+            raise ValueError("Batch size must be at least 1")
+
+        self.generator = gen
+        self.size = size
+
+        self._exhausted = False
+        # only one-to-many joins can split the rows of a result over two chunks
+        self._grouped = gen.query.result_mode is None and gen.query._has_one_to_many_joins()
+
+    async def __anext__(self) -> 'typing.List[md_table.Table]':
+        gen = self.generator
+        # ensure we have a BaseResultSet
+        if gen._results is None:
+            gen._results = await gen.query.session.get_select_cursor(gen.query, share=False)
+
+        # every row is a separate result if it doesn't need to be grouped,
+        # so they can be mapped directly
+        if not self._grouped:
+            rows = [] if self._exhausted else await gen._fetch_many(self.size)
+            self._exhausted = len(rows) < self.size
+            # a row may have been peeked at by iterating over the generator one result at a time
+            if gen._result_deque:
+                rows[:0] = gen._result_deque
+                gen._result_deque.clear()
+
+            if not rows:
+                gen._finish()
+                raise StopAsyncIteration
+
+            map_func = gen.query.map_columns if gen.query.result_mode is None else \
+                gen.query.map_raw
+            return [gen._hydrate(map_func, row) for row in rows]
+
+        while True:
+            if not self._exhausted:
+                rows = await gen._fetch_many(self.size)
+                if len(rows) < self.size:
+                    self._exhausted = True
+                gen._result_deque.extend(rows)
+
+            # the last group is held back until the next chunk,
+            # as joined rows for it might be split over two chunks
+            groups = gen._pop_groups(final=self._exhausted)
+            if groups:
+                return [gen._map_group(group) for group in groups]
+
+            if self._exhausted:
+                gen._finish()
+                raise StopAsyncIteration
+
+
+def _encode_cursor_value(value: typing.Any) -> dict:
+    """
+    Encodes a key value that JSON can't represent into a tagged dict.
+    """
+    if isinstance(value, datetime.datetime):
+        offset = value.utcoffset()
+        return {"__type__": "datetime", "value": [
+            value.year, value.month, value.day, value.hour, value.minute, value.second,
+            value.microsecond, offset.total_seconds() if offset is not None else None
+        ]}
+    elif isinstance(value, datetime.date):
+        return {"__type__": "date", "value": [value.year, value.month, value.day]}
+    elif isinstance(value, datetime.time):
+        return {"__type__": "time",
+                "value": [value.hour, value.minute, value.second, value.microsecond]}
+    elif isinstance(value, datetime.timedelta):
+        return {"__type__": "timedelta",
+                "value": [value.days, value.seconds, value.microseconds]}
+    elif isinstance(value, decimal.Decimal):
+        return {"__type__": "decimal", "value": str(value)}
+    elif isinstance(value, uuid.UUID):
+        return {"__type__": "uuid", "value": str(value)}
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        return {"__type__": "bytes", "value": base64.b64encode(bytes(value)).decode("ascii")}
+
+    raise TypeError("Cannot use a value of type {} in a pagination cursor"
+                    .format(type(value).__name__))
+
+
+def _decode_cursor_value(obj: dict) -> typing.Any:
+    """
+    Decodes a tagged dict made by :func:`._encode_cursor_value` back into its value.
+    """
+    kind = obj.get("__type__")
+    if kind is None:
+        return obj
+
+    value = obj["value"]
+    if kind == "datetime":
+        *parts, offset = value
+        tz = datetime.timezone(datetime.timedelta(seconds=offset)) if offset is not None else None
+        return datetime.datetime(*parts, tzinfo=tz)
+    elif kind == "date":
+        return datetime.date(*value)
+    elif kind == "time":
+        return datetime.time(*value)
+    elif kind == "timedelta":
+        return datetime.timedelta(*value)
+    elif kind == "decimal":
+        return decimal.Decimal(value)
+    elif kind == "uuid":
+        return uuid.UUID(value)
+    elif kind == "bytes":
+        return base64.b64decode(value.encode("ascii"))
+
+    raise ValueError("Unknown pagination cursor value type {!r}".format(kind))
+
+
+class Page(object):
+    """
+    Represents a single page of results returned from :meth:`.SelectQuery.paginate`.
+    """
+
+    def __init__(self, rows: 'typing.List[md_table.Table]', next_cursor: str = None):
+        #: The list of :class:`.Table` rows in this page.
+        self.rows = rows
+
+        #: An opaque token that can be passed to :meth:`.SelectQuery.paginate` to get the next
+        #: page, or None if this is the last page.
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return "<Page rows={} next_cursor={}>".format(len(self.rows), self.next_cursor)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def has_more(self) -> bool:
+        """
+        :return: If there is another page after this one.
+        """
+        return self.next_cursor is not None
+
+    @staticmethod
+    def encode_cursor(values: typing.Sequence[typing.Any]) -> str:
+        """
+        Encodes a list of key values into an opaque cursor token.
+
+        Besides the types JSON supports, values can be datetimes, dates, times, timedeltas,
+        :class:`decimal.Decimal`, :class:`uuid.UUID` or bytes, which are decoded back into the
+        same type so that they can be bound to their columns again.
+        """
+        data = json.dumps(list(values), separators=(",", ":"),
+                          default=_encode_cursor_value).encode("utf-8")
+        return base64.urlsafe_b64encode(data).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> list:
+        """
+        Decodes an opaque cursor token back into a list of key values.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"),
+                                object_hook=_decode_cursor_value)
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError("Invalid pagination cursor {!r}".format(cursor)) from e
+
+        if not isinstance(values, list):
+            raise ValueError("Invalid pagination cursor {!r}".format(cursor))
+
+        return values
+
+
+class LoadOption(object):
+    """
+    Represents a per-query override of how a relationship is loaded. These are created with
+    :func:`.joinedload`, :func:`.innerjoin`, :func:`.selectload` and :func:`.noload`, and passed to
+    :meth:`.SelectQuery.options`.
+    """
+
+    def __init__(self, relationship: 'md_relationship.Relationship', load_type: str,
+                 join_type: str = None):
+        """
+        :param relationship: The :class:`.Relationship` to override.
+        :param load_type: The load type to use for the relationship in this query.
+        :param join_type: The type of join to use, if the relationship is joined.
+        """
+        if not isinstance(relationship, md_relationship.Relationship):
+            raise TypeError("Load options can only be used on relationships")
+
+        self.relationship = relationship
+        self.load_type = load_type
+        self.join_type = join_type
+
+    def __repr__(self):
+        return "<LoadOption relationship={} load_type={}>".format(self.relationship,
+                                                                   self.load_type)
+
+
+def joinedload(relationship: 'md_relationship.Relationship', *,
+               innerjoin: bool = False) -> LoadOption:
+    """
+    Loads a relationship with a join in this query, even if it is normally loaded with a SELECT.
+
+    :param relationship: The :class:`.Relationship` to load.
+    :param innerjoin: If an INNER JOIN should be used rather than a LEFT OUTER JOIN.
+    """
+    return LoadOption(relationship, "joined", "INNER" if innerjoin else "LEFT OUTER")
+
+
+def innerjoin(relationship: 'md_relationship.Relationship') -> LoadOption:
+    """
+    Loads a relationship with an INNER JOIN in this query.
+
+    .. warning::
+        Rows without a related row will not be returned, so this should only be used for
+        relationships that are always present.
+
+    :param relationship: The :class:`.Relationship` to load.
+    """
+    return joinedload(relationship, innerjoin=True)
+
+
+def selectload(relationship: 'md_relationship.Relationship') -> LoadOption:
+    """
+    Loads a relationship with a separate SELECT when it is accessed, rather than joining it in this
+    query.
+
+    :param relationship: The :class:`.Relationship` to load.
+    """
+    if getattr(relationship, "use_iter", True) is False:
+        raise ValueError("One-to-one relationships are always loaded with a join")
+
+    return LoadOption(relationship, "select")
+
+
+def noload(relationship: 'md_relationship.Relationship') -> LoadOption:
+    """
+    Doesn't load a relationship at all in this query. The relationship will be empty on the
+    returned rows.
+
+    :param relationship: The :class:`.Relationship` to not load.
+    """
+    return LoadOption(relationship, "noload")
+
+
 class SelectQuery(BaseQuery):
     """
     Represents a SELECT query, which fetches data from the database.
@@ -178,13 +578,58 @@ class SelectQuery(BaseQuery):
         #: The column to order by.
         self.orderer = None
 
-    def __call__(self, table):
-        return self.from_(table)
+        #: The list of columns to select, if this query is only selecting specific columns.
+        self.selected_columns = []
+
+        #: The result mode for this query. If this is None, full :class:`.Table` rows are returned.
+        #: Otherwise, this is one of ``tuples``, ``dicts`` or ``scalars``.
+        self.result_mode = None
+
+        #: The list of columns to group by.
+        self.group_columns = []
+
+        #: A list of conditions to fulfil after grouping.
+        self.having_conditions = []
+
+        #: A mapping of relationship -> :class:`.LoadOption` for this query.
+        self.load_options = {}
+
+        #: If the results of this query can be stored in the :class:`.QueryCache`.
+        self.cached = False
+
+        #: The number of seconds to cache the results of this query for, or None for the default.
+        self.cache_ttl = None  # type: float
+
+        #: The :class:`.Relationship` this query lazily loads the rows of, if it was created by a
+        #: select-loaded relationship.
+        self.loading_relationship = None  # type: md_relationship.Relationship
+
+    def __call__(self, *items):
+        if len(items) == 1 and not isinstance(items[0], (md_column.Column, md_functions.Function)):
+            return self.from_(items[0])
+
+        return self.only(*items)
 
     # used so you can async iterate over a query directly
     def __aiter__(self):
         return ResultGenerator(q=self)
 
+    def batches(self, size: int) -> 'BatchGenerator':
+        """
+        Iterates over the results of this query in batches, instead of one row at a time.
+
+        .. code-block:: python3
+
+            async for batch in sess.select(User).batches(5000):
+                for user in batch:
+                    ...
+
+        :param size: The number of rows to fetch from the database at once. See \
+            :class:`.BatchGenerator`.
+        :return: A :class:`.BatchGenerator` that yields lists of :class:`.Table` rows.
+        """
+        return ResultGenerator(q=self).batches(size)
+
     def _get_joins_for_table(self, parent: 'md_relationship.Relationship',
                              table: 'md_table.Table', seen: list = None):
         """
@@ -197,7 +642,7 @@ class SelectQuery(BaseQuery):
         joins = []
         for relationship in table.iter_relationships():
             # ignore non-join relationships
-            if relationship.load_type != "joined":
+            if self._get_load_type(relationship) != "joined":
                 continue
 
             if relationship.foreign_table in seen:
@@ -206,7 +651,8 @@ class SelectQuery(BaseQuery):
             foreign_table = relationship.foreign_table
             foreign_tables.append(foreign_table)
 
-            joins.append(relationship._get_join_query(parent))
+            joins.append(relationship._get_join_query(parent,
+                                                      self._get_join_type(relationship)))
 
         return foreign_tables, joins
 
@@ -229,7 +675,7 @@ class SelectQuery(BaseQuery):
 
         foreign_tables, joins = self._get_joins_for_table(parent, table, seen=seen)
         for relationship in table.iter_relationships():
-            if relationship.load_type != "joined":
+            if self._get_load_type(relationship) != "joined":
                 continue
 
             if relationship.foreign_table in seen:
@@ -243,6 +689,24 @@ class SelectQuery(BaseQuery):
 
         return foreign_tables, joins
 
+    def _get_load_type(self, relationship: 'md_relationship.Relationship') -> str:
+        """
+        Gets the load type of a relationship in this query.
+        """
+        try:
+            return self.load_options[relationship].load_type
+        except KeyError:
+            return relationship.load_type
+
+    def _get_join_type(self, relationship: 'md_relationship.Relationship') -> str:
+        """
+        Gets the join type of a relationship in this query.
+        """
+        try:
+            return self.load_options[relationship].join_type or relationship.join_type
+        except KeyError:
+            return relationship.join_type
+
     def get_required_join_paths(self):
         """
         Gets the required join paths for this query.
@@ -257,47 +721,209 @@ class SelectQuery(BaseQuery):
         counter = itertools.count()
 
         # calculate the column names
-        foreign_tables, joins = self.get_required_join_paths()
-        selected_columns = self.table.iter_columns()
-        column_names = []
+        # projected or raw queries never load any relationships
+        if self.selected_columns or self.result_mode is not None:
+            foreign_tables, joins = [], []
+        else:
+            foreign_tables, joins = self.get_required_join_paths()
 
-        for table in itertools.chain([self.table], foreign_tables):
-            for column in table.iter_columns():
-                a = column.alias_name(table=table, quoted=True)
-                column_names.append(r'{} AS {}'.format(column.quoted_fullname_with_table(table), a))
+        column_names = []
+        for table, column in self._get_selected_columns(foreign_tables):
+            a = column.alias_name(table=table, quoted=True)
+            column_names.append(r'{} AS {}'.format(column.quoted_fullname_with_table(table), a))
+
+        if self.result_mode == "dicts":
+            names = [column.name for _, column in self._get_selected_columns()]
+            duplicates = sorted(set(name for name in names if names.count(name) > 1))
+            if duplicates:
+                raise ValueError("Duplicate result names {} - use label() to name them"
+                                 .format(", ".join(duplicates)))
+
+        # append the conditions and grouping
+        params = {}
+        filters = self._get_filter_sql(params)
 
         # BEGIN THE GENERATION
         fmt = io.StringIO()
+        if self._should_limit_in_subquery(foreign_tables):
+            # the limit applies to the joined rows, which would cut off the children of the last
+            # row, so limit the rows of our table in a subquery and join the children onto that
+            fmt.write("SELECT {} FROM ({}) AS {} ".format(", ".join(column_names),
+                                                          self._get_limited_subquery(filters),
+                                                          self.table.__quoted_name__))
+            fmt.write(" ".join(joins))
+            # ensure the children of each row are grouped together
+            order = [self._get_order_sql()] if self.orderer is not None else []
+            sorted_columns = [col for col, _ in self.orderer.sort_keys] if order else []
+            for column in self.table.primary_key.columns:
+                if not any(column is other for other in sorted_columns):
+                    order.append(column.alias_name(quoted=True))
+
+            fmt.write(" ORDER BY {}".format(", ".join(order)))
+            return fmt.getvalue(), params
+
         fmt.write("SELECT {} FROM {} ".format(", ".join(column_names), self.table.__quoted_name__))
-        # cleanup after ourselves for a bit
-        del selected_columns
+
+        # append joins
+        fmt.write(" ".join(joins))
+        fmt.write(filters)
+
+        if self.orderer is not None:
+            # projected queries might not select the ordered columns, so the alias can't be used
+            fmt.write(" ORDER BY {}".format(self._get_order_sql(aliased=not self.selected_columns)))
+
+        fmt.write(self._get_limit_sql())
+        return fmt.getvalue(), params
+
+    def _should_limit_in_subquery(self, foreign_tables: list) -> bool:
+        """
+        Checks if the LIMIT and OFFSET of this query need to be applied in a subquery, because
+        one-to-many relationships are being joined.
+
+        :param foreign_tables: The foreign tables being joined in this query.
+        """
+        if self.row_limit is None and self.row_offset is None:
+            return False
+
+        if not foreign_tables or self.group_columns:
+            return False
+
+        # one-to-one relationships never duplicate our rows
+        if not self._has_one_to_many_joins():
+            return False
+
+        # the subquery can only filter and sort on the columns of our own table
+        operators = itertools.chain(self.conditions, self.having_conditions,
+                                    [self.orderer] if self.orderer is not None else [])
+        for operator in operators:
+            if any(column.table is not self.table for column in operator.iter_columns()):
+                return False
+
+        return True
+
+    def _has_one_to_many_joins(self) -> bool:
+        """
+        Checks if any one-to-many relationships are joined in this query, so that one result can
+        span several rows.
+        """
+        return any(relationship.use_iter for relationship in self._iter_joined_relationships())
+
+    def _iter_joined_relationships(self, table: 'md_table.Table' = None, seen: list = None):
+        """
+        Iterates over the relationships that are joined in this query.
+        """
+        if table is None:
+            table = self.table
+
+        if seen is None:
+            seen = [table]
+
+        for relationship in table.iter_relationships():
+            if self._get_load_type(relationship) != "joined":
+                continue
+
+            if relationship.foreign_table in seen:
+                continue
+
+            seen.append(relationship.foreign_table)
+            yield relationship
+            yield from self._iter_joined_relationships(relationship.foreign_table, seen=seen)
+
+    def _get_limited_subquery(self, filters: str) -> str:
+        """
+        Gets the subquery that selects the limited rows of our table.
+
+        :param filters: The SQL for the WHERE clause of this query.
+        """
+        if self.orderer is not None:
+            order = self._get_order_sql(aliased=False)
+        else:
+            # ensure the rows returned are stable across pages
+            order = ", ".join("{} ASC".format(column.quoted_fullname)
+                              for column in self.table.primary_key.columns)
+
+        return "SELECT * FROM {}{} ORDER BY {}{}".format(self.table.__quoted_name__, filters, order,
+                                                         self._get_limit_sql())
+
+    def _get_filter_sql(self, params: dict) -> str:
+        """
+        Gets the WHERE, GROUP BY and HAVING clauses of this query.
+
+        :param params: The dict of params to update with any params used in the clauses.
+        """
+        fmt = io.StringIO()
 
         # format conditions
-        params = {}
+        # these are assumed to be And if there are multiple!
         c_sql = []
         for condition in self.conditions:
             response = condition.generate_sql(self.session.bind.emit_param)
             params.update(response.parameters)
             c_sql.append(response.sql)
 
-        # append joins
-        fmt.write(" ".join(joins))
-
-        # append the fmt with the conditions
-        # these are assumed to be And if there are multiple!
         if c_sql:
             fmt.write(" WHERE {}".format(" AND ".join(c_sql)))
 
-        if self.orderer is not None:
-            res = self.orderer.generate_sql(self.session.bind.emit_param)
-            fmt.write(" ORDER BY {}".format(res.sql))
+        if self.group_columns:
+            names = ", ".join(column.quoted_fullname for column in self.group_columns)
+            fmt.write(" GROUP BY {}".format(names))
+
+        h_sql = []
+        for condition in self.having_conditions:
+            response = condition.generate_sql(self.session.bind.emit_param)
+            params.update(response.parameters)
+            h_sql.append(response.sql)
+
+        if h_sql:
+            fmt.write(" HAVING {}".format(" AND ".join(h_sql)))
+
+        return fmt.getvalue()
+
+    def _get_limit_sql(self) -> str:
+        """
+        Gets the LIMIT and OFFSET clauses of this query.
+        """
+        fmt = io.StringIO()
         if self.row_limit is not None:
             fmt.write(" LIMIT {}".format(self.row_limit))
 
         if self.row_offset is not None:
             fmt.write(" OFFSET {}".format(self.row_offset))
 
-        return fmt.getvalue(), params
+        return fmt.getvalue()
+
+    def _get_selected_columns(self, foreign_tables: list = ()) \
+            -> 'typing.List[typing.Tuple[md_table.Table, md_column.Column]]':
+        """
+        Gets the (table, column) pairs to select in this query.
+
+        :param foreign_tables: The foreign tables being joined in this query.
+        """
+        if not self.selected_columns:
+            return [(table, column) for table in itertools.chain([self.table], foreign_tables)
+                    for column in table.iter_columns()]
+
+        selected = [(self.table, column) for column in self.selected_columns]
+        # rows can't be grouped without the primary key, so always load it
+        if self.result_mode is None:
+            for column in self.table.primary_key.columns:
+                if not any(column is other for other in self.selected_columns):
+                    selected.append((self.table, column))
+
+        return selected
+
+    def _get_order_sql(self, aliased: bool = True) -> str:
+        """
+        Gets the SQL for the ORDER BY clause of this query.
+
+        :param aliased: If the alias names of the columns should be used, rather than the full \
+            column names.
+        """
+        if aliased:
+            return self.orderer.generate_sql(self.session.bind.emit_param).sql
+
+        return ", ".join("{} {}".format(column.quoted_fullname, order)
+                         for column, order in self.orderer.sort_keys)
 
     # "fetch" methods
     async def first(self) -> 'md_table.Table':
@@ -306,11 +932,13 @@ class SelectQuery(BaseQuery):
 
         :return: A :class:`.Table` instance representing the first item, or None if no item matched.
         """
-        gen = await self.session.run_select_query(self)
+        # only the first row is needed, unless the first result can span several rows
+        fetch = "chunk" if self.result_mode is None and self._has_one_to_many_joins() else "one"
+        gen = await self.session.run_select_query(self, share=False, fetch=fetch)
         row = await gen.next()
-
-        if row is not None:
-            return row
+        # the rows after the first result aren't needed
+        await gen._results.close()
+        return row
 
     async def all(self) -> 'ResultGenerator':
         """
@@ -320,9 +948,71 @@ class SelectQuery(BaseQuery):
         """
         return await self.session.run_select_query(self)
 
+    async def count(self) -> int:
+        """
+        Counts the number of rows that match this query, inside the database.
+
+        .. code-block:: python3
+
+            active_users = await sess.select(User).where(User.active == True).count()
+
+        If this query is grouped or limited, the number of groups or limited rows is counted
+        instead. Relationships are not joined when counting.
+
+        :return: The number of rows that matched.
+        """
+        params = {}
+        filters = self._get_filter_sql(params)
+        if not self.group_columns and self.row_limit is None and self.row_offset is None:
+            sql = "SELECT COUNT(*) FROM {}{}".format(self.table.__quoted_name__, filters)
+        else:
+            inner = "SELECT 1 FROM {}{}{}".format(self.table.__quoted_name__, filters,
+                                                  self._get_limit_sql())
+            sql = 'SELECT COUNT(*) FROM ({}) AS "count_query"'.format(inner)
+
+        async with await self.session.read_cursor(sql, params, fetch="one") as cursor:
+            row = await cursor.fetch_row()
+
+        return row[0]
+
+    async def exists(self) -> bool:
+        """
+        Checks if any rows match this query, without fetching them.
+
+        :return: True if at least one row matched, False otherwise.
+        """
+        params = {}
+        filters = self._get_filter_sql(params)
+        sql = "SELECT 1 FROM {}{}".format(self.table.__quoted_name__, filters)
+        if self.row_offset is not None:
+            sql += " LIMIT 1 OFFSET {}".format(self.row_offset)
+        else:
+            sql += " LIMIT 1"
+
+        async with await self.session.read_cursor(sql, params, fetch="one") as cursor:
+            row = await cursor.fetch_row()
+
+        return row is not None
+
     async def run(self):
         return await self.all()
 
+    async def explain(self, *, analyze: bool = False) -> 'md_explain.QueryPlan':
+        """
+        Explains how the database would run this query.
+
+        .. code-block:: python3
+
+            plan = await sess.select(User).where(User.email == email).explain()
+            assert plan.uses_index("user_email_idx")
+
+        :param analyze: If the query should be run, so that the plan includes the actual rows of \
+            each step. This isn't supported by SQLite.
+        :return: The :class:`.QueryPlan` of this query.
+        """
+        sql, params = self.generate_sql()
+        return await self.session.explain(sql, params, analyze=analyze)
+
     # ORM methods
     def map_columns(self, results: typing.Mapping[str, typing.Any]) -> 'md_table.Table':
         """
@@ -357,6 +1047,10 @@ class SelectQuery(BaseQuery):
         md_inspection._set_mangled(row, "existed", True)
         # give the row a session
         row._session = self.session
+        # ensure relationships are loaded the way this query loaded them
+        if self.load_options:
+            row._load_overrides = {relationship: option.load_type
+                                   for relationship, option in self.load_options.items()}
 
         # ensure relationships are cascaded
         row._update_relationships(relation_data)
@@ -385,6 +1079,77 @@ class SelectQuery(BaseQuery):
 
         return tbl_row
 
+    def map_raw(self, result: typing.Mapping[str, typing.Any]) -> typing.Any:
+        """
+        Maps a result row according to the result mode of this query, without creating a
+        :class:`.Table` instance.
+
+        :param result: A single row of results from the query cursor.
+        :return: A tuple, dict or single value, depending on the result mode.
+        """
+        if self.result_mode == "tuples":
+            return tuple(self._get_raw_values(result))
+        elif self.result_mode == "dicts":
+            names = (column.name for _, column in self._get_selected_columns())
+            return collections.OrderedDict(zip(names, self._get_raw_values(result)))
+        elif self.result_mode == "scalars":
+            return next(iter(result.values()))
+        else:
+            raise ValueError("Unknown result mode {}".format(self.result_mode))
+
+    def _get_raw_values(self, result: typing.Mapping[str, typing.Any]) -> list:
+        """
+        Gets the value of each selected column from a result row, in order.
+        """
+        values = list(result.values())
+        if not self.selected_columns or len(values) == len(self.selected_columns):
+            return values
+
+        # identical expressions share an alias, so there are fewer values than columns
+        return [result[column.alias_name(self.table, quoted=False)]
+                for column in self.selected_columns]
+
+    def _get_result_position(self, column) -> int:
+        """
+        Gets the position of a selected column in the raw results of this query.
+
+        :raises ValueError: If the column isn't selected by this query.
+        """
+        columns = [selected for _, selected in self._get_selected_columns()]
+        # scalars only return the first selected column
+        if self.result_mode == "scalars":
+            columns = columns[:1]
+
+        for i, selected in enumerate(columns):
+            if selected is column:
+                return i
+
+        raise ValueError("{} is not in the results of this query".format(column.quoted_fullname))
+
+    def get_result_value(self, result: typing.Any, column) -> typing.Any:
+        """
+        Gets the value of a selected column from a result of this query, in any result mode.
+
+        :param result: A single result of this query.
+        :param column: The :class:`.Column`, or selected :class:`.Function`, to get the value \
+            of.
+        :raises ValueError: If the column isn't in the results of this query.
+        """
+        if self.result_mode is None:
+            if not isinstance(column, md_column.Column):
+                raise ValueError("{} is not in the results of this query - select it with "
+                                 "tuples() to use it".format(column.quoted_fullname))
+
+            return result.get_column_value(column)
+
+        position = self._get_result_position(column)
+        if self.result_mode == "tuples":
+            return result[position]
+        elif self.result_mode == "dicts":
+            return result[column.name]
+        else:
+            return result
+
     # Helper methods for natural builder-style queries
     def from_(self, tbl) -> 'SelectQuery':
         """
@@ -396,6 +1161,157 @@ class SelectQuery(BaseQuery):
         self.set_table(tbl)
         return self
 
+    def only(self, *columns: 'md_column.Column') -> 'SelectQuery':
+        """
+        Only selects the specified columns, rather than every column in the table. Relationships are
+        not loaded for projected queries.
+
+        .. code-block:: python3
+
+            sess.select(User).only(User.id, User.name)
+            # or, alternatively
+            sess.select(User.id, User.name)
+
+        If this query returns :class:`.Table` rows, any columns that were not selected are left
+        unset on the returned rows, apart from the primary key which is always selected.
+
+        :class:`.Function` objects, such as aggregates, can also be selected. Queries that select
+        functions return tuples by default, as they can't be mapped to :class:`.Table` rows.
+
+        .. code-block:: python3
+
+            sess.select(func.count(Order.id), Order.user_id).group_by(Order.user_id)
+
+        :param columns: The :class:`.Column` or :class:`.Function` objects to select.
+        :return: This query.
+        """
+        if not columns:
+            raise TypeError("Must provide at least one column to select")
+
+        if self.table is None:
+            self.set_table(next((column.table for column in columns
+                                 if column.table is not None), None))
+
+        for column in columns:
+            if column.table is not None and column.table is not self.table:
+                raise ValueError("Column {} is not on the table {}".format(column, self.table))
+
+        if self.result_mode is None \
+                and any(isinstance(column, md_functions.Function) for column in columns):
+            self.result_mode = "tuples"
+
+        self.selected_columns = list(columns)
+        return self
+
+    def options(self, *options: 'LoadOption') -> 'SelectQuery':
+        """
+        Changes how relationships are loaded in this query.
+
+        .. code-block:: python3
+
+            query = sess.select(User).options(noload(User.items), innerjoin(User.profile))
+
+        See :func:`.joinedload`, :func:`.innerjoin`, :func:`.selectload` and :func:`.noload`.
+
+        :param options: The :class:`.LoadOption` objects to use.
+        :return: This query.
+        """
+        for option in options:
+            self.load_options[option.relationship] = option
+
+        return self
+
+    def cache(self, ttl: float = None) -> 'SelectQuery':
+        """
+        Allows the results of this query to be stored in, and returned from, the
+        :class:`.QueryCache` of the database interface.
+
+        .. code-block:: python3
+
+            settings = await sess.select(Setting).cache(ttl=300).all()
+
+        This does nothing if the database interface has no cache.
+
+        :param ttl: The number of seconds to cache the results for. Defaults to the \
+            :attr:`.QueryCache.default_ttl` of the cache.
+        :return: This query.
+        """
+        self.cached = True
+        self.cache_ttl = ttl
+        return self
+
+    def get_cache_tables(self) -> 'typing.Set[str]':
+        """
+        :return: The names of every table this query selects from.
+        """
+        tables = {self.table.__tablename__}
+        if not self.selected_columns and self.result_mode is None:
+            tables.update(relationship.foreign_table.__tablename__
+                          for relationship in self._iter_joined_relationships())
+
+        return tables
+
+    def group_by(self, *columns: 'md_column.Column') -> 'SelectQuery':
+        """
+        Adds a GROUP BY clause to this query. This is usually used with aggregate functions.
+
+        .. code-block:: python3
+
+            sess.select(func.sum(Order.total), Order.user_id).group_by(Order.user_id)
+
+        :param columns: The :class:`.Column` objects to group by.
+        :return: This query.
+        """
+        self.group_columns.extend(columns)
+        return self
+
+    def having(self, *conditions: 'md_operators.BaseOperator') -> 'SelectQuery':
+        """
+        Adds a HAVING clause to this query, which filters the rows after grouping.
+
+        .. code-block:: python3
+
+            query.group_by(Order.user_id).having(func.count(Order.id) > 5)
+
+        :param conditions: The conditions to use for this HAVING clause.
+        :return: This query.
+        """
+        self.having_conditions.extend(conditions)
+        return self
+
+    def tuples(self) -> 'SelectQuery':
+        """
+        Makes this query return a plain tuple for each row, instead of a :class:`.Table` row.
+
+        :return: This query.
+        """
+        self.result_mode = "tuples"
+        return self
+
+    def dicts(self) -> 'SelectQuery':
+        """
+        Makes this query return a dict of column name -> value for each row, instead of a
+        :class:`.Table` row.
+
+        :return: This query.
+        """
+        self.result_mode = "dicts"
+        return self
+
+    def scalars(self) -> 'SelectQuery':
+        """
+        Makes this query return the first selected column of each row, instead of a
+        :class:`.Table` row.
+
+        .. code-block:: python3
+
+            ids = await (await sess.select(User.id).scalars().all()).flatten()
+
+        :return: This query.
+        """
+        self.result_mode = "scalars"
+        return self
+
     def where(self, *conditions: 'md_operators.BaseOperator') -> 'SelectQuery':
         """
         Adds a WHERE clause to the query. This is a shortcut for :meth:`.SelectQuery.add_condition`.
@@ -440,12 +1356,20 @@ class SelectQuery(BaseQuery):
         The argument provided can either be a :class:`.Column`, or a :class:`.Sorter` which is
         provided by :meth:`.Column.asc` / :meth:`.Column.desc`. By default, ``asc`` is used when
         passing a column.
+
+        Multiple sorters can be passed to sort each column in a different order:
+
+        .. code-block:: python3
+
+            sess.select(User).order_by(User.level.desc(), User.id.asc())
         """
         if not col:
             raise TypeError("Must provide at least one item to order with")
 
         if len(col) == 1 and isinstance(col[0], md_operators.Sorter):
             self.orderer = col[0]
+        elif all(isinstance(item, md_operators.Sorter) for item in col):
+            self.orderer = md_operators.MultiSorter(*col)
         else:
             if sort_order == "asc":
                 self.orderer = md_operators.AscSorter(*col)
@@ -456,6 +1380,114 @@ class SelectQuery(BaseQuery):
 
         return self
 
+    def seek_after(self, *values) -> 'SelectQuery':
+        """
+        Only return rows that come after the specified row in the current ordering. This is known as
+        keyset (or "seek") pagination, and unlike :meth:`.SelectQuery.offset` it does not get slower
+        the further into the results you go.
+
+        .. code-block:: python3
+
+            query = sess.select(User).order_by(User.name, User.id).limit(50)
+            # either pass the last row from the previous page
+            query.seek_after(last_user)
+            # or the raw values of the ordered columns
+            query.seek_after("bob", 42)
+
+        :meth:`.SelectQuery.order_by` must be called before this, and the ordering should be unique
+        (i.e. end with the primary key) to avoid skipping rows. NULL values are seeked past in the
+        order the database sorts them in, so nullable columns can be used in the ordering.
+
+        :param values: Either a :class:`.Table` row, or a value for each column in the ordering.
+        :return: This query.
+        """
+        if self.orderer is None:
+            raise RuntimeError("Cannot seek without an ordering - call order_by() first")
+
+        sort_keys = self.orderer.sort_keys
+        if len(values) == 1 and isinstance(values[0], md_table.Table):
+            row = values[0]
+            values = [row.get_column_value(col) for col, _ in sort_keys]
+        elif len(values) == 1 and isinstance(values[0], (list, tuple)):
+            values = values[0]
+
+        self.add_condition(md_operators.Seek(
+            sort_keys, values, nulls_high=self.session.bind.dialect.has_high_nulls
+        ))
+        return self
+
+    async def paginate(self, by: 'typing.Iterable[typing.Union[md_column.Column, '
+                                 'md_operators.Sorter]]' = None,
+                       page_size: int = 50, cursor: str = None) -> 'Page':
+        """
+        Fetches a single page of results from this query, using keyset pagination.
+
+        .. code-block:: python3
+
+            page = await sess.select(User).paginate(by=(User.name,), page_size=100)
+            while True:
+                for user in page.rows:
+                    ...
+
+                if page.next_cursor is None:
+                    break
+
+                page = await sess.select(User).paginate(by=(User.name,), page_size=100,
+                                                        cursor=page.next_cursor)
+
+        The primary key of the table is automatically added to the end of the ordering, so that
+        rows with identical sort values are never skipped or repeated. With :meth:`.tuples`,
+        :meth:`.dicts` or :meth:`.scalars`, every sort key, including the primary key, must be
+        selected.
+
+        :param by: The columns or sorters to paginate by. If this is None, the current ordering of \
+            the query will be used.
+        :param page_size: The maximum number of rows to return in the page.
+        :param cursor: The :attr:`.Page.next_cursor` token returned from the previous page, or \
+            None to fetch the first page.
+        :return: A :class:`.Page` of results.
+        """
+        if by is not None:
+            self.order_by(*by)
+        elif self.orderer is None:
+            raise RuntimeError("Cannot paginate without an ordering - pass by or call order_by()")
+
+        # ensure the ordering is unique by appending any missing primary key columns
+        sort_keys = self.orderer.sort_keys
+        ordered_columns = [col for col, _ in sort_keys]
+        sorter_type = md_operators.AscSorter if sort_keys[-1][1] == "ASC" \
+            else md_operators.DescSorter
+        missing = [col for col in self.table.primary_key.columns
+                   if not any(col is other for other in ordered_columns)]
+        if missing:
+            sorters = getattr(self.orderer, "sorters", [self.orderer])
+            self.orderer = md_operators.MultiSorter(*sorters, sorter_type(*missing))
+            sort_keys = self.orderer.sort_keys
+
+        # the next cursor is made from the sort keys of the last row, so they must be in the rows
+        for col, _ in sort_keys:
+            if self.result_mode is not None:
+                self._get_result_position(col)
+            elif not isinstance(col, md_column.Column):
+                raise ValueError("Cannot paginate by {} without selecting it with tuples()"
+                                 .format(col.quoted_fullname))
+
+        if cursor is not None:
+            self.seek_after(Page.decode_cursor(cursor))
+
+        # fetch one more row than needed, to check if there's another page after this one
+        self.limit(page_size + 1)
+        rows = await ResultGenerator(self).flatten()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = Page.encode_cursor([self.get_result_value(last, col)
+                                              for col, _ in sort_keys])
+
+        return Page(rows, next_cursor)
+
     # "manual" methods
     def set_table(self, tbl) -> 'SelectQuery':
         """
@@ -675,6 +1707,20 @@ class BulkQuery(BaseQuery, metaclass=abc.ABCMeta):
         """
         self.conditions.append(condition)
 
+    async def explain(self, *, analyze: bool = False) -> 'md_explain.QueryPlan':
+        """
+        Explains how the database would run this query.
+
+        :param analyze: If the query should be run, so that the plan includes the actual rows of \
+            each step. This **modifies the rows**, as if the query was run normally.
+        :return: The :class:`.QueryPlan` of this query.
+        """
+        if analyze:
+            self.session._mark_written(self._table.__tablename__)
+
+        sql, params = self.generate_sql()
+        return await self.session.explain(sql, params, analyze=analyze)
+
 
 class BulkUpdateQuery(BulkQuery):
     """
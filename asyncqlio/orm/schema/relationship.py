@@ -156,7 +156,8 @@ class Relationship(object):
                  right: 'typing.Union[md_column.Column, str]', *,
                  load: str = "select", use_iter: bool = True,
                  back_ref: str = None,
-                 table_alias: str = None):
+                 table_alias: str = None,
+                 innerjoin: bool = False):
         """
         :param left: The left-hand column (the Column on this table) in this relationship.
 
@@ -183,6 +184,12 @@ class Relationship(object):
 
             This will rename the joined table to allow selecting specific rows in tables with
             multiple relationships to the same table.
+
+        :param innerjoin: Should this relationship be loaded with an INNER JOIN?
+
+            By default, joined relationships use a LEFT OUTER JOIN, so that rows without any
+            related rows are still returned. Relationships that always have a related row can use
+            an INNER JOIN instead, which the database can usually plan more efficiently.
         """
         #: The left column for this relationship.
         self.left_column = left
@@ -205,6 +212,9 @@ class Relationship(object):
         #: The back-reference for this relationship.
         self.back_reference = back_ref
 
+        #: The type of join used to load this relationship.
+        self.join_type = "INNER" if innerjoin else "LEFT OUTER"
+
         self._table_alias = table_alias
 
         self._alias_set = table_alias is not None
@@ -241,15 +251,17 @@ class Relationship(object):
             f_name = "<unknown>"
         return "<Relationship '{}' <-> '{}'>".format(o_name, f_name)
 
-    def _get_join_query(self, parent: 'Relationship') -> str:
+    def _get_join_query(self, parent: 'Relationship', join_type: str = None) -> str:
         """
         Gets the join part of a SELECT query for this relationship.
 
-
+        :param parent: The relationship this relationship is being joined through, or None if it \
+            is being joined directly from the queried table.
+        :param join_type: The type of join to use. If this is None, :attr:`.join_type` is used.
         """
-        # TODO: Maybe customize join types?
         fmt = io.StringIO()
-        fmt.write("LEFT OUTER JOIN ")
+        fmt.write(join_type or self.join_type)
+        fmt.write(" JOIN ")
         fmt.write(self.foreign_table.alias_table.__quoted_name__)
         fmt.write(" ")
         fmt.write(self.foreign_table.__quoted_name__)
@@ -313,19 +325,27 @@ class Relationship(object):
         """
         return self.our_column, self.foreign_column
 
-    def get_instance(self, row: 'md_table.Table', session):
+    def get_instance(self, row: 'md_table.Table', session, load_type: str = None):
         """
         Gets a new "relationship" instance.
+
+        :param row: The :class:`.Table` row this relationship is being loaded from.
+        :param session: The :class:`.Session` to load with.
+        :param load_type: The load type to use, overriding :attr:`.load_type`.
         """
-        if self.load_type == "select":
+        if load_type is None:
+            load_type = self.load_type
+
+        if load_type == "select":
             return SelectLoadedRelationship(self, row, session or row._session)
-        elif self.load_type == "joined":
+        # noload relationships act like an empty joined relationship
+        elif load_type in ("joined", "noload"):
             if self.use_iter is False:
                 return JoinLoadedOTORelationship(self, row, session or row._session)
             else:
                 return JoinLoadedOTMRelationship(self, row, session or row._session)
         else:
-            raise NotImplementedError("Unknown load type {}".format(self.load_type))
+            raise NotImplementedError("Unknown load type {}".format(load_type))
 
     def _write_column(self, col: 'typing.Union[str, md_column.Column]', fp=None):
         schema = fp or io.StringIO()
@@ -355,6 +375,8 @@ class Relationship(object):
             schema.write(', load="')
             schema.write(self.load_type)
             schema.write('"')
+        if self.join_type == "INNER":
+            schema.write(", innerjoin=True")
         if self.back_reference is not None:
             schema.write(', back_ref="')
             schema.write(self.back_reference)
@@ -505,9 +527,15 @@ class SelectLoadedRelationship(BaseLoadedRelationship):
         """
         columns = self.relationship.join_columns
         query = md_query.SelectQuery(self.row._session)
-        query.set_table(self.relationship.foreign_table)
+        foreign_table = self.relationship.foreign_table
+        # the alias is only used when joining, so select from the real table
+        if isinstance(foreign_table, md_table.AliasedTable):
+            foreign_table = foreign_table.alias_table
+
+        query.set_table(foreign_table)
         # owner column == non owner column
         query.add_condition(columns[1] == self.row.get_column_value(columns[0]))
+        query.loading_relationship = self.relationship
         return query
 
     async def first(self):
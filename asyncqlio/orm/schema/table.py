@@ -434,6 +434,10 @@ class Table(metaclass=TableMeta, register=False):
         #: A mapping of relationship -> rows for this row.
         self._relationship_mapping = collections.defaultdict(lambda: [])
 
+        #: A mapping of relationship -> load type, for relationships loaded differently by the
+        #: query this row came from.
+        self._load_overrides = {}
+
         #: A mapping of Column -> Current value for this row.
         self._values = {}
 
@@ -995,7 +999,8 @@ class Table(metaclass=TableMeta, register=False):
         except StopIteration:
             raise ValueError("No such relationship '{}'".format(relation_name))
 
-        rel = relation.get_instance(self, self._session)
+        rel = relation.get_instance(self, self._session,
+                                    load_type=self._load_overrides.get(relation))
         rel.set_rows(self._relationship_mapping[relation])
         rel._update_sub_relationships(self._relationship_mapping)
         return rel
@@ -1071,6 +1076,7 @@ class Table(metaclass=TableMeta, register=False):
                 continue
 
             row = relationship.foreign_table._internal_from_row(subdict, existed=True)
+            row._load_overrides = self._load_overrides
             # ensure the row doesn't already exist with the PK
             try:
                 next(filter(lambda r: r.primary_key == row.primary_key,
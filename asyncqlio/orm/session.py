@@ -2,19 +2,24 @@
 Classes for session objects.
 """
 
+import collections
 import enum
 import functools
 import io
 import logging
+import time
 import typing
 import warnings
 
-from asyncqlio import db as md_db
+from asyncqlio import db as md_db, explain as md_explain
 from asyncqlio.backends.base import BaseResultSet, BaseTransaction
-from asyncqlio.exc import DatabaseException
+from asyncqlio.cache import CachedResultSet, PrefetchedResultSet, make_key
+from asyncqlio.events import SessionStats
+from asyncqlio.exc import DatabaseException, NPlusOneWarning, UnsupportedOperationException
 from asyncqlio.orm import inspection as md_inspection, query as md_query
 from asyncqlio.orm.schema import table as md_table
 from asyncqlio.sentinels import NO_DEFAULT, NO_VALUE
+from asyncqlio.utils import find_caller, fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +60,16 @@ class SessionBase(object):
         #: The transaction is used for making queries and inserts, etc.
         self.transaction = None  # type: BaseTransaction
 
+        #: The time spent acquiring a connection for this session, reported by the first query
+        #: event.
+        self._pool_wait = 0.0
+
+        #: The :class:`.SessionStats` for this session, or None if stats aren't collected.
+        self.stats = None  # type: SessionStats
+
+        #: The :func:`time.perf_counter` time this session was started at.
+        self._started_at = None  # type: float
+
     async def __aenter__(self) -> 'SessionBase':
         await self.start()
         return self
@@ -93,12 +108,24 @@ class SessionBase(object):
             raise RuntimeError("Session must not be ready or closed")
 
         logger.debug("Acquiring new transaction, and beginning")
-        self.transaction = self.bind.get_transaction()
-        await self.transaction.begin()
+        self._started_at = time.perf_counter()
+        self.transaction = self._get_transaction()
+        if self.bind.events.active or self.stats is not None:
+            start = time.perf_counter()
+            await self.transaction.begin()
+            self._pool_wait = time.perf_counter() - start
+        else:
+            await self.transaction.begin()
 
         self._state = SessionState.READY
         return self
 
+    def _get_transaction(self) -> BaseTransaction:
+        """
+        Gets the transaction this session will use.
+        """
+        return self.bind.get_transaction()
+
     @enforce_open
     async def commit(self) -> 'SessionBase':
         """
@@ -118,7 +145,7 @@ class SessionBase(object):
 
         :param checkpoint: The checkpoint to roll back to, if applicable.
         """
-        logger.debug("Rolling back session to checkpoint {}".format(checkpoint))
+        logger.debug("Rolling back session to checkpoint %s", checkpoint)
         await self.transaction.rollback(checkpoint=checkpoint)
         return self
 
@@ -137,6 +164,46 @@ class SessionBase(object):
         self._state = SessionState.CLOSED
         del self.transaction
 
+        if self.bind.metrics is not None:
+            self.bind.metrics.observe_transaction(self.bind, time.perf_counter() - self._started_at,
+                                                  has_error=has_error)
+
+    async def _run_query(self, run: typing.Callable, sql: str, params=None):
+        """
+        Runs a query with a method of a transaction, dispatching events if there are any
+        listeners.
+
+        :param run: The method to run the query with, e.g. :meth:`.BaseTransaction.cursor`.
+        :param sql: The SQL to execute.
+        :param params: The parameters to use inside the query.
+        """
+        events = self.bind.events
+        if not events.active and self.stats is None:
+            return await run(sql, params)
+
+        event = events.create_event(self, sql, params)
+        event.pool_wait, self._pool_wait = self._pool_wait, 0.0
+        if self.stats is not None:
+            self.stats.record(event)
+
+        events.dispatch("before_execute", event)
+
+        start = time.perf_counter()
+        try:
+            result = await run(sql, params)
+        except Exception as e:
+            event.execute_time = time.perf_counter() - start
+            event.error = e
+            events.dispatch("on_error", event)
+            raise
+
+        event.execute_time = time.perf_counter() - start
+        if isinstance(result, BaseResultSet):
+            result.event = event
+
+        events.dispatch("after_execute", event)
+        return result
+
     # sql methods
     # generic methods for wrapping the transaction
     @enforce_open
@@ -144,10 +211,7 @@ class SessionBase(object):
         """
         Fetches a single row.
         """
-        cur = await self.transaction.cursor(sql, params)
-        next = await cur.fetch_row()
-        await cur.close()
-        return next
+        return await self._run_query(self.transaction.fetch_one, sql, params)
 
     @enforce_open
     async def execute(self, sql: str, params: typing.Union[typing.Mapping[str, typing.Any],
@@ -160,7 +224,7 @@ class SessionBase(object):
         :param sql: The SQL to execute.
         :param params: The parameters to use inside the query.
         """
-        return await self.transaction.execute(sql, params)
+        return await self._run_query(self.transaction.execute, sql, params)
 
     @enforce_open
     async def cursor(self, sql: str,
@@ -172,7 +236,7 @@ class SessionBase(object):
         :param sql: The SQL to execute.
         :param params: The parameters to use inside the query.
         """
-        return await self.transaction.cursor(sql, params)
+        return await self._run_query(self.transaction.cursor, sql, params)
 
 
 class Session(SessionBase):
@@ -189,6 +253,139 @@ class Session(SessionBase):
         sess = db.get_session()
     """
 
+    def __init__(self, bind: 'md_db.DatabaseInterface', *, readonly: bool = False,
+                 autocommit: bool = False, snapshot: bool = False, collect_stats: bool = False,
+                 n_plus_one_threshold: int = None, **kwargs):
+        """
+        :param bind: The :class:`.DatabaseInterface` instance we are bound to.
+        :param readonly: If this session is read-only. Read-only sessions run on a replica of the \
+            database if there is one, and can't insert, update or delete rows. Other sessions \
+            always run on the primary database.
+        :param autocommit: If this read-only session should run its queries outside of a \
+            transaction. This skips the BEGIN and COMMIT round trips, which is useful for sessions \
+            that only run a single query.
+        :param snapshot: If every query in this read-only session should see the same snapshot of \
+            the database.
+        :param collect_stats: If this session should collect :class:`.SessionStats` about the \
+            queries it runs.
+        :param n_plus_one_threshold: The number of times the same lazily loaded relationship query \
+            can be run before a :class:`.NPlusOneWarning` is warned. This is meant for use in \
+            development and tests.
+        """
+        super().__init__(bind, **kwargs)
+
+        if (autocommit or snapshot) and not readonly:
+            raise ValueError("Only read-only sessions can use autocommit or snapshots")
+
+        if snapshot and not bind.dialect.has_snapshots:
+            raise UnsupportedOperationException("This database doesn't support snapshots")
+
+        #: If this session is read-only.
+        self.readonly = readonly
+
+        #: If this session runs its queries outside of a transaction.
+        self.autocommit = autocommit
+
+        #: If this session reads from a consistent snapshot.
+        self.snapshot = snapshot
+
+        #: The names of the tables that have been written to in the current transaction.
+        self._written_tables = set()
+
+        #: If raw SQL, which may have written to the database, was run in the current transaction.
+        self._ran_raw_sql = False
+
+        if collect_stats:
+            self.stats = SessionStats()
+
+        #: The number of times a lazily loaded relationship query can be run before warning.
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+        #: A counter of shape -> the number of times a relationship query with that shape was run.
+        self._relationship_loads = collections.Counter()
+
+    def _get_transaction(self) -> BaseTransaction:
+        if self.readonly:
+            return self.bind.get_replica_transaction(autocommit=self.autocommit, readonly=True,
+                                                     snapshot=self.snapshot)
+
+        return super()._get_transaction()
+
+    @enforce_open
+    async def commit(self) -> 'Session':
+        await super().commit()
+        if self._written_tables or self._ran_raw_sql:
+            # replicas may not have seen the write yet
+            self.bind._record_write()
+
+        # other sessions may have cached the old rows before the commit was visible
+        self._invalidate_written()
+        self._ran_raw_sql = False
+        return self
+
+    @enforce_open
+    async def rollback(self, checkpoint: str = None) -> 'Session':
+        await super().rollback(checkpoint=checkpoint)
+        if checkpoint is None:
+            self._written_tables.clear()
+            self._ran_raw_sql = False
+
+        return self
+
+    @enforce_open
+    async def close(self, *, has_error: bool = False):
+        transaction = self.transaction
+        await super().close(has_error=has_error)
+        if self.readonly:
+            self.bind.release_transaction(transaction)
+
+    async def execute(self, sql: str, params: typing.Union[typing.Mapping[str, typing.Any],
+                                                           typing.Iterable[typing.Any]] = None):
+        """
+        Executes SQL inside the current session.
+
+        This is part of the **low-level API.**
+
+        :param sql: The SQL to execute.
+        :param params: The parameters to use inside the query.
+        """
+        self._ran_raw_sql = True
+        return await super().execute(sql, params)
+
+    async def cursor(self, sql: str,
+                     params: typing.Union[typing.Mapping[str, typing.Any],
+                                          typing.Iterable[typing.Any]] = None) -> BaseResultSet:
+        """
+        Executes SQL inside the current session, and returns a new :class:`.BaseResultSet.`
+
+        :param sql: The SQL to execute.
+        :param params: The parameters to use inside the query.
+        """
+        self._ran_raw_sql = True
+        return await super().cursor(sql, params)
+
+    def _mark_written(self, *tables: str):
+        """
+        Marks tables as written to in this session, invalidating any cached results for them.
+
+        :param tables: The names of the tables that were written to.
+        """
+        if self.readonly:
+            raise RuntimeError("Cannot write to the database in a read-only session")
+
+        self._written_tables.update(tables)
+        if self.bind.cache is not None:
+            self.bind.cache.invalidate(*tables)
+
+    def _invalidate_written(self):
+        """
+        Invalidates the cached results for every table written to in this session.
+        """
+        if self.bind.cache is not None and self._written_tables:
+            self.bind.cache.invalidate(*self._written_tables)
+
+        self._written_tables.clear()
+
     # Query builders
     @property
     def select(self) -> 'md_query.SelectQuery':
@@ -247,7 +444,8 @@ class Session(SessionBase):
             base.write(";")
 
         val = base.getvalue()
-        return await self.execute(val, {})
+        self._mark_written(table.__tablename__)
+        return await self._run_query(self.transaction.execute, val, {})
 
     @enforce_open
     async def insert_now(self, row: 'md_table.Table') -> typing.Any:
@@ -306,7 +504,8 @@ class Session(SessionBase):
         await self.run_delete_query(q)
         return row
 
-    async def run_select_query(self, query: 'md_query.SelectQuery'):
+    async def run_select_query(self, query: 'md_query.SelectQuery', *, share: bool = True,
+                               fetch: str = "chunk"):
         """
         Executes a select query.
 
@@ -318,15 +517,192 @@ class Session(SessionBase):
             Use :class:`.SelectQuery.first` or :class:`.SelectQuery.all`.
 
         :param query: The :class:`.SelectQuery` to use.
+        :param share: If the query can be coalesced with identical queries. See \
+            :meth:`.Session.get_select_cursor`.
+        :param fetch: How the rows are fetched. See :meth:`.Session.read_cursor`.
         :return: A :class:`._ResultGenerator` for this query.
         """
         gen = md_query.ResultGenerator(query)
-        sql, params = query.generate_sql()
-        cursor = await self.cursor(sql, params)
         # set the cursor on the result generator
-        gen._results = cursor
+        gen._results = await self.get_select_cursor(query, share=share, fetch=fetch)
         return gen
 
+    @enforce_open
+    async def read_cursor(self, sql: str,
+                          params: typing.Union[typing.Mapping[str, typing.Any],
+                                               typing.Iterable[typing.Any]] = None,
+                          *, fetch: str = "chunk") -> BaseResultSet:
+        """
+        Executes read-only SQL inside the current session, and returns a new
+        :class:`.BaseResultSet`.
+
+        The first rows are fetched as the SQL is executed, with
+        :meth:`.BaseTransaction.fetch_chunk`. If only the first row or every row will be read,
+        they can be fetched with :meth:`.BaseTransaction.fetch_one` or
+        :meth:`.BaseTransaction.fetch_all` instead, which don't leave a cursor open.
+
+        :param sql: The SQL to execute.
+        :param params: The parameters to use inside the query.
+        :param fetch: ``"chunk"`` to fetch the first rows, ``"one"`` to only fetch the first \
+            row, or ``"all"`` to fetch every row.
+        """
+        if fetch == "chunk":
+            return await self._run_query(self.transaction.fetch_chunk, sql, params)
+
+        if fetch not in ("one", "all"):
+            raise ValueError("Unknown fetch mode {!r}".format(fetch))
+
+        async def _fetch(sql: str, params):
+            if fetch == "one":
+                row = await self.transaction.fetch_one(sql, params)
+                rows = [row] if row is not None else []
+            else:
+                rows = await self.transaction.fetch_all(sql, params)
+
+            # some drivers only know the keys of a result once it has rows
+            return CachedResultSet(rows, list(rows[0].keys()) if rows else [], copy=False)
+
+        return await self._run_query(_fetch, sql, params)
+
+    @enforce_open
+    async def explain(self, sql: str,
+                      params: typing.Union[typing.Mapping[str, typing.Any],
+                                           typing.Iterable[typing.Any]] = None,
+                      *, analyze: bool = False) -> 'md_explain.QueryPlan':
+        """
+        Explains how the database would run SQL, using the EXPLAIN syntax of the dialect.
+
+        .. warning::
+
+            If ``analyze`` is True, the SQL is actually run inside this session.
+
+        :param sql: The SQL to explain.
+        :param params: The parameters to use inside the query.
+        :param analyze: If the SQL should be run, so that the plan includes the actual rows.
+        :return: The :class:`.QueryPlan` of the SQL.
+        """
+        dialect = self.bind.dialect
+        explain_sql = dialect.get_explain_sql(sql, analyze=analyze)
+        rows = await self._run_query(self.transaction.fetch_all, explain_sql, params)
+        return dialect.transform_explain_rows(rows, analyze=analyze)
+
+    def _check_n_plus_one(self, query: 'md_query.SelectQuery', sql: str):
+        """
+        Counts a lazily loaded relationship query, and warns once it has been run more than the
+        N+1 threshold.
+        """
+        shape = fingerprint(sql)
+        self._relationship_loads[shape] += 1
+        count = self._relationship_loads[shape]
+        if count == self.n_plus_one_threshold + 1:
+            warnings.warn("Relationship {} was lazily loaded {} times in one session; consider "
+                          "join-loading it instead".format(query.loading_relationship, count),
+                          NPlusOneWarning, stacklevel=find_caller()[1])
+
+    async def get_select_cursor(self, query: 'md_query.SelectQuery', *,
+                                share: bool = True, fetch: str = "chunk") -> BaseResultSet:
+        """
+        Gets the :class:`.BaseResultSet` for a select query. If the query can be cached, this will
+        return the cached results, or store the results in the cache. If the database interface
+        coalesces identical queries, this may return the rows of an identical query that another
+        session is already running.
+
+        Sessions that read from a snapshot never use the cache, or share their queries.
+
+        Cached results, and results shared from another session's query, have no
+        :class:`.QueryEvent`, so no events are dispatched when their rows are fetched.
+
+        :param query: The :class:`.SelectQuery` to use.
+        :param share: If the query can be coalesced with identical queries. This should be False \
+            if only some of the rows will be read, or the rows are read in batches.
+        :param fetch: How the rows are fetched if the query isn't cached or shared. See \
+            :meth:`.Session.read_cursor`.
+        :return: A :class:`.BaseResultSet` for the rows of the query.
+        """
+        sql, params = query.generate_sql()
+        if self.n_plus_one_threshold is not None and query.loading_relationship is not None:
+            self._check_n_plus_one(query, sql)
+
+        cache = self.bind.cache if query.cached else None
+        flight = self.bind.singleflight
+        # our own uncommitted writes must always be visible to us, and must never be cached for
+        # other sessions; raw SQL may have written to any table. Snapshots must only see the rows
+        # of their own snapshot.
+        tables = query.get_cache_tables() if cache is not None else set()
+        if cache is not None and (self._ran_raw_sql or self.snapshot
+                                  or not tables.isdisjoint(self._written_tables)):
+            cache = None
+
+        # queries in a transaction that has written, or that reads from its own snapshot, can't
+        # be shared with other sessions
+        if flight is not None and (self._written_tables or self._ran_raw_sql or self.snapshot
+                                   or not share):
+            flight = None
+
+        if cache is None and flight is None:
+            return await self.read_cursor(sql, params, fetch=fetch)
+
+        key = make_key(sql, params)
+        if key is None:
+            return await self.read_cursor(sql, params, fetch=fetch)
+
+        if cache is not None:
+            entry = cache.get(key)
+            if entry is not None:
+                return CachedResultSet(entry.rows, entry.keys)
+
+        # cached results must be complete, but results that are only coalesced are streamed once
+        # they're too large to share
+        max_rows = flight.max_rows if cache is None else None
+        streamed = None
+        event = None
+
+        async def _fetch():
+            nonlocal streamed, event
+            cursor = await self.read_cursor(sql, params)
+            # the rows are read here, so the time spent fetching them is added to the event
+            event = cursor.event
+            start = time.perf_counter()
+            if max_rows is not None:
+                rows = await cursor.fetch_many(max_rows + 1)
+                if len(rows) > max_rows:
+                    streamed = PrefetchedResultSet(rows, cursor)
+                    streamed.event = event
+                    if event is not None:
+                        event.fetch_time += time.perf_counter() - start
+                    return None
+
+                await cursor.close()
+            else:
+                async with cursor:
+                    rows = await cursor.flatten()
+
+            if event is not None:
+                event.fetch_time += time.perf_counter() - start
+
+            # some drivers only know the keys of a result once it has rows
+            keys = list(rows[0].keys()) if rows else []
+            if cache is not None:
+                cache.put(key, rows, keys, tables, ttl=query.cache_ttl)
+
+            return rows, keys
+
+        if flight is not None:
+            # replicas may lag behind the primary, so only queries on the same database are shared
+            result = await flight.do(key + (id(self.transaction.connector),), _fetch)
+        else:
+            result = await _fetch()
+
+        if streamed is not None:
+            return streamed
+
+        rows, keys = result
+        results = CachedResultSet(rows, keys)
+        # only the session that ran the query has an event; cache hits and shared results didn't
+        # run a query
+        results.event = event
+        return results
+
     async def run_insert_query(self, query: 'md_query.InsertQuery'):
         """
         Executes an insert query.
@@ -336,6 +712,7 @@ class Session(SessionBase):
         """
         queries = query.generate_sql()
         results = []
+        self._mark_written(*{row.table.__tablename__ for row in query.rows_to_insert})
 
         for row, (sql, params) in zip(query.rows_to_insert, queries):
             if md_inspection._get_mangled(row, "deleted"):
@@ -343,7 +720,7 @@ class Session(SessionBase):
 
             # this needs to be a cursor
             # since postgres uses RETURNING
-            cur = await self.cursor(sql, params)
+            cur = await self._run_query(self.transaction.cursor, sql, params)
             # some drivers don't execute until this is done
             # (asyncpg, apparently)
             # so always fetch a row now
@@ -363,7 +740,7 @@ class Session(SessionBase):
                 if sum(1 for x in row.table.iter_columns() if x.autoincrement) == 1:
                     # we can load the last value easily
                     lquery = "SELECT {};".format(self.bind.dialect.lastval_method)
-                    cursor = await self.cursor(lquery)
+                    cursor = await self._run_query(self.transaction.cursor, lquery)
                     async with cursor:
                         lval_row = await cursor.fetch_row()
                         # there should only be one value here
@@ -393,6 +770,7 @@ class Session(SessionBase):
         :param query: The :class:`.RowUpdateQuery` or :class:`.BulkUpdateQuery` to execute.
         """
         if isinstance(query, md_query.RowUpdateQuery):
+            self._mark_written(*{row.table.__tablename__ for row in query.rows_to_update})
             for row, (sql, params) in zip(query.rows_to_update, query.generate_sql()):
                 if md_inspection._get_mangled(row, "deleted"):
                     raise RuntimeError("Row '{}' is marked as deleted".format(row))
@@ -400,12 +778,13 @@ class Session(SessionBase):
                 if sql is None and params is None:
                     continue
 
-                await self.execute(sql, params)
+                await self._run_query(self.transaction.execute, sql, params)
                 # copy the history of the row
-                row._previous_values = row._values
+                row._previous_values = row._values.copy()
         elif isinstance(query, md_query.BulkUpdateQuery):
+            self._mark_written(query._table.__tablename__)
             sql, params = query.generate_sql()
-            await self.execute(sql, params)
+            await self._run_query(self.transaction.execute, sql, params)
         else:
             raise TypeError("Type {0.__class__.__name__} is not an update query".format(query))
 
@@ -418,6 +797,7 @@ class Session(SessionBase):
         :param query: The :class:`.RowDeleteQuery` or :class:`.BulkDeleteQuery` to execute.
         """
         if isinstance(query, md_query.RowDeleteQuery):
+            self._mark_written(*{row.table.__tablename__ for row in query.rows_to_delete})
             for row, (sql, params) in zip(query.rows_to_delete, query.generate_sql()):
                 if md_inspection._get_mangled(row, "deleted"):
                     raise RuntimeError("Row '{}' is already marked as deleted".format(row))
@@ -425,11 +805,12 @@ class Session(SessionBase):
                 if sql is None and params is None:
                     continue
 
-                await self.execute(sql, params)
+                await self._run_query(self.transaction.execute, sql, params)
                 md_inspection._set_mangled(row, "deleted", True)
         elif isinstance(query, md_query.BulkDeleteQuery):
+            self._mark_written(query._table.__tablename__)
             sql, params = query.generate_sql()
-            await self.execute(sql, params)
+            await self._run_query(self.transaction.execute, sql, params)
         else:
             raise TypeError("Type {0.__class__.__name__} is not a delete query".format(query))
 
@@ -0,0 +1,80 @@
+"""
+Load balancers used to route read queries to replica databases.
+"""
+import abc
+import collections
+import itertools
+import typing
+
+from asyncqlio.backends.base import BaseConnector
+
+
+class BaseBalancer(metaclass=abc.ABCMeta):
+    """
+    The base class for a load balancer, which chooses which replica a read-only transaction should
+    use.
+
+    Children classes must implement:
+
+        - :meth:`.BaseBalancer.choose`
+
+    The balancer keeps track of the number of transactions that are open on each replica, which is
+    available in :attr:`.BaseBalancer.outstanding`.
+    """
+
+    def __init__(self):
+        #: A mapping of connector -> the number of transactions open on it.
+        self.outstanding = collections.Counter()  # type: typing.Dict[BaseConnector, int]
+
+    @abc.abstractmethod
+    def choose(self, connectors: 'typing.Sequence[BaseConnector]') -> BaseConnector:
+        """
+        Chooses the connector to use for a new transaction.
+
+        :param connectors: The replica connectors to choose from.
+        :return: The chosen :class:`.BaseConnector`.
+        """
+
+    def acquire(self, connectors: 'typing.Sequence[BaseConnector]') -> BaseConnector:
+        """
+        Chooses a connector, and marks a transaction as open on it.
+
+        :param connectors: The replica connectors to choose from.
+        :return: The chosen :class:`.BaseConnector`.
+        """
+        connector = self.choose(connectors)
+        self.outstanding[connector] += 1
+        return connector
+
+    def release(self, connector: BaseConnector):
+        """
+        Marks a transaction on a connector as finished.
+
+        :param connector: The connector the transaction was using.
+        """
+        self.outstanding[connector] -= 1
+        if self.outstanding[connector] <= 0:
+            del self.outstanding[connector]
+
+
+class RoundRobinBalancer(BaseBalancer):
+    """
+    A balancer that uses each replica in turn.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._counter = itertools.count()
+
+    def choose(self, connectors: 'typing.Sequence[BaseConnector]') -> BaseConnector:
+        return connectors[next(self._counter) % len(connectors)]
+
+
+class LeastOutstandingBalancer(BaseBalancer):
+    """
+    A balancer that uses the replica with the fewest open transactions. This avoids sending more
+    queries to a replica that is already falling behind.
+    """
+
+    def choose(self, connectors: 'typing.Sequence[BaseConnector]') -> BaseConnector:
+        return min(connectors, key=lambda connector: self.outstanding[connector])
@@ -0,0 +1,277 @@
+"""
+Horizontal sharding across several databases.
+"""
+import abc
+import asyncio
+import bisect
+import heapq
+import typing
+import zlib
+
+from asyncqlio import db as md_db
+from asyncqlio.orm import query as md_query, session as md_session
+from asyncqlio.orm.schema import table as md_table
+
+
+class BaseShardRouter(metaclass=abc.ABCMeta):
+    """
+    The base class for a shard router, which decides which shard a shard key belongs to.
+
+    Children classes must implement:
+
+        - :meth:`.BaseShardRouter.get_shard`
+    """
+
+    @abc.abstractmethod
+    def get_shard(self, key: typing.Any, count: int) -> int:
+        """
+        Gets the shard a key belongs to.
+
+        :param key: The value of the shard key.
+        :param count: The number of shards.
+        :return: The index of the shard, between 0 and ``count - 1``.
+        """
+
+
+class HashRouter(BaseShardRouter):
+    """
+    A router that spreads keys evenly over every shard, using a stable hash of the key.
+
+    Integer keys are used directly, so that sequential IDs are spread in a round-robin fashion.
+    Other keys are hashed with CRC32, as Python's own :func:`hash` is different in every process.
+    """
+
+    def get_shard(self, key: typing.Any, count: int) -> int:
+        if isinstance(key, int):
+            return key % count
+
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        elif not isinstance(key, bytes):
+            key = repr(key).encode("utf-8")
+
+        return zlib.crc32(key) % count
+
+
+class RangeRouter(BaseShardRouter):
+    """
+    A router that places keys in shards by range.
+
+    .. code-block:: python3
+
+        # keys below 1000 go to shard 0, keys below 5000 go to shard 1, others go to shard 2
+        router = RangeRouter([1000, 5000])
+    """
+
+    def __init__(self, bounds: typing.Sequence[typing.Any]):
+        """
+        :param bounds: The sorted upper bounds (exclusive) of every shard apart from the last.
+        """
+        if list(bounds) != sorted(bounds):
+            raise ValueError("Range bounds must be sorted")
+
+        #: The upper bounds of each shard.
+        self.bounds = list(bounds)
+
+    def get_shard(self, key: typing.Any, count: int) -> int:
+        if len(self.bounds) + 1 != count:
+            raise ValueError("Router has {} ranges, but there are {} shards"
+                             .format(len(self.bounds) + 1, count))
+
+        return bisect.bisect_right(self.bounds, key)
+
+
+class _MergeKey(object):
+    """
+    A sort key that sorts each value in its own direction, and sorts NULLs in the same place as
+    the database.
+    """
+
+    __slots__ = ("values", "descending", "nulls_high")
+
+    def __init__(self, values: tuple, descending: tuple, nulls_high: bool = False):
+        self.values = values
+        self.descending = descending
+        self.nulls_high = nulls_high
+
+    def __lt__(self, other: '_MergeKey'):
+        for ours, theirs, descending in zip(self.values, other.values, self.descending):
+            if ours == theirs:
+                continue
+
+            if ours is None or theirs is None:
+                # NULLs come last if they are high and ascending, or low and descending
+                nulls_last = self.nulls_high != descending
+                return (theirs is None) == nulls_last
+
+            return ours > theirs if descending else ours < theirs
+
+        return False
+
+
+class ShardedDatabase(object):
+    """
+    Splits data over several :class:`.DatabaseInterface` instances (shards), by a shard key.
+
+    .. code-block:: python3
+
+        shards = ShardedDatabase([DatabaseInterface(dsn) for dsn in dsns], router=HashRouter())
+        await shards.connect()
+
+        # sessions for a single tenant go to the shard that holds its rows
+        async with shards.get_session(tenant_id) as sess:
+            await sess.add(Invoice(tenant_id=tenant_id, total=10))
+
+        # queries across every tenant run on every shard, and the results are merged
+        latest = await shards.select_all(
+            lambda sess: sess.select(Invoice).order_by(Invoice.created.desc()).limit(20)
+        )
+
+    Every shard must have the same tables.
+    """
+
+    def __init__(self, databases: 'typing.Sequence[md_db.DatabaseInterface]', *,
+                 router: BaseShardRouter = None):
+        """
+        :param databases: The :class:`.DatabaseInterface` for each shard.
+        :param router: The :class:`.BaseShardRouter` used to route shard keys. Defaults to a \
+            :class:`.HashRouter`.
+        """
+        if not databases:
+            raise ValueError("Must provide at least one database")
+
+        #: The :class:`.DatabaseInterface` for each shard.
+        self.databases = list(databases)
+
+        #: The :class:`.BaseShardRouter` used to route shard keys.
+        self.router = router or HashRouter()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+    async def connect(self, **kwargs):
+        """
+        Connects every shard that isn't already connected.
+        """
+        await asyncio.gather(*[database.connect(**kwargs) for database in self.databases
+                               if not database.connected])
+
+    async def close(self):
+        """
+        Closes every shard.
+        """
+        await asyncio.gather(*[database.close() for database in self.databases])
+
+    def bind_tables(self, md: 'md_table.TableMetadata'):
+        """
+        Binds tables to the shards.
+
+        The metadata is bound to the first shard, so that :meth:`.Table.create` and friends only
+        run there. Use :meth:`.ShardedDatabase.create_tables` to create the tables on every shard.
+        """
+        dialects = set(type(database.dialect) for database in self.databases)
+        if len(dialects) != 1:
+            raise ValueError("Every shard must use the same database backend")
+
+        for database in self.databases[1:]:
+            database.bind_tables(md)
+
+        # bind the first shard last, so that it is the one left on the metadata
+        return self.databases[0].bind_tables(md)
+
+    async def create_tables(self, md: 'md_table.TableMetadata', *, if_not_exists: bool = True):
+        """
+        Creates every table in some metadata on every shard.
+
+        :param md: The :class:`.TableMetadata` (or a :class:`.Table` from it) to create.
+        :param if_not_exists: If tables that already exist should be skipped.
+        """
+        if isinstance(md, md_table.TableMeta):
+            md = md.metadata
+
+        tables = [table for table in md.tables.values()
+                  if not isinstance(table, md_table.AliasedTable)]
+
+        async def _create(database: 'md_db.DatabaseInterface'):
+            async with database.get_ddl_session() as sess:
+                for table in tables:
+                    await sess.create_table(table.__tablename__,
+                                            *table.iter_columns(),
+                                            *table.explicit_indexes(),
+                                            if_not_exists=if_not_exists)
+
+        await asyncio.gather(*[_create(database) for database in self.databases])
+
+    def get_database(self, key: typing.Any) -> 'md_db.DatabaseInterface':
+        """
+        Gets the shard a shard key belongs to.
+
+        :param key: The value of the shard key.
+        :return: The :class:`.DatabaseInterface` for the shard.
+        """
+        return self.databases[self.router.get_shard(key, len(self.databases))]
+
+    def get_session(self, key: typing.Any, **kwargs) -> 'md_session.Session':
+        """
+        Gets a new :class:`.Session` on the shard a shard key belongs to.
+
+        :param key: The value of the shard key.
+        """
+        return self.get_database(key).get_session(**kwargs)
+
+    async def select_all(self,
+                         build: 'typing.Callable[[md_session.Session], md_query.SelectQuery]') \
+            -> list:
+        """
+        Runs a query on every shard at once, and merges the results.
+
+        If the query is ordered, the results are merged in order. Limits and offsets apply to the
+        merged results, so every shard fetches up to ``limit + offset`` rows.
+
+        :param build: A callable that builds the :class:`.SelectQuery` to run, given the \
+            :class:`.Session` of a shard.
+        :return: A list of the merged results.
+        """
+        queries = []
+
+        async def _run(database: 'md_db.DatabaseInterface'):
+            async with database.get_session(readonly=True) as sess:
+                query = build(sess)
+                limit, offset = query.row_limit, query.row_offset
+                queries.append((query, limit, offset))
+                # the offset can only be applied once every shard's rows are merged
+                if offset is not None:
+                    query.offset(None)
+                    if limit is not None:
+                        query.limit(limit + offset)
+
+                return await md_query.ResultGenerator(query).flatten()
+
+        results = await asyncio.gather(*[_run(database) for database in self.databases])
+
+        query, limit, offset = queries[0]
+        if query.orderer is not None:
+            sort_keys = query.orderer.sort_keys
+            descending = tuple(order == "DESC" for _, order in sort_keys)
+
+            nulls_high = self.databases[0].dialect.has_high_nulls
+
+            def _key(row):
+                values = tuple(query.get_result_value(row, column) for column, _ in sort_keys)
+                return _MergeKey(values, descending, nulls_high)
+
+            # each shard has already sorted its own rows
+            merged = list(heapq.merge(*results, key=_key))
+        else:
+            merged = [row for rows in results for row in rows]
+
+        start = offset or 0
+        if limit is not None:
+            return merged[start:start + limit]
+
+        return merged[start:]
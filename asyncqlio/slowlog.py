@@ -0,0 +1,199 @@
+"""
+Logging of slow queries, with their query plans.
+"""
+import asyncio
+import collections
+import logging
+import time
+import typing
+
+from asyncqlio import db as md_db
+from asyncqlio.events import QueryEvent
+from asyncqlio.explain import QueryPlan
+from asyncqlio.utils import find_caller, fingerprint
+
+logger = logging.getLogger(__name__)
+
+#: The statements that are explained. Other statements can't be explained by every dialect.
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def _get_caller() -> str:
+    """
+    Gets the location of the first frame on the stack that isn't inside asyncqlio or asyncio.
+    """
+    frame, _ = find_caller()
+    if frame is None:
+        return "<unknown>"
+
+    return "{}:{} in {}".format(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+
+
+class SlowQuery(object):
+    """
+    Represents a query that took longer than the threshold of a :class:`.SlowQueryLog`.
+    """
+
+    __slots__ = ("sql", "shape", "params", "duration", "location", "timestamp", "plan")
+
+    def __init__(self, sql: str, params: typing.Any, duration: float, location: str):
+        #: The SQL of the query.
+        self.sql = sql
+
+        #: The fingerprint of the query, so that every run of the same query has the same shape.
+        #: See :func:`.fingerprint`.
+        self.shape = fingerprint(sql)
+
+        #: The params of the query.
+        self.params = params
+
+        #: The time taken to execute the query, in seconds.
+        self.duration = duration
+
+        #: The location in the code that ran the query, as ``file:line in function``.
+        self.location = location
+
+        #: The :func:`time.time` the query was recorded at.
+        self.timestamp = time.time()
+
+        #: The :class:`.QueryPlan` of the query, if the query was explained.
+        self.plan = None  # type: QueryPlan
+
+    def __repr__(self):
+        return "<SlowQuery duration={:.3f} location={!r}>".format(self.duration, self.location)
+
+
+class SlowQueryLog(object):
+    """
+    Records every query that takes longer than a threshold to execute.
+
+    .. code-block:: python3
+
+        db = DatabaseInterface(dsn, slow_query_threshold=0.5, explain_slow_queries=True)
+        ...
+        for query in db.slow_queries:
+            print(query.duration, query.location, query.shape, query.plan)
+
+    Slow queries are logged as warnings, and the most recent ones are kept in memory. If
+    ``explain`` is enabled, slow queries are explained on a separate connection in the
+    background, and the plan is stored in :attr:`.SlowQuery.plan`. Queries are never analyzed,
+    so they are not run a second time.
+
+    So that a burst of slow queries doesn't make the database slower, each shape of query is only
+    explained once per ``explain_interval``, and at most ``max_explains`` queries are explained
+    at once. Slow queries that aren't explained have no plan.
+
+    This uses the ``after_execute`` event of :attr:`.DatabaseInterface.events`, so the time
+    measured is the time taken for the server to run the query, not the time taken to fetch the
+    rows.
+    """
+
+    def __init__(self, bind: 'md_db.DatabaseInterface', threshold: float, *,
+                 explain: bool = False, max_entries: int = 100,
+                 explain_interval: float = 60.0, max_explains: int = 2):
+        """
+        :param bind: The :class:`.DatabaseInterface` to record the queries of.
+        :param threshold: The number of seconds a query can take before it is recorded.
+        :param explain: If slow queries should be explained.
+        :param max_entries: The number of slow queries to keep.
+        :param explain_interval: The number of seconds before a query with the same shape is \
+            explained again.
+        :param max_explains: The maximum number of queries that are explained at once.
+        """
+        self.bind = bind
+
+        #: The number of seconds a query can take before it is recorded.
+        self.threshold = threshold
+
+        #: If slow queries are explained.
+        self.explain = explain
+
+        #: The number of seconds before a query with the same shape is explained again.
+        self.explain_interval = explain_interval
+
+        #: The maximum number of queries that are explained at once.
+        self.max_explains = max_explains
+
+        self._entries = collections.deque(maxlen=max_entries)
+        self._tasks = set()
+        # shape -> the time.monotonic() the shape was last explained at
+        self._explained = {}
+
+    def __iter__(self) -> 'typing.Iterator[SlowQuery]':
+        return iter(list(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def attach(self):
+        """
+        Starts recording slow queries.
+        """
+        self.bind.events.add_listener("after_execute", self._on_execute)
+
+    def detach(self):
+        """
+        Stops recording slow queries.
+        """
+        self.bind.events.remove_listener("after_execute", self._on_execute)
+
+    def clear(self):
+        """
+        Removes every recorded slow query.
+        """
+        self._entries.clear()
+
+    def _on_execute(self, event: QueryEvent):
+        if event.execute_time < self.threshold:
+            return
+
+        entry = SlowQuery(event.sql, event.params, event.execute_time, _get_caller())
+        self._entries.append(entry)
+        logger.warning("Slow query took %.3fs at %s: %s", entry.duration, entry.location,
+                       entry.shape)
+
+        # redacted params can't be used to explain the query
+        if self.explain and not self.bind.events.redact_params and \
+                entry.sql.lstrip().upper().startswith(_EXPLAINABLE) and \
+                self._should_explain(entry.shape):
+            task = asyncio.ensure_future(self._explain(entry))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _should_explain(self, shape: str) -> bool:
+        """
+        Checks if a slow query with a shape can be explained, and marks the shape as explained.
+        """
+        if len(self._tasks) >= self.max_explains:
+            return False
+
+        now = time.monotonic()
+        last = self._explained.get(shape)
+        if last is not None and now - last < self.explain_interval:
+            return False
+
+        # forget about shapes that can be explained again, so that this doesn't grow forever
+        self._explained = {other: when for other, when in self._explained.items()
+                           if now - when < self.explain_interval}
+        self._explained[shape] = now
+        return True
+
+    async def _explain(self, entry: SlowQuery):
+        """
+        Explains a slow query on a separate connection, and stores the plan.
+        """
+        dialect = self.bind.dialect
+        try:
+            async with self.bind.get_transaction() as transaction:
+                cursor = await transaction.cursor(dialect.get_explain_sql(entry.sql), entry.params)
+                async with cursor:
+                    entry.plan = dialect.transform_explain_rows(await cursor.flatten())
+        except Exception:
+            logger.exception("Failed to explain slow query at %s", entry.location)
+
+    async def wait_for_plans(self):
+        """
+        Waits for every slow query that is being explained to finish.
+        """
+        if self._tasks:
+            await asyncio.wait(list(self._tasks))
@@ -1,7 +1,20 @@
 """
 Miscellaneous utilities used throughout the library.
 """
+import asyncio
+import bisect
+import collections
 import collections.abc
+import itertools
+import os
+import re
+import sys
+import typing
+
+# frames in these directories are skipped when looking for the user code that called the library
+# the trailing separator stops sibling directories such as ``asyncqlio_app`` from matching
+_INTERNAL_DIRS = (os.path.join(os.path.dirname(os.path.abspath(__file__)), ""),
+                  os.path.join(os.path.dirname(os.path.abspath(asyncio.__file__)), ""))
 
 
 class IterToAiter(collections.abc.Iterator, collections.abc.AsyncIterator):
@@ -55,6 +68,27 @@ class Proxy(object):
         return getattr(self.obb, item)
 
 
+def find_caller() -> typing.Tuple[typing.Any, int]:
+    """
+    Finds the first frame on the stack that isn't inside asyncqlio or asyncio, i.e. the user code
+    that called the library.
+
+    :return: A tuple of (frame, stacklevel), where the stacklevel is relative to the caller of \
+        this function and can be passed to :func:`warnings.warn`. The frame is None if there is \
+        no such frame.
+    """
+    frame = sys._getframe(1)
+    level = 1
+    while frame is not None:
+        if not os.path.abspath(frame.f_code.co_filename).startswith(_INTERNAL_DIRS):
+            return frame, level
+
+        frame = frame.f_back
+        level += 1
+
+    return None, level
+
+
 def separate_statements(sql: str) -> str:
     """
     Separates a SQL script into individual statements.
@@ -83,3 +117,154 @@ def separate_statements(sql: str) -> str:
     stmt = sql[start:-1].strip()
     if stmt:
         yield stmt
+
+
+_PARAM_RE = re.compile(r"param_(\d+)")
+
+
+def normalize_params(sql: str, params: typing.Mapping[str, typing.Any] = None) \
+        -> typing.Tuple[str, typing.Mapping[str, typing.Any]]:
+    """
+    Renames the automatically generated params in a query to be numbered in order of appearance,
+    so that two identical queries always have identical SQL.
+
+    Params are emitted with a global counter (``param_1234``), so the same query generated twice
+    will have different param names.
+
+    :param sql: The SQL of the query.
+    :param params: The params of the query.
+    :return: A tuple of (sql, params) with the params renamed.
+    """
+    names = collections.OrderedDict()
+
+    def _rename(match):
+        name = match.group(0)
+        if name not in names:
+            names[name] = "param_{}".format(len(names))
+
+        return names[name]
+
+    sql = _PARAM_RE.sub(_rename, sql)
+    if params is None:
+        return sql, params
+
+    return sql, collections.OrderedDict(sorted((names.get(key, key), value)
+                                               for key, value in params.items()))
+
+
+# the parts of a statement that fingerprinting looks at, in order of precedence
+_FINGERPRINT_RE = re.compile(r"""
+    (?P<identifier>"(?:[^"]|"")*"|`[^`]*`)    # quoted identifiers are kept as-is
+    |(?P<string>'(?:[^']|'')*')               # string literals
+    |(?P<cast>::\w+)                          # casts are kept as-is, and aren't params
+    |(?P<param>%\(\w+\)s|:\w+|\{\w+\}|\$\d+|\?)  # params, in every param style
+    |(?P<number>(?<![\w.])(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?(?!\w))  # numeric literals
+    |(?P<space>\s+)
+""", re.VERBOSE)
+_COMMA_RE = re.compile(r"\s*,\s*")
+_IN_LIST_RE = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+_VALUES_RE = re.compile(r"(\(\?(?:, \?)*\))(?:, \1)+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalizes a statement into a fingerprint, so that every run of the same statement has the
+    same fingerprint regardless of its values.
+
+    Literals and params are replaced with ``?``, IN-lists of any length are collapsed to
+    ``IN (...)``, multi-row VALUES lists are collapsed to their first row, and whitespace is
+    collapsed.
+
+    .. code-block:: python3
+
+        >>> fingerprint("SELECT * FROM users WHERE id IN (:param_1, :param_2) AND age > 18")
+        'SELECT * FROM users WHERE id IN (...) AND age > ?'
+
+    :param sql: The SQL of the statement.
+    :return: The fingerprint of the statement.
+    """
+    def _replace(match):
+        kind = match.lastgroup
+        if kind in ("identifier", "cast"):
+            return match.group(0)
+        elif kind == "space":
+            return " "
+
+        return "?"
+
+    sql = _FINGERPRINT_RE.sub(_replace, sql).strip()
+    sql = _COMMA_RE.sub(", ", sql).replace("( ", "(").replace(" )", ")")
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    return _VALUES_RE.sub(r"\1, ...", sql)
+
+
+class Histogram(object):
+    """
+    A histogram of observed values, such as durations in seconds, with fixed bucket bounds.
+    """
+
+    #: The default upper bounds of each bucket, in seconds.
+    DEFAULT_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, bounds: typing.Sequence[float] = DEFAULT_BOUNDS):
+        """
+        :param bounds: The sorted upper bounds (inclusive) of each bucket. A final bucket for \
+            values above the last bound is always added.
+        """
+        #: The upper bounds of each bucket.
+        self.bounds = tuple(bounds)
+
+        #: The number of values in each bucket. The last bucket counts values above every bound.
+        self.buckets = [0] * (len(self.bounds) + 1)
+
+        #: The number of values observed.
+        self.count = 0
+
+        #: The sum of every value observed.
+        self.sum = 0.0
+
+        #: The largest value observed.
+        self.max = 0.0
+
+    def __repr__(self):
+        return "<Histogram count={} sum={}>".format(self.count, self.sum)
+
+    def observe(self, value: float):
+        """
+        Adds a value to this histogram.
+        """
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimates a percentile of the observed values, as the upper bound of the bucket it falls in.
+
+        :param percent: The percentile to get, between 0 and 100.
+        :return: The estimated value, or 0 if no values were observed.
+        """
+        if not self.count:
+            return 0.0
+
+        target = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+
+        return self.max
+
+    def as_dict(self) -> dict:
+        """
+        :return: This histogram as a dict, with the cumulative count of values below each bound.
+        """
+        cumulative = list(itertools.accumulate(self.buckets))
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "buckets": collections.OrderedDict(zip(self.bounds + (float("inf"),), cumulative)),
+        }
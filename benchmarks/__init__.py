@@ -0,0 +1,18 @@
+"""
+Benchmarks for asyncqlio.
+
+These are run as modules from the root of the repository, and use a temporary SQLite database
+unless a DSN is passed with ``--dsn`` or the ``ASQL_DSN`` environment variable:
+
+.. code-block:: bash
+
+    python -m benchmarks.bench_hotpaths --save baseline.json
+    # later, after changing something
+    python -m benchmarks.bench_hotpaths --compare baseline.json
+
+    # concurrent sessions, for sizing the connection pool
+    python -m benchmarks.bench_load --workers 50 --pool-size 10
+
+    # memory used by large result sets
+    python -m benchmarks.bench_memory --rows 100000
+"""
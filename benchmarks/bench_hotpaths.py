@@ -0,0 +1,165 @@
+"""
+Benchmarks for the hot paths of the ORM: generating SQL, hydrating rows, inserts, updates,
+deletes and acquiring connections from the pool.
+
+.. code-block:: bash
+
+    python -m benchmarks.bench_hotpaths [--dsn DSN] [--save FILE] [--compare FILE]
+"""
+import sys
+
+import click
+
+from asyncqlio.orm.query import ResultGenerator
+from asyncqlio.utils import separate_statements
+from benchmarks.common import Author, Book, get_dsn, measure, report, run, setup_database, \
+    teardown_database
+
+try:
+    from asyncqlio.backends.postgresql.asyncpg import get_param_query
+except ImportError:  # asyncpg isn't installed
+    get_param_query = None
+
+_SCRIPT = "; ".join(
+    "INSERT INTO book (id, title) VALUES ({}, 'it''s; a title')".format(i) for i in range(50)
+)
+
+
+async def run_benchmarks(dsn: str, *, min_time: float, only: str = None) -> list:
+    db = await setup_database(dsn)
+    sess = db.get_session()
+    await sess.start()
+
+    # raw rows, so that hydration can be measured without the database
+    joined_query = sess.select(Author).where(Author.id <= 10)
+    sql, params = joined_query.generate_sql()
+    async with await sess.cursor(sql, params) as cursor:
+        joined_rows = await cursor.flatten()
+
+    key = Author.id.alias_name(quoted=False)
+    groups = []
+    for row in joined_rows:
+        if groups and groups[-1][0][key] == row[key]:
+            groups[-1].append(row)
+        else:
+            groups.append([row])
+
+    async def generate_sql():
+        sess.select(Book).where(Book.year > 1950).order_by(Book.title).limit(10).generate_sql()
+
+    async def generate_sql_joined():
+        sess.select(Author).where(Author.name == "author 1").generate_sql()
+
+    async def map_columns():
+        for row in joined_rows:
+            joined_query.map_columns(row)
+
+    async def map_many():
+        for group in groups:
+            joined_query.map_many(*group)
+
+    async def iterate_results():
+        generator = ResultGenerator(sess.select(Book).where(Book.author_id <= 10))
+        await generator.flatten()
+
+    async def iterate_results_joined():
+        generator = ResultGenerator(sess.select(Author).where(Author.id <= 10))
+        await generator.flatten()
+
+    async def select_first():
+        await sess.select(Book).where(Book.id == 1).first()
+
+    async def session_fetch():
+        await sess.fetch(sql, params)
+
+    counter = iter(range(10 ** 6, 10 ** 9))
+
+    async def insert_single():
+        await sess.add(Book(id=next(counter), author_id=1, title="new", year=2000))
+
+    async def insert_bulk():
+        rows = [Book(id=next(counter), author_id=1, title="new", year=2000) for _ in range(100)]
+        await sess.insert.rows(*rows).run()
+
+    row = await sess.select(Book).where(Book.id == 1).first()
+    years = iter(range(10 ** 9))
+
+    async def row_update():
+        row.year = next(years)
+        await sess.update_now(row)
+
+    async def row_delete():
+        new = Book(id=next(counter), author_id=1, title="deleted", year=2000)
+        await sess.add(new)
+        await sess.delete_now(new)
+
+    param_sql = "SELECT * FROM book WHERE {}".format(
+        " OR ".join("id = {{param_{}}}".format(i) for i in range(20))
+    )
+    param_values = {"param_{}".format(i): i for i in range(20)}
+
+    async def param_query():
+        get_param_query(param_sql, param_values)
+
+    async def split_statements():
+        list(separate_statements(_SCRIPT))
+
+    async def pool_acquire():
+        async with db.get_transaction() as transaction:
+            await transaction.rollback()
+
+    benchmarks = [
+        ("generate_sql", generate_sql),
+        ("generate_sql_joined", generate_sql_joined),
+        ("map_columns_joined", map_columns),
+        ("map_many_joined", map_many),
+        ("iterate_results", iterate_results),
+        ("iterate_results_joined", iterate_results_joined),
+        ("select_first", select_first),
+        ("session_fetch", session_fetch),
+        ("insert_single", insert_single),
+        ("insert_bulk_100", insert_bulk),
+        ("row_update", row_update),
+        ("row_delete", row_delete),
+        ("separate_statements", split_statements),
+        ("pool_acquire_release", pool_acquire),
+    ]
+    if get_param_query is not None:
+        benchmarks.append(("get_param_query", param_query))
+
+    results = []
+    try:
+        for name, fn in benchmarks:
+            if only is not None and only not in name:
+                continue
+
+            results.append(await measure(name, fn, min_time=min_time))
+    finally:
+        await sess.rollback()
+        await sess.close()
+        await teardown_database(db)
+
+    return results
+
+
+@click.command()
+@click.option("--dsn", default=None, help="The DSN to benchmark against. Defaults to ASQL_DSN, "
+                                          "or a temporary SQLite database.")
+@click.option("--min-time", default=1.0, help="The minimum seconds to run each benchmark for.")
+@click.option("--only", default=None, help="Only run benchmarks with names containing this.")
+@click.option("--save", default=None, help="Save the results as a baseline to this file.")
+@click.option("--compare", default=None, help="Compare the results to a saved baseline.")
+@click.option("--threshold", default=0.1, help="The fraction a benchmark can be slower than the "
+                                                "baseline before it is a regression.")
+def cli(dsn: str, min_time: float, only: str, save: str, compare: str, threshold: float):
+    """
+    Benchmarks the hot paths of the ORM.
+    """
+    results = run(run_benchmarks(get_dsn(dsn), min_time=min_time, only=only))
+    if not report(results, save=save, compare=compare, threshold=threshold):
+        click.echo("Some benchmarks regressed compared to the baseline.", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,215 @@
+"""
+A load generator, which runs many concurrent workers doing a mix of reads and writes through
+sessions, to measure the throughput of transactions and the connection pool.
+
+.. code-block:: bash
+
+    python -m benchmarks.bench_load --workers 50 --pool-size 10 --think-time 0.01 --duration 30
+
+This reports the throughput, the latency percentiles of reads and writes, the time spent waiting
+for a connection from the pool, and the errors raised by the workers.
+"""
+import asyncio
+import collections
+import json
+import random
+import time
+import typing
+from urllib.parse import urlparse
+
+import click
+
+from asyncqlio.backends.base import PoolStatistics
+from benchmarks.common import Author, Book, get_dsn, run, setup_database, teardown_database
+
+#: The DSN parameters that set the size of the pool of each backend.
+_POOL_SIZE_PARAMS = {
+    "sqlite3": "max_size={}",
+    "postgresql": "min_size={0}&max_size={0}",
+    "mysql": "minsize={0}&maxsize={0}",
+}
+
+
+def with_pool_size(dsn: str, size: int) -> str:
+    """
+    Adds the DSN parameters that set the size of the connection pool to a DSN.
+    """
+    backend = urlparse(dsn).scheme.split("+")[0]
+    params = _POOL_SIZE_PARAMS[backend].format(size)
+    return "{}{}{}".format(dsn, "&" if "?" in dsn else "?", params)
+
+
+def percentile(values: typing.List[float], percent: float) -> float:
+    """
+    Gets a percentile of a sorted list of values, using the nearest rank.
+    """
+    if not values:
+        return 0.0
+
+    index = max(0, int(round(len(values) * percent / 100)) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+class LoadStats(object):
+    """
+    The statistics recorded by the workers of a load run.
+    """
+
+    def __init__(self):
+        #: A mapping of operation -> the latencies of each successful transaction, in seconds.
+        self.latencies = collections.defaultdict(list)
+
+        #: A counter of the name of each exception raised by a transaction.
+        self.errors = collections.Counter()
+
+    @property
+    def completed(self) -> int:
+        return sum(len(latencies) for latencies in self.latencies.values())
+
+    def as_dict(self, duration: float, pool_stats: dict) -> dict:
+        total = self.completed + sum(self.errors.values())
+        operations = {}
+        for name, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            operations[name] = {
+                "count": len(latencies),
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1],
+            }
+
+        return {
+            "duration": duration,
+            "transactions": self.completed,
+            "throughput": self.completed / duration,
+            "operations": operations,
+            "errors": dict(self.errors),
+            "error_rate": sum(self.errors.values()) / total if total else 0.0,
+            "pool": pool_stats,
+        }
+
+
+async def worker(db, stats: LoadStats, deadline: float, *, read_ratio: float,
+                 think_time: float, authors: int, books: int):
+    """
+    Runs transactions until the deadline passes.
+    """
+    while time.perf_counter() < deadline:
+        if random.random() < read_ratio:
+            operation = "read"
+        else:
+            operation = "write"
+
+        start = time.perf_counter()
+        try:
+            async with db.get_session() as sess:
+                if operation == "read":
+                    author_id = random.randint(1, authors)
+                    await (await sess.select(Book).where(Book.author_id == author_id).all()) \
+                        .flatten()
+                    await sess.select(Author).where(Author.id == author_id).first()
+                else:
+                    book_id = random.randint(1, books)
+                    await sess.update(Book).set(Book.year, random.randint(1900, 2000)) \
+                        .where(Book.id == book_id)
+        except Exception as e:
+            stats.errors[type(e).__name__] += 1
+        else:
+            stats.latencies[operation].append(time.perf_counter() - start)
+
+        if think_time:
+            await asyncio.sleep(random.uniform(0, 2 * think_time))
+
+
+async def run_load(dsn: str, *, workers: int, pool_size: int, think_time: float,
+                   duration: float, read_ratio: float, authors: int) -> dict:
+    books_per_author = 10
+    db = await setup_database(with_pool_size(dsn, pool_size), authors=authors,
+                              books_per_author=books_per_author)
+    # only measure the pool while the workers are running
+    db.connector.pool_statistics = PoolStatistics()
+
+    stats = LoadStats()
+    started = time.perf_counter()
+    deadline = started + duration
+    try:
+        await asyncio.gather(*[
+            worker(db, stats, deadline, read_ratio=read_ratio, think_time=think_time,
+                   authors=authors, books=authors * books_per_author)
+            for _ in range(workers)
+        ])
+        elapsed = time.perf_counter() - started
+        pool_stats = db.connector.pool_stats()
+    finally:
+        await teardown_database(db)
+
+    return stats.as_dict(elapsed, pool_stats)
+
+
+def print_report(result: dict):
+    click.echo("{} transactions in {:.1f}s ({:,.1f}/sec), {:.2%} errors".format(
+        result["transactions"], result["duration"], result["throughput"], result["error_rate"]
+    ))
+
+    click.echo("\nlatency (ms)   {:>8} {:>8} {:>8} {:>8} {:>8}".format(
+        "count", "p50", "p90", "p99", "max"
+    ))
+    for name, operation in result["operations"].items():
+        click.echo("  {:<12} {:>8} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f}".format(
+            name, operation["count"], operation["p50"] * 1000, operation["p90"] * 1000,
+            operation["p99"] * 1000, operation["max"] * 1000
+        ))
+
+    acquire_time = result["pool"]["acquire_time"]
+    click.echo("\npool wait: {} acquires, {} timeouts, mean {:.2f}ms, max {:.2f}ms".format(
+        acquire_time["count"], result["pool"]["timeouts"],
+        acquire_time["sum"] / acquire_time["count"] * 1000 if acquire_time["count"] else 0,
+        acquire_time["max"] * 1000
+    ))
+    previous = 0
+    for bound, cumulative in acquire_time["buckets"].items():
+        count = cumulative - previous
+        previous = cumulative
+        if not count:
+            continue
+
+        label = "<= {:g}ms".format(bound * 1000) if bound != float("inf") else "> max bound"
+        click.echo("  {:<14} {:>8} {}".format(label, count,
+                                             "#" * int(40 * count / acquire_time["count"])))
+
+    if result["errors"]:
+        click.echo("\nerrors:")
+        for name, count in sorted(result["errors"].items(), key=lambda item: -item[1]):
+            click.echo("  {:<30} {:>8}".format(name, count))
+
+
+@click.command()
+@click.option("--dsn", default=None, help="The DSN to benchmark against. Defaults to ASQL_DSN, "
+                                          "or a temporary SQLite database.")
+@click.option("--workers", default=20, help="The number of concurrent workers.")
+@click.option("--pool-size", default=10, help="The size of the connection pool.")
+@click.option("--think-time", default=0.0, help="The mean seconds a worker waits between "
+                                                 "transactions.")
+@click.option("--duration", default=10.0, help="The number of seconds to run for.")
+@click.option("--read-ratio", default=0.8, help="The fraction of transactions that only read.")
+@click.option("--authors", default=100, help="The number of authors to create. Each has 10 books.")
+@click.option("--json", "json_path", default=None, help="Also write the results to this file, "
+                                                        "for comparing runs.")
+def cli(dsn: str, workers: int, pool_size: int, think_time: float, duration: float,
+        read_ratio: float, authors: int, json_path: str):
+    """
+    Runs concurrent sessions against a database, and reports the throughput and latency.
+    """
+    result = run(run_load(get_dsn(dsn), workers=workers, pool_size=pool_size,
+                          think_time=think_time, duration=duration, read_ratio=read_ratio,
+                          authors=authors))
+    print_report(result)
+
+    if json_path is not None:
+        with open(json_path, "w") as f:
+            json.dump(result, f, indent=4, default=str)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,200 @@
+"""
+Measures the memory used to load large result sets, with :mod:`tracemalloc`.
+
+.. code-block:: bash
+
+    python -m benchmarks.bench_memory --rows 100000 [--save FILE] [--compare FILE]
+
+Each mode loads ``--rows`` rows and reports the peak memory, the memory still held by the loaded
+rows, and the bytes per row, broken down by the file that allocated them:
+
+- ``raw`` flattens a cursor into :class:`.DictRow` instances, without the ORM.
+- ``plain`` loads :class:`.Table` instances with :meth:`.SelectQuery.all`.
+- ``joined`` loads :class:`.Table` instances, each with 10 children from a joined relationship.
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+import click
+
+import asyncqlio
+from benchmarks.common import Author, Book, get_dsn, run, setup_database, teardown_database
+
+_ROOT = os.path.dirname(os.path.dirname(asyncqlio.__file__))
+
+
+def _get_location(filename: str) -> str:
+    """
+    Gets a short name for the file that allocated some memory.
+    """
+    if filename.startswith(_ROOT):
+        return os.path.relpath(filename, _ROOT)
+
+    return "<other>"
+
+
+class MemoryResult(object):
+    """
+    The memory used by loading the rows of one mode.
+    """
+
+    def __init__(self, name: str, rows: int, peak: int, retained: int, by_file: dict):
+        #: The name of the mode.
+        self.name = name
+
+        #: The number of rows loaded.
+        self.rows = rows
+
+        #: The peak number of bytes allocated while loading the rows.
+        self.peak = peak
+
+        #: The number of bytes still allocated by the loaded rows.
+        self.retained = retained
+
+        #: A mapping of file -> the number of bytes still allocated by that file.
+        self.by_file = by_file
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "peak_bytes": self.peak,
+            "retained_bytes": self.retained,
+            "bytes_per_row": self.retained / self.rows,
+            "by_file": self.by_file,
+        }
+
+
+async def measure_load(name: str, load, rows: int) -> MemoryResult:
+    """
+    Measures the memory used by a no-argument coroutine function that loads rows.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        loaded = await load()
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    by_file = {}
+    for stat in snapshot.statistics("filename"):
+        location = _get_location(stat.traceback[0].filename)
+        by_file[location] = by_file.get(location, 0) + stat.size
+
+    assert len(loaded) == rows, "expected {} rows, loaded {}".format(rows, len(loaded))
+    del loaded
+    return MemoryResult(name, rows, peak, retained, by_file)
+
+
+async def run_benchmarks(dsn: str, *, rows: int, modes: tuple) -> list:
+    books_per_author = 10
+    authors = max(1, rows // books_per_author)
+    db = await setup_database(dsn, authors=authors, books_per_author=books_per_author)
+    total_books = authors * books_per_author
+
+    async def load_raw():
+        async with db.get_session() as sess:
+            sql, params = sess.select(Book).generate_sql()
+            async with await sess.cursor(sql, params) as cursor:
+                return await cursor.flatten()
+
+    async def load_plain():
+        async with db.get_session() as sess:
+            return await (await sess.select(Book).all()).flatten()
+
+    async def load_joined():
+        async with db.get_session() as sess:
+            loaded = await (await sess.select(Author).all()).flatten()
+
+        assert len(list(loaded[0].books)) == books_per_author
+        return loaded
+
+    loaders = {
+        "raw": (load_raw, total_books),
+        "plain": (load_plain, total_books),
+        "joined": (load_joined, authors),
+    }
+
+    results = []
+    try:
+        for mode in modes:
+            load, count = loaders[mode]
+            results.append(await measure_load(mode, load, count))
+    finally:
+        await teardown_database(db)
+
+    return results
+
+
+def print_report(results: list, baseline: dict, *, top: int, threshold: float) -> bool:
+    ok = True
+    click.echo("{:<8} {:>10} {:>12} {:>14} {:>12} {:>10}".format(
+        "mode", "rows", "peak MiB", "retained MiB", "bytes/row", "change"
+    ))
+    for result in results:
+        per_row = result.retained / result.rows
+        change = ""
+        previous = baseline.get(result.name)
+        if previous is not None:
+            ratio = per_row / previous["bytes_per_row"] - 1
+            change = "{:+.1%}".format(ratio)
+            if ratio > threshold:
+                change += " !"
+                ok = False
+
+        click.echo("{:<8} {:>10,} {:>12,.1f} {:>14,.1f} {:>12,.1f} {:>10}".format(
+            result.name, result.rows, result.peak / 2 ** 20, result.retained / 2 ** 20, per_row,
+            change
+        ))
+
+    for result in results:
+        click.echo("\n{}: retained bytes per row by file".format(result.name))
+        by_size = sorted(result.by_file.items(), key=lambda item: -item[1])
+        for location, size in by_size[:top]:
+            click.echo("  {:<50} {:>10,.1f}".format(location, size / result.rows))
+
+    return ok
+
+
+@click.command()
+@click.option("--dsn", default=None, help="The DSN to benchmark against. Defaults to ASQL_DSN, "
+                                          "or a temporary SQLite database.")
+@click.option("--rows", default=100000, help="The number of rows to load. In joined mode, this "
+                                             "is the number of child rows.")
+@click.option("--mode", "modes", multiple=True, type=click.Choice(["raw", "plain", "joined"]),
+              help="The modes to run. Defaults to every mode.")
+@click.option("--top", default=5, help="The number of files to show the allocations of.")
+@click.option("--save", default=None, help="Save the results as a baseline to this file.")
+@click.option("--compare", default=None, help="Compare the results to a saved baseline.")
+@click.option("--threshold", default=0.1, help="The fraction the bytes per row can grow by "
+                                                "before it is a regression.")
+def cli(dsn: str, rows: int, modes: tuple, top: int, save: str, compare: str, threshold: float):
+    """
+    Measures the memory used to load large result sets.
+    """
+    results = run(run_benchmarks(get_dsn(dsn), rows=rows,
+                                 modes=modes or ("raw", "plain", "joined")))
+
+    baseline = {}
+    if compare is not None:
+        with open(compare) as f:
+            baseline = json.load(f)
+
+    ok = print_report(results, baseline, top=top, threshold=threshold)
+
+    if save is not None:
+        with open(save, "w") as f:
+            json.dump({result.name: result.as_dict() for result in results}, f, indent=4)
+
+    if not ok:
+        click.echo("The memory used per row regressed compared to the baseline.", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
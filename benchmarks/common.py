@@ -0,0 +1,260 @@
+"""
+Shared utilities for the benchmarks.
+"""
+import asyncio
+import gc
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import typing
+
+import click
+
+from asyncqlio.db import DatabaseInterface
+from asyncqlio.orm.schema.column import Column
+from asyncqlio.orm.schema.relationship import ForeignKey, Relationship
+from asyncqlio.orm.schema.table import table_base
+from asyncqlio.orm.schema.types import Integer, String
+
+Table = table_base()
+
+# the paths of the temporary databases created by get_dsn, which are removed on teardown
+_temporary_databases = set()
+
+
+class Author(Table):
+    id = Column(Integer(), primary_key=True)
+    name = Column(String(64))
+    email = Column(String(64))
+    books = Relationship(left="Author.id", right="Book.author_id", load="joined")
+
+
+class Book(Table):
+    id = Column(Integer(), primary_key=True)
+    author_id = Column(Integer(), foreign_key=ForeignKey("Author.id"))
+    title = Column(String(64))
+    year = Column(Integer())
+
+
+def get_dsn(dsn: str = None) -> str:
+    """
+    Gets the DSN to benchmark against. Defaults to the ``ASQL_DSN`` environment variable, or a
+    new temporary SQLite database.
+    """
+    dsn = dsn or os.environ.get("ASQL_DSN")
+    if dsn:
+        return dsn
+
+    fd, path = tempfile.mkstemp(prefix="asyncqlio-bench-", suffix=".db")
+    os.close(fd)
+    _temporary_databases.add(path)
+    return "sqlite3:///{}".format(path)
+
+
+async def setup_database(dsn: str, *, authors: int = 100, books_per_author: int = 10,
+                         **kwargs) -> DatabaseInterface:
+    """
+    Connects to a database, and creates and fills the benchmark tables.
+
+    :param dsn: The DSN to connect to.
+    :param authors: The number of authors to insert.
+    :param books_per_author: The number of books to insert for each author.
+    """
+    db = DatabaseInterface(dsn, **kwargs)
+    await db.connect()
+    db.bind_tables(Table)
+
+    for table in (Book, Author):
+        await table.drop()
+    for table in (Author, Book):
+        await table.create()
+
+    async with db.get_session() as sess:
+        await bulk_load(sess, Author, (
+            (i, "author {}".format(i), "{}@example.com".format(i)) for i in range(1, authors + 1)
+        ))
+        await bulk_load(sess, Book, (
+            ((author - 1) * books_per_author + i, author, "book {}".format(i), 1900 + i % 100)
+            for author in range(1, authors + 1) for i in range(1, books_per_author + 1)
+        ))
+
+    return db
+
+
+async def bulk_load(sess, table, rows: typing.Iterable[tuple], *, chunk: int = 200):
+    """
+    Inserts many rows with multi-row INSERT statements.
+
+    This is much faster than inserting :class:`.Table` instances, which are inserted one at a
+    time so that their generated values can be read back.
+
+    :param sess: The :class:`.Session` to insert the rows with.
+    :param table: The :class:`.Table` to insert the rows into.
+    :param rows: An iterable of tuples of the values of every column, in order.
+    :param chunk: The number of rows to insert per statement.
+    """
+    columns = list(table.iter_columns())
+    base = "INSERT INTO {} ({}) VALUES ".format(
+        table.__quoted_name__, ", ".join(column.quoted_name for column in columns)
+    )
+
+    async def flush(batch):
+        params = {}
+        values = []
+        for i, row in enumerate(batch):
+            names = []
+            for j, value in enumerate(row):
+                name = "r{}_{}".format(i, j)
+                params[name] = value
+                names.append(sess.bind.emit_param(name))
+            values.append("({})".format(", ".join(names)))
+
+        await sess.execute(base + ", ".join(values), params)
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk:
+            await flush(batch)
+            batch = []
+
+    if batch:
+        await flush(batch)
+
+
+async def teardown_database(db: DatabaseInterface):
+    """
+    Drops the benchmark tables, and closes the database. Temporary databases created by
+    :func:`get_dsn` are removed.
+    """
+    for table in (Book, Author):
+        await table.drop()
+
+    path = db.connector.db
+    await db.close()
+
+    if path in _temporary_databases:
+        _temporary_databases.discard(path)
+        # SQLite may also leave a journal or write-ahead log next to the database
+        for suffix in ("", "-journal", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+class BenchResult(object):
+    """
+    The result of a single benchmark.
+    """
+
+    def __init__(self, name: str, times: typing.List[float], peak_bytes: int):
+        #: The name of the benchmark.
+        self.name = name
+
+        #: The time taken by each operation, in seconds.
+        self.times = times
+
+        #: The median peak memory allocated while running one operation, in bytes.
+        self.peak_bytes = peak_bytes
+
+    @property
+    def ops_per_sec(self) -> float:
+        """
+        :return: The number of operations per second, from the median time of an operation.
+        """
+        return 1 / statistics.median(self.times)
+
+    def as_dict(self) -> dict:
+        return {"ops_per_sec": self.ops_per_sec, "peak_bytes": self.peak_bytes}
+
+
+async def measure(name: str, fn: 'typing.Callable[[], typing.Awaitable]', *,
+                  min_time: float = 1.0, min_runs: int = 5, memory_runs: int = 5) -> BenchResult:
+    """
+    Measures a coroutine function, running it repeatedly for at least ``min_time`` seconds.
+
+    The peak memory of an operation is measured in separate runs with :mod:`tracemalloc`, as
+    tracing slows down the timed runs.
+
+    :param name: The name of the benchmark.
+    :param fn: The no-argument coroutine function to measure.
+    :param min_time: The minimum number of seconds to run the function for.
+    :param min_runs: The minimum number of times to run the function.
+    :param memory_runs: The number of times to run the function while tracing memory.
+    """
+    # warm up any caches
+    await fn()
+
+    times = []
+    started = time.perf_counter()
+    gc.disable()
+    try:
+        while len(times) < min_runs or time.perf_counter() - started < min_time:
+            start = time.perf_counter()
+            await fn()
+            times.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(memory_runs):
+            tracemalloc.clear_traces()
+            await fn()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(name, times, int(statistics.median(peaks)))
+
+
+def report(results: 'typing.List[BenchResult]', *, save: str = None, compare: str = None,
+           threshold: float = 0.1) -> bool:
+    """
+    Prints the results of the benchmarks, and optionally saves or compares them to a baseline.
+
+    :param results: The list of :class:`.BenchResult` to report.
+    :param save: The path of a JSON file to save the results to, as a new baseline.
+    :param compare: The path of a JSON baseline to compare the results to.
+    :param threshold: The fraction that a benchmark can be slower than the baseline by, before it
+        is considered a regression.
+    :return: True if no benchmark regressed, False otherwise.
+    """
+    baseline = {}
+    if compare is not None:
+        with open(compare) as f:
+            baseline = json.load(f)
+
+    ok = True
+    click.echo("{:<40} {:>14} {:>14} {:>10}".format("benchmark", "ops/sec", "peak KiB/op",
+                                                   "change"))
+    for result in results:
+        change = ""
+        previous = baseline.get(result.name)
+        if previous is not None:
+            ratio = result.ops_per_sec / previous["ops_per_sec"] - 1
+            change = "{:+.1%}".format(ratio)
+            if ratio < -threshold:
+                change += " !"
+                ok = False
+
+        click.echo("{:<40} {:>14,.1f} {:>14,.1f} {:>10}".format(result.name, result.ops_per_sec,
+                                                               result.peak_bytes / 1024, change))
+
+    if save is not None:
+        with open(save, "w") as f:
+            json.dump({result.name: result.as_dict() for result in results}, f, indent=4)
+
+    return ok
+
+
+def run(coro: typing.Awaitable):
+    """
+    Runs a benchmark coroutine to completion.
+    """
+    return asyncio.get_event_loop().run_until_complete(coro)
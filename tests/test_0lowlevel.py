@@ -1,6 +1,8 @@
 """
 Tests the low-level API.
 """
+import asyncio
+import os
 
 import pytest
 
@@ -74,6 +76,25 @@ async def test_transaction_fetch_many(db: DatabaseInterface):
     await tr.close()
 
 
+async def test_transaction_fused_fetch(db: DatabaseInterface):
+    tr = db.get_transaction()
+    await tr.begin()
+
+    sql = "SELECT 1 AS result UNION ALL SELECT 2 UNION ALL SELECT 3;"
+    row = await tr.fetch_one(sql)
+    assert row["result"] == 1
+    rows = await tr.fetch_all(sql)
+    assert [row["result"] for row in rows] == [1, 2, 3]
+
+    cursor = await tr.fetch_chunk(sql, size=2)
+    async with cursor:
+        rows = await cursor.flatten()
+    assert [row["result"] for row in rows] == [1, 2, 3]
+
+    await tr.rollback()
+    await tr.close()
+
+
 async def test_transaction_with_error(db: DatabaseInterface):
     tr = db.get_transaction()
     await tr.begin()
@@ -92,3 +113,139 @@ async def test_transaction_with_error(db: DatabaseInterface):
     await tr.rollback()
     await tr.close()
 
+
+async def test_pool_stats(db: DatabaseInterface):
+    events = []
+
+    def listener(event, data):
+        events.append(event)
+
+    db.connector.add_pool_listener(listener)
+    before = db.connector.pool_stats()
+
+    tr = db.get_transaction()
+    await tr.begin()
+    assert db.connector.pool_stats()["in_use"] == before["in_use"] + 1
+    await tr.rollback()
+    await tr.close()
+
+    stats = db.connector.pool_stats()
+    assert stats["in_use"] == before["in_use"]
+    assert stats["acquired"] == before["acquired"] + 1
+    assert stats["acquire_time"]["count"] == before["acquire_time"]["count"] + 1
+    assert "acquire" in events and "release" in events
+    db.connector.remove_pool_listener(listener)
+
+
+async def test_pool_size_param(db: DatabaseInterface):
+    params = {
+        "sqlite3": "max_size=3",
+        "postgresql": "min_size=3&max_size=3",
+        "mysql": "minsize=3&maxsize=3",
+    }[db.backend]
+    dsn = os.environ["ASQL_DSN"]
+    sized_db = DatabaseInterface("{}{}{}".format(dsn, "&" if "?" in dsn else "?", params))
+    await sized_db.connect()
+    try:
+        assert sized_db.connector.get_pool_size()[0] == 3
+    finally:
+        await sized_db.close()
+
+
+async def test_sqlite3_pragmas(db: DatabaseInterface):
+    if db.backend != "sqlite3":
+        pytest.skip("PRAGMAs are only used by sqlite3")
+
+    dsn = os.environ["ASQL_DSN"]
+    separator = "&" if "?" in dsn else "?"
+    with pytest.raises(ValueError):
+        await DatabaseInterface("{}{}synchronous=sometimes".format(dsn, separator)).connect()
+
+    tuned_db = DatabaseInterface("{}{}profile=fast&synchronous=OFF".format(dsn, separator))
+    await tuned_db.connect()
+    try:
+        async with tuned_db.get_session() as sess:
+            assert (await sess.fetch("PRAGMA journal_mode"))[0] == "wal"
+            assert (await sess.fetch("PRAGMA synchronous"))[0] == 0
+            assert (await sess.fetch("PRAGMA temp_store"))[0] == 2
+            assert (await sess.fetch("PRAGMA foreign_keys"))[0] == 1
+    finally:
+        await tuned_db.close()
+
+
+async def test_sqlite3_other_loop(db: DatabaseInterface):
+    if db.backend != "sqlite3":
+        pytest.skip("other backends use their driver's own loop handling")
+
+    # e.g. a module-level interface that is used inside of asyncio.run()
+    other_db = DatabaseInterface(os.environ["ASQL_DSN"])
+
+    async def _query():
+        await other_db.connect()
+        try:
+            async with other_db.get_transaction() as tr:
+                return (await tr.fetch_one("SELECT 1 + 1"))[0]
+        finally:
+            await other_db.close()
+
+    def _run():
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(_query())
+        finally:
+            loop.close()
+
+    assert await asyncio.get_event_loop().run_in_executor(None, _run) == 2
+
+
+async def test_sqlite3_single_writer(db: DatabaseInterface):
+    if db.backend != "sqlite3":
+        pytest.skip("single_writer is only used by sqlite3")
+
+    dsn = os.environ["ASQL_DSN"]
+    separator = "&" if "?" in dsn else "?"
+    split_db = DatabaseInterface("{}{}single_writer=true&max_size=2".format(dsn, separator))
+    await split_db.connect()
+    try:
+        assert split_db.connector.get_pool_size() == (3, 3)
+        async with split_db.get_transaction() as tr:
+            await tr.execute("CREATE TABLE single_writer (id INTEGER PRIMARY KEY)")
+
+        writer_pool = split_db.connector.writer_pool
+        async with split_db.get_transaction() as tr:
+            # statements that only read stay on a read-only connection
+            for sql in ("WITH v(id) AS (VALUES (1)) SELECT id FROM v",
+                        "PRAGMA table_info(single_writer)",
+                        "-- a comment\n/* and another */ SELECT COUNT(*) FROM single_writer",
+                        "VALUES (1)"):
+                assert (await tr.fetch_one(sql)) is not None
+            assert writer_pool.idle == 1
+
+            # SQLite finds the write in a CTE, and the statement is moved to the writer
+            await tr.execute("WITH v(id) AS (VALUES (100)) INSERT INTO single_writer "
+                             "SELECT id FROM v")
+            assert writer_pool.idle == 0
+            assert (await tr.fetch_one("SELECT COUNT(*) FROM single_writer"))[0] == 1
+            await tr.execute("DELETE FROM single_writer")
+
+        async def insert(i: int):
+            async with split_db.get_transaction() as tr:
+                assert (await tr.fetch_one("SELECT COUNT(*) FROM single_writer")) is not None
+                await tr.execute("INSERT INTO single_writer VALUES ({})".format(i))
+                # reads after a write see the transaction's own writes
+                row = await tr.fetch_one("SELECT id FROM single_writer WHERE id = {}".format(i))
+                assert row[0] == i
+
+        # concurrent writers wait for the writer instead of failing with "database is locked"
+        await asyncio.gather(*[insert(i) for i in range(10)])
+
+        async with split_db.get_transaction(readonly=True) as tr:
+            assert (await tr.fetch_one("SELECT COUNT(*) FROM single_writer"))[0] == 10
+            with pytest.raises(DatabaseException):
+                await tr.execute("INSERT INTO single_writer VALUES (100)")
+
+        assert split_db.connector.get_pool_size() == (3, 3)
+    finally:
+        async with split_db.get_transaction() as tr:
+            await tr.execute("DROP TABLE IF EXISTS single_writer")
+        await split_db.close()
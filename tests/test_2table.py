@@ -1,17 +1,21 @@
 """
 Tests methods of Table.
 """
+import datetime
+import decimal
 
 import pytest
 
 from asyncqlio.db import DatabaseInterface
-from asyncqlio.exc import DatabaseException
+from asyncqlio.events import SessionStats
+from asyncqlio.exc import DatabaseException, NPlusOneWarning
+from asyncqlio.orm.query import Page, innerjoin, joinedload, noload, selectload
 
 from asyncqlio.orm.schema.column import Column
 from asyncqlio.orm.schema.index import Index
 from asyncqlio.orm.schema.relationship import Relationship, ForeignKey
 from asyncqlio.orm.schema.table import table_base as table_base
-from asyncqlio.orm.schema.types import Integer, Text, String
+from asyncqlio.orm.schema.types import Integer, Text, String, Timestamp
 
 # mark all test_ functions as coroutines
 pytestmark = pytest.mark.asyncio
@@ -47,6 +51,11 @@ for body in class_bodies:
 tables = [Person, Car]
 
 
+class Event(Table):
+    id = Column(Integer(), primary_key=True)
+    at = Column(Timestamp(), nullable=True)
+
+
 async def test_create_table(db: DatabaseInterface):
     db.bind_tables(Table)
     for table in tables:
@@ -76,6 +85,113 @@ async def test_generate_schema():
         assert table.generate_schema() == body
 
 
+async def test_load_options(db: DatabaseInterface):
+    async with db.get_session() as sess:
+        await sess.insert.rows(Person(id=1, ssn=1, name="test", age=20)).run()
+        await sess.insert.rows(Person(id=2, ssn=2, name="test2", age=30)).run()
+        await sess.insert.rows(Car(id=1, owner_id=1, make="a", model="b", year=2000)).run()
+
+    async with db.get_session() as sess:
+        query = sess.select(Person).options(joinedload(Person.cars)).order_by(Person.id)
+        assert "LEFT OUTER JOIN" in query.generate_sql()[0]
+        people = await (await query.all()).flatten()
+        assert len(people) == 2
+        assert [car.id for car in people[0].cars] == [1]
+        assert list(people[1].cars) == []
+
+        query = sess.select(Person).options(innerjoin(Person.cars))
+        assert "INNER JOIN" in query.generate_sql()[0]
+        people = await (await query.all()).flatten()
+        assert [person.id for person in people] == [1]
+
+        query = sess.select(Person).options(joinedload(Person.cars), noload(Person.cars))
+        assert "JOIN" not in query.generate_sql()[0]
+        person = await query.where(Person.id == 1).first()
+        assert list(person.cars) == []
+
+
+async def test_limit_joined(db: DatabaseInterface):
+    async with db.get_session() as sess:
+        await sess.insert.rows(Car(id=2, owner_id=1, make="c", model="d", year=2010)).run()
+
+    async with db.get_session() as sess:
+        query = sess.select(Person).options(joinedload(Person.cars)).order_by(Person.id)
+        people = await (await query.limit(1).all()).flatten()
+        assert len(people) == 1
+        assert sorted(car.id for car in people[0].cars) == [1, 2]
+
+        people = await (await query.offset(1).all()).flatten()
+        assert [person.id for person in people] == [2]
+
+        # the first result still gets every joined row
+        query = sess.select(Person).options(joinedload(Person.cars)).where(Person.id == 1)
+        assert sorted(car.id for car in (await query.first()).cars) == [1, 2]
+
+        query = sess.select(Person).options(joinedload(Person.cars)).limit(1)
+        assert "FROM (SELECT" in query.where(Person.age > 10).generate_sql()[0]
+        # the subquery can't filter on the joined table
+        query = sess.select(Person).options(joinedload(Person.cars)).limit(1)
+        assert "FROM (SELECT" not in query.where(Car.year == 2010).generate_sql()[0]
+
+
+async def test_n_plus_one(db: DatabaseInterface):
+    async with db.get_session(collect_stats=True, n_plus_one_threshold=1) as sess:
+        query = sess.select(Person).options(selectload(Person.cars)).order_by(Person.id)
+        people = await (await query.all()).flatten()
+        with pytest.warns(NPlusOneWarning):
+            for person in people:
+                await (await person.cars).flatten()
+
+        assert sess.stats.statements == 3
+        assert sess.stats.rows_fetched == sess.stats.rows_hydrated == 4
+        assert sess.stats.repeated_shapes()[0][1] == 2
+
+    # only the latest event is kept, but the totals still include the older ones
+    async with db.get_session(collect_stats=True) as sess:
+        sess.stats = SessionStats(max_events=1)
+        for _ in range(3):
+            await (await sess.select(Person).order_by(Person.id).all()).flatten()
+
+        assert len(sess.stats.events) == 1 and sess.stats.statements == 3
+        assert sess.stats.rows_fetched == sess.stats.rows_hydrated == 6
+
+
+async def test_cursor_values():
+    values = [datetime.datetime(2020, 1, 2, 3, 4, 5, 6, tzinfo=datetime.timezone.utc),
+              datetime.date(2020, 1, 2), decimal.Decimal("1.10"), b"\x00\xff", None, "a", 1]
+    assert Page.decode_cursor(Page.encode_cursor(values)) == values
+
+
+async def test_paginate_nullable_timestamp(db: DatabaseInterface):
+    await Event.create()
+    try:
+        start = datetime.datetime(2020, 1, 1)
+        async with db.get_session() as sess:
+            await sess.insert.rows(*[
+                Event(id=i, at=start + datetime.timedelta(days=i % 4) if i % 3 else None)
+                for i in range(1, 11)
+            ]).run()
+
+        for at, pk in ((Event.at.asc(), Event.id.asc()), (Event.at.desc(), Event.id.desc())):
+            async with db.get_session() as sess:
+                query = sess.select(Event).order_by(at, pk)
+                expected = [event.id for event in await (await query.all()).flatten()]
+
+                seen = []
+                cursor = None
+                while True:
+                    page = await sess.select(Event).paginate(by=(at,), page_size=3,
+                                                              cursor=cursor)
+                    seen.extend(event.id for event in page)
+                    if not page.has_more:
+                        break
+                    cursor = page.next_cursor
+
+            assert seen == expected
+    finally:
+        await Event.drop()
+
+
 async def test_drop_table():
     for table in tables:
         try:
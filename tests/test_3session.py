@@ -2,10 +2,21 @@
 Tests methods of Session.
 """
 
+import asyncio
+import os
+
 import pytest
 
-from asyncqlio import DatabaseInterface
-from asyncqlio.orm.schema.table import Table
+from asyncqlio import DatabaseInterface, QueryCache, func
+from asyncqlio.cache import CachedResultSet, SingleFlight
+from asyncqlio.metrics import MetricsRegistry
+from asyncqlio.routing import LeastOutstandingBalancer
+from asyncqlio.sharding import HashRouter, RangeRouter, ShardedDatabase
+from asyncqlio.utils import find_caller, fingerprint
+from asyncqlio.orm.query import ResultGenerator
+from asyncqlio.orm.schema.column import Column
+from asyncqlio.orm.schema.table import Table, table_base
+from asyncqlio.orm.schema.types import Integer
 
 # mark all test_ functions as coroutines
 pytestmark = pytest.mark.asyncio
@@ -53,6 +64,126 @@ async def test_select(db: DatabaseInterface, table: Table):
         assert getattr(res, attr, object()) == value.format(res.id)
 
 
+async def test_paginate(db: DatabaseInterface, table: Table):
+    seen = []
+    cursor = None
+    async with db.get_session() as sess:
+        while True:
+            page = await sess.select(table).paginate(by=(table.id.desc(),), page_size=20,
+                                                     cursor=cursor)
+            assert len(page) <= 20
+            seen.extend(row.id for row in page)
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 50
+
+
+async def test_paginate_result_modes(db: DatabaseInterface, table: Table):
+    async def _paginate(build, by, key):
+        seen = []
+        cursor = None
+        while True:
+            async with db.get_session() as sess:
+                page = await build(sess).paginate(by=by(), page_size=30, cursor=cursor)
+            seen.extend(key(row) for row in page)
+            if not page.has_more:
+                return seen
+            cursor = page.next_cursor
+
+    ids = await _paginate(lambda sess: sess.select(table).tuples(), lambda: (table.id.desc(),),
+                          lambda row: row[0])
+    assert ids == list(range(49, -1, -1))
+
+    ids = await _paginate(lambda sess: sess.select(table.name, table.id).dicts(),
+                          lambda: (table.id.asc(),), lambda row: row["id"])
+    assert ids == list(range(50))
+
+    # functions can be paginated by once they are selected
+    length = func.length(table.name)
+    ids = await _paginate(lambda sess: sess.select(table.id, length).tuples(),
+                          lambda: (length.desc(), table.id.asc()), lambda row: row[0])
+    assert ids == list(range(10, 50)) + list(range(10))
+
+    async with db.get_session() as sess:
+        with pytest.raises(ValueError):
+            await sess.select(table).paginate(by=(length.desc(),))
+        with pytest.raises(ValueError):
+            await sess.select(table.name).tuples().paginate(by=(table.name.asc(),))
+
+
+async def test_seek_after_mixed_order(db: DatabaseInterface, table: Table):
+    async with db.get_session() as sess:
+        query = sess.select(table).order_by(table.email.desc(), table.id.asc())
+        first = await query.first()
+        query = sess.select(table).order_by(table.email.desc(), table.id.asc())
+        second = await query.seek_after(first).first()
+
+    assert second.email < first.email
+
+
+async def test_batches(db: DatabaseInterface, table: Table):
+    ids = []
+    async with db.get_session() as sess:
+        async for batch in sess.select(table).order_by(table.id).batches(15):
+            assert 0 < len(batch) <= 15
+            ids.extend(row.id for row in batch)
+
+    assert ids == sorted(ids)
+    assert len(ids) == 50
+
+    # without one-to-many joins, no rows are held back for the next batch
+    async with db.get_session() as sess:
+        sizes = []
+        async for batch in sess.select(table).where(table.id < 15).order_by(table.id).batches(4):
+            sizes.append(len(batch))
+
+    assert sizes == [4, 4, 4, 3]
+
+
+async def test_fetch_modes(db: DatabaseInterface, table: Table):
+    async with db.get_session() as sess:
+        sql, params = sess.select(table).order_by(table.id).generate_sql()
+        cursor = await sess.read_cursor(sql, params, fetch="one")
+        assert len(await cursor.flatten()) == 1
+        cursor = await sess.read_cursor(sql, params, fetch="all")
+        assert len(await cursor.flatten()) == 50
+
+        with pytest.raises(ValueError):
+            await sess.read_cursor(sql, params, fetch="many")
+
+        # flattening a query that hasn't been run fetches every row at once
+        gen = ResultGenerator(sess.select(table).order_by(table.id))
+        assert [row.id for row in await gen.flatten()] == list(range(50))
+        assert isinstance(gen._results, CachedResultSet)
+
+        assert (await sess.select(table).order_by(table.id.desc()).first()).id == 49
+        assert await sess.select(table).where(table.id > 100).first() is None
+        assert await sess.select(table).where(table.id > 100).count() == 0
+
+
+async def test_select_only(db: DatabaseInterface, table: Table):
+    async with db.get_session() as sess:
+        res = await sess.select(table.name).where(table.id == 2).first()
+    assert res.id == 2
+    assert res.name == kwargs["name"].format(2)
+    assert res.email is None
+
+
+async def test_select_result_modes(db: DatabaseInterface, table: Table):
+    async with db.get_session() as sess:
+        row = await sess.select(table.id, table.name).where(table.id == 3).tuples().first()
+        assert row == (3, kwargs["name"].format(3))
+
+        row = await sess.select(table.id, table.email).where(table.id == 3).dicts().first()
+        assert row == {"id": 3, "email": kwargs["email"].format(3)}
+
+        ids = await (await sess.select(table.id).order_by(table.id).scalars().all()).flatten()
+        assert ids == list(range(50))
+
+
 async def test_update(db: DatabaseInterface, table: Table):
     name = "test2"
     async with db.get_session() as sess:
@@ -63,6 +194,450 @@ async def test_update(db: DatabaseInterface, table: Table):
             assert result.name == name
 
 
+async def test_update_now_twice(db: DatabaseInterface, table: Table):
+    async with db.get_session() as sess:
+        row = await sess.select(table).where(table.id == 11).first()
+        row.name = "first"
+        await sess.update_now(row)
+        row.name = "second"
+        await sess.update_now(row)
+    async with db.get_session() as sess:
+        row = await sess.select(table).where(table.id == 11).first()
+        assert row.name == "second"
+        row.name = "test2"
+        await sess.update_now(row)
+
+
+async def test_count_exists(db: DatabaseInterface, table: Table):
+    async with db.get_session() as sess:
+        assert await sess.select(table).count() == 50
+        assert await sess.select(table).where(table.id >= 40).count() == 10
+        assert await sess.select(table).where(table.id >= 40).limit(5).count() == 5
+        assert await sess.select(table).where(table.id == 1).exists()
+        assert not await sess.select(table).where(table.id == 1000).exists()
+
+
+async def test_group_by(db: DatabaseInterface, table: Table):
+    async with db.get_session() as sess:
+        query = sess.select(func.count(table.id), table.name).group_by(table.name) \
+            .having(func.count(table.id) > 1)
+        results = await (await query.all()).flatten()
+        assert results == [(40, "test2")]
+
+        query = sess.select(func.max(table.id).label("highest")).dicts()
+        assert await query.first() == {"highest": 49}
+
+        query = sess.select(func.count(table.name), func.count(table.name, distinct=True),
+                            func.count(table.name))
+        assert await query.first() == (50, 11, 50)
+        with pytest.raises(ValueError):
+            sess.select(func.count(table.name), func.count(table.name, distinct=True)).dicts() \
+                .generate_sql()
+
+
+async def test_query_cache(db: DatabaseInterface, table: Table):
+    db.cache = QueryCache()
+    try:
+        async with db.get_session() as sess:
+            row = await sess.select(table).where(table.id == 2).cache().first()
+            assert row.name == "test2"
+            row = await sess.select(table).where(table.id == 2).cache().first()
+            assert row.name == "test2"
+            assert db.cache.hits == 1 and len(db.cache) == 1
+
+        async with db.get_session() as sess:
+            await sess.update(table).set(table.name, "cached").where(table.id == 2)
+            # writes in this session bypass the cache
+            row = await sess.select(table).where(table.id == 2).cache().first()
+            assert row.name == "cached"
+
+        assert len(db.cache) == 0
+        async with db.get_session() as sess:
+            row = await sess.select(table).where(table.id == 2).cache().first()
+            assert row.name == "cached"
+            for _ in range(2):
+                assert await sess.select(table).where(table.id == 1000).cache().first() is None
+
+        # raw SQL may have written to any table, so its uncommitted rows are never cached
+        async with db.get_session() as sess:
+            await sess.execute("INSERT INTO {} VALUES (999, 'ghost', '')"
+                               .format(table.__tablename__))
+            rows = await (await sess.select(table).where(table.id >= 999).cache().all()).flatten()
+            assert [row.id for row in rows] == [999]
+            await sess.rollback()
+
+        async with db.get_session() as sess:
+            assert await sess.select(table).where(table.id >= 999).cache().first() is None
+    finally:
+        db.cache = None
+
+
+async def test_singleflight(db: DatabaseInterface, table: Table):
+    flight = SingleFlight()
+    calls = []
+
+    async def _fetch():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return [1, 2, 3]
+
+    results = await asyncio.gather(*[flight.do(("key",), _fetch) for _ in range(5)])
+    assert results == [[1, 2, 3]] * 5
+    assert len(calls) == 1 and flight.shared == 4 and len(flight) == 0
+
+    db.singleflight = flight
+    try:
+        async def _select():
+            async with db.get_session() as sess:
+                return (await sess.select(table).where(table.id == 3).first()).name
+
+        assert await asyncio.gather(_select(), _select()) == ["test3", "test3"]
+
+        async def _select_none():
+            async with db.get_session() as sess:
+                query = sess.select(table).where(table.id == 1000)
+                return await (await query.all()).flatten()
+
+        assert await asyncio.gather(_select_none(), _select_none()) == [[], []]
+
+        # results larger than max_rows are streamed to each caller instead of being shared
+        async def _select_ids(limit: int):
+            async with db.get_session() as sess:
+                query = sess.select(table).where(table.id < limit).order_by(table.id)
+                return [row.id for row in await (await query.all()).flatten()]
+
+        flight.max_rows = 2
+        flight.shared = 0
+        assert await asyncio.gather(_select_ids(2), _select_ids(2)) == [[0, 1]] * 2
+        assert flight.shared == 1
+        assert await asyncio.gather(_select_ids(5), _select_ids(5)) == [list(range(5))] * 2
+        assert flight.shared == 1
+
+        # uncommitted raw SQL must not leak to other sessions
+        async def _select_ghost(sess):
+            query = sess.select(table).where(table.id == 998)
+            return [row.id for row in await (await query.all()).flatten()]
+
+        async with db.get_session() as writer:
+            await writer.execute("INSERT INTO {} VALUES (998, 'ghost', '')"
+                                 .format(table.__tablename__))
+            async with db.get_session() as reader:
+                results = await asyncio.gather(_select_ghost(writer), _select_ghost(reader))
+            assert results == [[998], []]
+            await writer.rollback()
+    finally:
+        db.singleflight = None
+
+
+async def test_replicas(table: Table):
+    dsn = os.environ["ASQL_DSN"]
+    db = DatabaseInterface(dsn, replicas=[dsn, dsn], balancer=LeastOutstandingBalancer(),
+                           read_your_writes=60)
+    async with db:
+        async with db.get_session(readonly=True) as sess:
+            assert sess.transaction.connector in db.replica_connectors
+            assert (await sess.select(table).where(table.id == 3).first()).name == "test3"
+            with pytest.raises(RuntimeError):
+                await sess.update(table).set(table.name, "test3").where(table.id == 3)
+
+        # read-write sessions only use the primary, and never share the rows of a replica
+        db.singleflight = SingleFlight()
+
+        async def _select(sess):
+            return await (await sess.select(table).where(table.id == 3).all()).flatten()
+
+        async with db.get_session() as sess, db.get_session(readonly=True) as replica_sess:
+            await asyncio.gather(_select(sess), _select(replica_sess))
+        assert db.singleflight.shared == 0
+        db.singleflight = None
+
+        async with db.get_session() as sess:
+            assert (await sess.select(table).where(table.id == 3).first()).name == "test3"
+            assert not any(db.balancer.outstanding.values())
+            await sess.execute("UPDATE test SET name = 'test3' WHERE id = 3")
+
+        # read-only sessions use the primary for a while after a raw write is committed
+        async with db.get_session(readonly=True) as sess:
+            assert sess.transaction.connector is db.connector
+
+        assert not any(db.balancer.outstanding.values())
+
+
+async def test_autocommit_snapshot(db: DatabaseInterface, table: Table):
+    async with db.get_session(readonly=True, autocommit=True) as sess:
+        assert sess.transaction.autocommit
+        assert (await sess.select(table).where(table.id == 3).first()).name == "test3"
+
+    async with db.get_session(readonly=True, snapshot=True) as sess:
+        assert sess.transaction.snapshot and sess.transaction.readonly
+        assert await sess.select(table).count() == 50
+
+    with pytest.raises(ValueError):
+        db.get_session(autocommit=True)
+
+
+async def test_snapshot_isolation(db: DatabaseInterface, table: Table):
+    dsn = os.environ["ASQL_DSN"]
+    if db.backend == "sqlite3":
+        # without WAL, the snapshot would stop the other session from committing
+        dsn = "{}{}journal_mode=WAL".format(dsn, "&" if "?" in dsn else "?")
+
+    iso_db = DatabaseInterface(dsn, cache=QueryCache(), singleflight=True)
+
+    async def _name(sess):
+        rows = await (await sess.select(table).where(table.id == 4).cache().all()).flatten()
+        return rows[0].name
+
+    async with iso_db:
+        try:
+            async with iso_db.get_session(readonly=True, snapshot=True) as snap:
+                assert await _name(snap) == "test4"
+                async with iso_db.get_session() as sess:
+                    await sess.update(table).set(table.name, "changed").where(table.id == 4)
+
+                # neither read can be answered by the other, or by the cache
+                async with iso_db.get_session(readonly=True) as other:
+                    assert await _name(snap) == "test4"
+                    assert await _name(other) == "changed"
+                    assert await _name(snap) == "test4"
+                    names = await asyncio.gather(_name(snap), _name(other), _name(snap))
+                    assert names == ["test4", "changed", "test4"]
+        finally:
+            async with iso_db.get_session() as sess:
+                await sess.update(table).set(table.name, "test4").where(table.id == 4)
+
+
+async def test_events(db: DatabaseInterface, table: Table):
+    fired = []
+
+    def listener(event):
+        fired.append(event)
+
+    for name in ("after_execute", "on_fetch", "on_hydrate", "on_error"):
+        db.events.add_listener(name, listener)
+
+    try:
+        async with db.get_session() as sess:
+            rows = await (await sess.select(table).where(table.id <= 5).all()).flatten()
+            with pytest.raises(Exception):
+                await sess.execute("select * from nonexistent_table")
+    finally:
+        for name in ("after_execute", "on_fetch", "on_hydrate", "on_error"):
+            db.events.remove_listener(name, listener)
+
+    assert not db.events.active
+    select_event = fired[0]
+    # the same event is passed to after_execute, on_fetch and on_hydrate
+    assert fired[:3] == [select_event] * 3
+    assert select_event.rowcount == select_event.hydrated == len(rows) > 0
+    assert select_event.total_time >= select_event.execute_time > 0
+    assert fired[-1].error is not None
+
+    with pytest.raises(ValueError):
+        db.events.add_listener("on_nothing", listener)
+
+
+async def test_events_cached(db: DatabaseInterface, table: Table):
+    fired = []
+
+    def listener(event):
+        fired.append(event)
+
+    for name in ("after_execute", "on_fetch", "on_hydrate"):
+        db.events.add_listener(name, listener)
+
+    db.cache = QueryCache()
+    try:
+        for _ in range(2):
+            async with db.get_session() as sess:
+                query = sess.select(table).where(table.id <= 5).cache()
+                rows = await (await query.all()).flatten()
+    finally:
+        db.cache = None
+        for name in ("after_execute", "on_fetch", "on_hydrate"):
+            db.events.remove_listener(name, listener)
+
+    # only the query that filled the cache was run
+    assert len(fired) == 3 and fired[0] is fired[1] is fired[2]
+    assert fired[0].rowcount == fired[0].hydrated == len(rows) > 0
+    assert fired[0].fetch_time > 0
+
+
+async def test_slow_query_log(table: Table):
+    # a threshold of 0 makes every query slow
+    slow_db = DatabaseInterface(os.environ["ASQL_DSN"], slow_query_threshold=0,
+                                explain_slow_queries=True)
+    await slow_db.connect()
+    try:
+        async with slow_db.get_session() as sess:
+            await sess.select(table).where(table.id == 2).first()
+
+        await slow_db.slow_queries.wait_for_plans()
+        entry = list(slow_db.slow_queries)[-1]
+        assert entry.shape.startswith("SELECT") and entry.duration >= 0
+        assert entry.location.startswith(__file__)
+        assert entry.plan
+
+        # each shape is only explained once per interval
+        log = slow_db.slow_queries
+        for interval, max_explains, explained in ((60, 2, False), (0, 0, False), (0, 2, True)):
+            log.explain_interval, log.max_explains = interval, max_explains
+            async with slow_db.get_session() as sess:
+                await sess.select(table).where(table.id == 3).first()
+
+            await log.wait_for_plans()
+            assert bool(list(log)[-1].plan) == explained
+    finally:
+        await slow_db.close()
+
+
+async def test_explain(db: DatabaseInterface, table: Table):
+    async with db.get_session() as sess:
+        plan = await sess.select(table).where(table.id == 2).explain()
+        assert table.__tablename__ in {node.table for node in plan.walk()}
+        assert str(plan)
+
+        plan = await sess.delete(table).where(table.id == 2).explain()
+        assert plan.nodes
+        # explaining without analyzing doesn't run the query
+        assert await sess.select(table).where(table.id == 2).exists()
+
+
+async def test_metrics(table: Table):
+    metrics = MetricsRegistry()
+    metrics_db = DatabaseInterface(os.environ["ASQL_DSN"], metrics=metrics)
+    await metrics_db.connect()
+    try:
+        async with metrics_db.get_session() as sess:
+            await (await sess.select(table).all()).flatten()
+    finally:
+        await metrics_db.close()
+
+    labels = 'backend="{}",kind="SELECT",table="{}"'.format(metrics_db.backend,
+                                                            table.__tablename__)
+    rendered = metrics.render()
+    assert "# TYPE asyncqlio_query_duration_seconds histogram" in rendered
+    assert "asyncqlio_query_duration_seconds_count{{{}}} 1".format(labels) in rendered
+    assert 'asyncqlio_query_rows_bucket{{{},le="+Inf"}} 1'.format(labels) in rendered
+    assert "asyncqlio_transaction_duration_seconds_count" in rendered
+    assert "asyncqlio_pool_acquire_seconds_count" in rendered
+
+    # pool sizes the driver doesn't know are left out
+    metrics_db.connector.get_pool_size = lambda: (None, None)
+    rendered = metrics.render()
+    assert "asyncqlio_pool_size" not in rendered and "asyncqlio_pool_idle" not in rendered
+    assert "asyncqlio_pool_in_use" in rendered
+
+
+async def test_statement_stats(table: Table):
+    stats_db = DatabaseInterface(os.environ["ASQL_DSN"], track_statements=True)
+    await stats_db.connect()
+    try:
+        async with stats_db.get_session() as sess:
+            # IN-lists of different lengths have the same fingerprint
+            for ids in ((1, 2), (3, 4, 5), (6,)):
+                await (await sess.select(table).where(table.id.in_(*ids)).all()).flatten()
+
+        entry = stats_db.statement_stats(limit=1)[0]
+        assert "IN (...)" in entry["fingerprint"]
+        assert entry["calls"] == 3 and entry["rows"] > 0
+        assert entry["total_time"] > 0 and entry["p99_bucket"] >= entry["max_time"] > 0
+
+        # fetches of statements that were removed to make room aren't recorded as new entries
+        statements = stats_db.statements
+        statements.max_entries = 1
+        async with stats_db.get_session() as sess:
+            results = await sess.select(table).where(table.id == 1).all()
+            await sess.select(table).where(table.id > 1).count()
+            await results.flatten()
+
+        assert len(statements) == 1 and all(entry["calls"] for entry in statements.top())
+    finally:
+        await stats_db.close()
+
+    with pytest.raises(RuntimeError):
+        DatabaseInterface(os.environ["ASQL_DSN"]).statement_stats()
+
+
+async def test_fingerprint():
+    assert fingerprint("SELECT * FROM t1 WHERE a = :a AND b IN ($1, $2) AND c > 18") == \
+        "SELECT * FROM t1 WHERE a = ? AND b IN (...) AND c > ?"
+    # casts aren't params, and every form of number is a literal
+    assert fingerprint("SELECT x::int, 1.5e3, 2E-4, .5 FROM t1") == \
+        "SELECT x::int, ?, ?, ? FROM t1"
+
+
+async def test_find_caller():
+    # code in a directory next to the package, whose name starts with the package's name
+    package_dir = os.path.dirname(os.path.abspath(find_caller.__code__.co_filename))
+    filename = os.path.join(package_dir + "_app", "views.py")
+    code = compile("frame, _ = find_caller()", filename, "exec")
+    namespace = {"find_caller": find_caller}
+    exec(code, namespace)
+    assert namespace["frame"].f_code.co_filename == filename
+
+
+async def test_sharding(table: Table):
+    assert HashRouter().get_shard(7, 3) == 1
+    assert HashRouter().get_shard("tenant", 3) == HashRouter().get_shard("tenant", 3)
+    assert [RangeRouter([10, 20]).get_shard(key, 3) for key in (5, 10, 25)] == [0, 1, 2]
+
+    # both shards hold the same rows, so every row is returned twice
+    dsn = os.environ["ASQL_DSN"]
+    async with ShardedDatabase([DatabaseInterface(dsn), DatabaseInterface(dsn)]) as shards:
+        results = await shards.select_all(
+            lambda sess: sess.select(table.id).order_by(table.id.desc()).scalars()
+            .limit(4).offset(1)
+        )
+        assert results == [49, 48, 48, 47]
+
+        # every column is selected by default, in any result mode
+        results = await shards.select_all(
+            lambda sess: sess.select(table).order_by(table.id.desc()).tuples().limit(3)
+        )
+        assert [row[0] for row in results] == [49, 49, 48]
+        results = await shards.select_all(
+            lambda sess: sess.select(table).order_by(table.id.desc()).dicts().limit(3)
+        )
+        assert [row["id"] for row in results] == [49, 49, 48]
+
+        # the ordered column must be selected to merge the results
+        with pytest.raises(ValueError):
+            await shards.select_all(
+                lambda sess: sess.select(table.name).order_by(table.id).scalars()
+            )
+
+
+async def test_sharding_nulls(db: DatabaseInterface):
+    class Score(table_base()):
+        id = Column(Integer(), primary_key=True)
+        points = Column(Integer(), nullable=True)
+
+    dsn = os.environ["ASQL_DSN"]
+    async with ShardedDatabase([DatabaseInterface(dsn), DatabaseInterface(dsn)]) as shards:
+        shards.bind_tables(Score)
+        await shards.create_tables(Score)
+        try:
+            async with shards.databases[1].get_session() as sess:
+                await sess.insert.rows(*[Score(id=i, points=None if i % 2 else i)
+                                         for i in range(6)])
+
+            # both shards hold the same rows, so the merge must keep NULLs where the database
+            # puts them
+            for sorter in (Score.points.asc(), Score.points.desc()):
+                async with db.get_session() as sess:
+                    expected = await (await sess.select(Score.points).order_by(sorter)
+                                      .scalars().all()).flatten()
+
+                results = await shards.select_all(
+                    lambda sess: sess.select(Score.points).order_by(sorter).scalars()
+                )
+                assert results == [value for value in expected for _ in range(2)]
+        finally:
+            async with db.get_ddl_session() as sess:
+                await sess.drop_table(Score.__tablename__)
+
+
 async def test_upsert(db: DatabaseInterface, table: Table):
     async with db.get_session() as sess:
         query = sess.insert.rows(table(id=1, name="upsert", email="notupdated"))